@@ -1,11 +1,12 @@
 
 import re
 import json
+import hashlib
 from enum import Enum
 from jsonpath_ng import jsonpath, parse
 from os.path import join, dirname
 
-from textx import metamodel_from_file, metamodel_from_str
+from textx import metamodel_from_file
 from textx.export import metamodel_export, model_export
 from textx.exceptions import TextXSyntaxError, TextXSemanticError
 
@@ -13,6 +14,16 @@ from akashic.exceptions import AkashicError, ErrType
 from akashic.ads.data_checker import DataChecker
 from akashic.ads.data_fetcher import DataFetcher
 
+from akashic.meta_models.meta_model_cache import META_MODEL_CACHE
+
+from akashic.util.type_converter import py_to_clips_type
+from akashic.util.string_util import to_clips_string
+
+
+# Attributes which are built from DSD model, data provider restored
+# from ruleset bundle builds them when one of them is first used
+LAZY_ATTRIBUTES = ["dsd", "fields_map", "primary_key_field",
+                   "slot_plan", "checker", "fetcher"]
 
 class FactGenType(Enum):
     def __str__(self):
@@ -36,6 +47,8 @@ class DataProvider(object):
         
         Main operation is loading the meta-model which describes and defines
         the grammar and structure of single data source definition.
+        Meta-model is compiled only once per process and then taken
+        from the process-wide meta-model cache.
         """
 
         self.env_provider = env_provider
@@ -43,11 +56,21 @@ class DataProvider(object):
         # this_folder = dirname(__file__)
         # self.meta_model = metamodel_from_file(
         #                     join(this_folder, 'meta_model.tx'), debug=False)
-        self.meta_model = metamodel_from_str(self.env_provider.dsd_mm, 
-                                             debug=False)
+        self.meta_model = META_MODEL_CACHE.get(self.env_provider.dsd_mm)
         self.dsd = None
+        self.dsd_string = None
+        self.model_id = None
         self.checker = None
         self.fetcher = None
+        self.fingerprint = None
+
+        # Indexes of DSD fields, built when DSD is loaded
+        self.fields_map = {}
+        self.primary_key_field = None
+
+        # Pairs '(slot name, DSD type)' used to build facts
+        # directly from Python values
+        self.slot_plan = []
 
         self.clips_template = None
 
@@ -71,6 +94,9 @@ class DataProvider(object):
 
         try:
             self.dsd = self.meta_model.model_from_str(dsd_string)
+            self.dsd_string = dsd_string
+            self.model_id = self.dsd.model_id
+            self.build_field_indexes()
             return 
         except RecursionError as re:
             message = "Infinite left recursion is detected. " \
@@ -93,6 +119,78 @@ class DataProvider(object):
     
 
 
+    def restore(self, dsd_string, model_id, fingerprint, clips_template):
+        """ Restores data provider without parsing its DSD
+
+        Parameters
+        ----------
+        dsd_string : str
+            String containing data source definition
+        model_id : str
+            Model id of the DSD
+        fingerprint : str
+            Fingerprint of the DSD
+        clips_template : str
+            CLIPS template generated from the DSD
+
+        Details
+        -------
+        Used to restore data providers from ruleset bundle, which
+        holds only already checked DSDs. DSD is loaded and set up
+        when its model, field indexes, checker or fetcher are
+        first used.
+        """
+
+        self.dsd_string = dsd_string
+        self.model_id = model_id
+        self.fingerprint = fingerprint
+        self.clips_template = clips_template
+        for name in LAZY_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+
+
+
+    def __getattr__(self, name):
+        # Called only for missing attributes, i.e. lazy attributes
+        # of restored data provider
+        if not name in LAZY_ATTRIBUTES:
+            raise AttributeError(name)
+
+        dsd_string = self.__dict__.get("dsd_string")
+        if dsd_string == None:
+            raise AttributeError(name)
+
+        self.fetcher = None
+        self.load(dsd_string)
+        self.setup()
+        return self.__dict__[name]
+
+
+
+    def build_field_indexes(self):
+        """ Builds field lookup indexes of loaded DSD
+
+        Details
+        -------
+        If DSD contains more fields with the same name (or more
+        primary-key fields), the first one is indexed, as lookups
+        by scanning the field list returned the first one.
+        """
+
+        self.fields_map = {}
+        self.primary_key_field = None
+        for field in self.dsd.fields:
+            if not field.field_name in self.fields_map:
+                self.fields_map[field.field_name] = field
+            if self.primary_key_field == None and \
+            field.use_as == "\"primary-key\"":
+                self.primary_key_field = field
+
+        self.slot_plan = [(field_name, field.type) \
+                          for field_name, field in self.fields_map.items()]
+
+
+
     def setup(self):
         """ Setup DataChecker and DataFetcher based on 
             loaded data source definition
@@ -107,10 +205,59 @@ class DataProvider(object):
             self.fetcher = DataFetcher(
                 self.dsd.auth_header, self.dsd.additional_headers)
 
+        self.fingerprint = self.build_fingerprint()
         return 0
+
+
+
+    def build_fingerprint(self):
+        """ Builds fingerprint of loaded data source definition
+
+        Details
+        -------
+        Fingerprint covers everything transpiled rules depend on:
+        model id, field names, types and usages, web reflection
+        setting and web operations with their referenced models.
+
+        Returns
+        -------
+        str
+            Hex digest of sha256 hash
+        """
+
+        fields = [self.describe_field(field) for field in self.dsd.fields]
+
+        apis = []
+        if hasattr(self.dsd, "apis") and self.dsd.apis:
+            for operation in ["create", "update", "delete"]:
+                api = getattr(self.dsd.apis, operation, None)
+                if not api:
+                    continue
+                refs = [[ref.model_id, ref.field_name, ref.url_placement] \
+                        for ref in api.ref_models]
+                apis.append([operation, refs])
+
+        fingerprint_source = json.dumps([
+            self.dsd.model_id,
+            self.dsd.can_reflect,
+            fields,
+            apis
+        ])
+        return hashlib.sha256(fingerprint_source.encode('utf-8')).hexdigest()
         
 
 
+    def describe_field(self, field):
+        return [
+            field.field_name,
+            field.type,
+            field.use_as,
+            getattr(field, "ref_foreign_model_id", None),
+            getattr(field, "ref_foreign_field_name", None)
+        ]
+
+
+
     # EXTERNAL OPERATIONS SECTION
     ################################################################
 
@@ -125,10 +272,36 @@ class DataProvider(object):
             If field with given name is not found
         """
 
-        for field in self.dsd.fields:
-            if field.field_name == field_name:
-                return field
-        return None
+        return self.fields_map.get(field_name)
+
+
+
+    def field_signature(self, field_name=None):
+        """ Returns signature of field with given name
+
+        Details
+        -------
+        Signature covers everything transpiled rule depends on when
+        it references the field. If field name is None, signature
+        of the whole model (its fingerprint) is returned.
+
+        Returns
+        -------
+        list
+            Field name, type, usage and foreign reference
+        str
+            Fingerprint, if field name is None
+        None
+            If field with given name is not found
+        """
+
+        if field_name == None:
+            return self.fingerprint
+
+        field = self.field_lookup(field_name)
+        if field == None:
+            return None
+        return self.describe_field(field)
 
 
 
@@ -189,7 +362,8 @@ class DataProvider(object):
         1. We loop through all fields of this data source definition.
         2. We locate DSD field in JSON object and read data from it.
         3. We translate BOOLEAN to INTEGER, if present.
-        4. We add quotes to STRING type, if present.
+        4. We add quotes to STRING type, if present, and escape
+           quotes and backslashes inside of it.
 
         Returns
         -------
@@ -230,8 +404,7 @@ class DataProvider(object):
                 else:
                     resolved_value = 0
             elif field.type == "STRING":
-                resolved_value = "\"{0}\"" \
-                                 .format(result)
+                resolved_value = to_clips_string(str(result))
 
             clips_fields.append("\t(" + str(field.field_name) + " " + \
                                 str(resolved_value) + ")")
@@ -320,6 +493,75 @@ class DataProvider(object):
 
 
 
+    def generate_fact_slots(self, record, complete=True):
+        """ Generates slots of CLIPS fact from given record of
+            Python values
+
+        Parameters
+        ----------
+        record : dict
+            Pairs 'field name: value'
+        complete : bool
+            If True, value of every field must be given, otherwise
+            only given fields are generated (to modify existing fact)
+
+        Details
+        -------
+        Unlike CLIPS fact in string form, slots are asserted without
+        parsing, so STRING values are passed as they are and do not
+        have to be quoted.
+
+        1. We loop through slot plan of this data source definition.
+        2. We check if type of the value matches type of the field,
+           INTEGER value is accepted for FLOAT field.
+        3. We translate BOOLEAN to INTEGER, if present.
+
+        Returns
+        -------
+        slots: dict
+            Pairs 'slot name: value' for template assert_fact
+
+        Raises
+        ------
+        AkashicError
+            If record does not have value of right type for every
+            field, or it has unknown field
+        """
+
+        slots = {}
+        for field_name, field_type in self.slot_plan:
+            if not field_name in record and not complete:
+                continue
+            if not field_name in record:
+                message = "Value of field '{0}' is omitted from the " \
+                          "record of model '{1}'." \
+                          .format(field_name, self.model_id)
+                raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+
+            value = record[field_name]
+            value_type = py_to_clips_type(value.__class__)
+            if value_type == "INTEGER" and field_type == "FLOAT":
+                value = float(value)
+            elif value_type != field_type:
+                message = "Type missmatch in field '{0}' of model '{1}'. " \
+                          "Expected type '{2}'. Given type is '{3}'." \
+                          .format(field_name, self.model_id,
+                                  field_type, value_type)
+                raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+            elif value_type == "BOOLEAN":
+                value = int(value)
+            slots[field_name] = value
+
+        if len(record) > len(slots):
+            for name in record:
+                if not name in slots:
+                    message = "Model '{0}' does not have field '{1}'." \
+                              .format(self.model_id, name)
+                    raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+        return slots
+
+
+
     # API OPERATIONS SECTION 
     ################################################################
 
@@ -386,9 +628,7 @@ class DataProvider(object):
 
 
     def get_primary_key_field(self):
-        for field in self.dsd.fields:
-            if field.use_as == "\"primary-key\"":
-                return field
+        return self.primary_key_field
 
 
     def construct_query(self, **kwargs):
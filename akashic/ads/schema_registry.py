@@ -0,0 +1,144 @@
+import uuid
+import threading
+
+
+class SchemaRegistry(object):
+    """ SchemaRegistry class
+
+    We use this class to find data providers (DSD models) and their
+    fields by name, without scanning lists of data providers.
+
+    Details
+    -------
+    Registry maps model_id to data provider. Field and primary-key
+    lookups use indexes built by data provider when its DSD is loaded.
+    Every addition or removal of data provider replaces the whole map
+    and increases registry version, so readers always see consistent
+    set of models, and caches of anything derived from DSDs can be
+    keyed on the version.
+    """
+
+    def __init__(self):
+        """ SchemaRegistry constructor method
+
+        Init empty model map, version counter and lock which guards
+        updates.
+        """
+
+        self.registry_id = uuid.uuid4().hex
+        self.version = 0
+        self.models = {}
+        self.lock = threading.Lock()
+
+
+
+    def add(self, data_provider):
+        """ Adds data provider to the registry
+
+        Parameters
+        ----------
+        data_provider : DataProvider
+            Data provider with loaded DSD
+
+        Returns
+        -------
+        bool
+            False if data provider with the same model_id is
+            already registered, True otherwise
+        """
+
+        model_id = data_provider.model_id
+        with self.lock:
+            if model_id in self.models:
+                return False
+            models = self.models.copy()
+            models[model_id] = data_provider
+            self.models = models
+            self.version += 1
+        return True
+
+
+
+    def remove(self, model_id):
+        """ Removes data provider with given model_id from the registry
+
+        Returns
+        -------
+        DataProvider
+            Removed data provider, or None if it is not registered
+        """
+
+        with self.lock:
+            if not model_id in self.models:
+                return None
+            models = self.models.copy()
+            data_provider = models.pop(model_id)
+            self.models = models
+            self.version += 1
+        return data_provider
+
+
+
+    def lookup(self, model_id):
+        """ Searches data provider with given model_id
+
+        Returns
+        -------
+        DataProvider
+            Data provider if found, None otherwise
+        """
+
+        return self.models.get(model_id)
+
+
+
+    def field_lookup(self, model_id, field_name):
+        """ Searches field of given model
+
+        Returns
+        -------
+        object
+            DSD field object if found, None otherwise
+        """
+
+        data_provider = self.models.get(model_id)
+        if data_provider == None:
+            return None
+        return data_provider.field_lookup(field_name)
+
+
+
+    def primary_key_field(self, model_id):
+        """ Searches primary-key field of given model
+
+        Returns
+        -------
+        object
+            DSD field object if found, None otherwise
+        """
+
+        data_provider = self.models.get(model_id)
+        if data_provider == None:
+            return None
+        return data_provider.get_primary_key_field()
+
+
+
+    def fingerprint(self, model_id):
+        data_provider = self.models.get(model_id)
+        if data_provider == None:
+            return None
+        return data_provider.fingerprint
+
+
+
+    def state_key(self):
+        """ Returns key which identifies current set of models
+
+        Returns
+        -------
+        tuple
+            Registry id and version
+        """
+
+        return (self.registry_id, self.version)
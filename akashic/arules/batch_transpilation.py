@@ -0,0 +1,194 @@
+from akashic.ads.data_provider import DataProvider
+from akashic.ads.schema_registry import SchemaRegistry
+
+from akashic.exceptions import AkashicError, ErrType
+
+
+# Batches with fewer rules (to transpile) than this are transpiled
+# serially, because starting worker processes costs more
+MIN_PARALLEL_BATCH = 64
+
+# Number of rule chunks per worker process, more chunks give better
+# load balancing, fewer chunks give less inter-process communication
+CHUNKS_PER_WORKER = 4
+
+
+class EnvSnapshot(object):
+    """ EnvSnapshot class
+
+    We use this class to transpile rules outside of the process which
+    owns the CLIPS environment.
+
+    Details
+    -------
+    CLIPS environment, bridges and textX models cannot be sent to
+    another process. Snapshot holds only what transpiler reads from
+    the environment provider: rule and DSD meta-models, DSD sources,
+    signatures of bridge functions, bridge signature and fact counts.
+    Data providers and schema registry are rebuilt from DSD sources
+    when snapshot is activated inside of worker process.
+    """
+
+    def __init__(self, env_provider):
+        """ EnvSnapshot constructor method
+
+        Parameters
+        ----------
+        env_provider : EnvProvider
+            Environment provider which owns the CLIPS environment
+        """
+
+        self.rule_mm = env_provider.rule_mm
+        self.dsd_mm = env_provider.dsd_mm
+        self.dsd_strings = {}
+        for dp in env_provider.data_providers:
+            self.dsd_strings[dp.model_id] = dp.dsd_string
+        self.functions = {}
+        for name, function in env_provider.functions.items():
+            self.functions[name] = {
+                "num_of_args": function["num_of_args"],
+                "return_type": function["return_type"]
+            }
+        self.bridge_signature = env_provider.get_bridge_signature()
+        self.fact_counts = env_provider.get_fact_counts()
+
+        self.data_providers = None
+        self.schema_registry = None
+
+
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["data_providers"] = None
+        state["schema_registry"] = None
+        return state
+
+
+
+    def replace_dsd(self, model_id, dsd_string):
+        """ Replaces source of DSD with given model_id
+
+        Details
+        -------
+        Used to transpile rules against changed DSD before it
+        replaces the old one in the live environment.
+        """
+
+        self.dsd_strings[model_id] = dsd_string
+
+
+
+    def activate(self):
+        """ Rebuilds data providers and schema registry from DSD sources
+
+        Returns
+        -------
+        EnvSnapshot
+            This snapshot, usable as environment provider of transpiler
+        """
+
+        self.data_providers = []
+        self.schema_registry = SchemaRegistry()
+        for dsd_string in self.dsd_strings.values():
+            data_provider = DataProvider(self)
+            data_provider.load(dsd_string)
+            data_provider.setup()
+            self.data_providers.append(data_provider)
+            self.schema_registry.add(data_provider)
+        return self
+
+
+
+    def get_bridge_signature(self):
+        return self.bridge_signature
+
+
+
+    def get_fact_counts(self):
+        return self.fact_counts
+
+
+
+class TranspilationResult(object):
+    """ TranspilationResult class
+
+    This class represents outcome of transpilation of single rule
+    inside of batch: either transpiled rule or error.
+    """
+
+    def __init__(self, rule_name=None, clips_code=None, cache_entry=None,
+                 is_from_cache=False, is_cacheable=False, error=None):
+        """ TranspilationResult constructor method
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the transpiled rule
+        clips_code : str
+            Transpiled CLIPS rule
+        cache_entry : CacheEntry
+            Entry with transpiled rule and its dependencies
+        is_from_cache : bool
+            True if rule was taken from transpilation cache
+        is_cacheable : bool
+            True if rule may be stored in transpilation cache
+        error : AkashicError
+            Error which stopped transpilation, or None
+        """
+
+        self.rule_name = rule_name
+        self.clips_code = clips_code
+        self.cache_entry = cache_entry
+        self.is_from_cache = is_from_cache
+        self.is_cacheable = is_cacheable
+        self.error = error
+
+
+
+    @property
+    def warnings(self):
+        if self.cache_entry == None:
+            return []
+        return self.cache_entry.warnings
+
+
+
+def transpile_rule(transpiler, akashic_rule):
+    """ Transpiles single rule of the batch
+
+    Details
+    -------
+    Errors are returned inside of result, so that one invalid rule
+    does not abort the whole batch. Unexpected exceptions are reported
+    as system errors of the rule.
+
+    Parameters
+    ----------
+    transpiler : Transpiler
+        Transpiler used for the batch
+    akashic_rule : str
+        String containing Akashic rule
+
+    Returns
+    -------
+    TranspilationResult
+        Result of transpilation
+    """
+
+    try:
+        transpiler.load(akashic_rule)
+    except AkashicError as e:
+        return TranspilationResult(error=e)
+    except Exception as e:
+        message = "Unexpected error while transpiling rule: {0}" \
+                  .format(str(e))
+        return TranspilationResult(
+            error=AkashicError(message, 0, 0, ErrType.SYSTEM))
+
+    return TranspilationResult(
+        transpiler.rule_name,
+        transpiler.tranpiled_rule,
+        transpiler.cache_entry,
+        transpiler.is_from_cache,
+        not transpiler.is_assistance_rule
+    )
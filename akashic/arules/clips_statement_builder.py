@@ -1,9 +1,24 @@
 
+from textx.model import get_model
+
 from akashic.arules.data_locator_table import DataLocatorTable
+from akashic.arules.lhs_optimizer import CLIPS_TOKEN
+from akashic.arules.count_index import COUNT_VALUE_FUNC
+from akashic.util.string_util import to_clips_string
 
 from akashic.exceptions import AkashicError, ErrType
 
 
+# CLIPS functions which may be called inside of count() maintained
+# by CountIndex, their results depend only on their arguments
+COUNTABLE_FUNCTIONS = [
+    "and", "or", "not", "eq", "neq", "=", "<>", "<", ">", "<=", ">=",
+    "+", "-", "*", "/", "div", "mod", "**", "abs", "min", "max",
+    "integer", "float", "str-cat", "sym-cat", "str-compare",
+    "str-index", "str-length", "sub-string", "upcase", "lowcase"
+]
+
+
 class ClipsStatementBuilder(object):
     """ CLIPSPatternBuilder class
 
@@ -73,7 +88,7 @@ class ClipsStatementBuilder(object):
             str(len(data_locator_table.table.items())))
 
         if diff_temp_count > 1:
-            line, col = self.dsd._tx_parser \
+            line, col = get_model(expression_object)._tx_parser \
                         .pos_to_linecol(expression_object._tx_position)
             message = "Total number of different templates referenced " \
                       "inside of single Special Expression must be 1, " \
@@ -97,7 +112,10 @@ class ClipsStatementBuilder(object):
             # Build special field
             field_name = field_list[len(field_list) - 1][0]
             field = field_list[len(field_list) - 1][1]
-            if field.var_name in used_vars:
+            if field.var_name in used_vars and expression == None:
+                clips_field_list.append("(" + field_name + " " + \
+                                        field.var_name + ")")
+            elif field.var_name in used_vars:
                 clips_field_list.append("(" + field_name + " " + \
                                         field.var_name + "&:" + \
                                         expression  + ")")
@@ -114,17 +132,38 @@ class ClipsStatementBuilder(object):
 
     # TODO: Add support for more templates
     def build_count_pattern(self, data_locator_table, used_vars, expression):
-        clips_template_refs = []
+        """ Builds CLIPS expression which counts facts satisfying expression
 
-        """ example: 
+        Details
+        -------
+        Count of single template, whose expression depends only on
+        fields of counted facts, reads counter maintained by the
+        CountIndex of the environment. Otherwise facts are counted
+        by query, for example:
             (length$ (find-all-facts ((?f student)) (eq ?f:gruppa ?gr)))
+
+        Fields of different templates which share variable (templates
+        joined by foreign key) are compared for equality in the query.
+
+        Returns
+        -------
+        str
+            CLIPS expression in string form
         """
+
+        clips_template_refs = []
+        template_vars = []
+        template_names = []
+        replaced_vars = {}
+        join_conditions = []
         for template_name, template in data_locator_table.table.items():
             template_var = "?" + template_name.lower() + \
                            str(self.count_operation_var_counter)
             clips_template_refs.append("(" + template_var + " " + \
                                        template_name + 
                                        ")")
+            template_vars.append(template_var)
+            template_names.append(template_name)
 
             field_list = [ (k, v) for k, v in template.fields.items() ]
             for i in range(0, len(field_list)):
@@ -132,15 +171,68 @@ class ClipsStatementBuilder(object):
                 field = field_list[i][1]
                 if field.var_name in used_vars:
                     replacement = template_var + ":" + field_name
+                    if field.var_name in replaced_vars:
+                        join_conditions.append(
+                            "(eq " + replaced_vars[field.var_name] + \
+                            " " + replacement + ")")
+                        continue
+                    replaced_vars[field.var_name] = replacement
                     expression = expression.replace(
                                     field.var_name, replacement)
 
+        if len(join_conditions) > 0:
+            expression = "(and " + expression + " " + \
+                         " ".join(join_conditions) + ")"
+
+        if len(template_names) == 1 \
+        and self.is_countable(expression, template_vars[0]):
+            return self.build_count_value(template_names[0],
+                                          template_vars[0],
+                                          expression)
+
         return "(length$ (find-all-facts (" + \
                " ".join(clips_template_refs) + ") " + \
                expression + "))"
 
 
-    
+
+    def build_count_value(self, template_name, template_var, expression):
+        """ Builds call of counter maintained by CountIndex
+        """
+
+        return "(" + COUNT_VALUE_FUNC + " " + \
+               to_clips_string(template_name) + " " + \
+               to_clips_string(template_var) + " " + \
+               to_clips_string(expression) + ")"
+
+
+
+    def is_countable(self, expression, template_var):
+        """ Checks if count can be maintained by CountIndex
+
+        Details
+        -------
+        Expression must reference only fields of counted facts and
+        call only functions whose result depends only on arguments,
+        so that its result changes only when counted fact changes.
+        """
+
+        is_call = False
+        for token in CLIPS_TOKEN.findall(expression):
+            if token == "(":
+                is_call = True
+                continue
+            if is_call and token not in COUNTABLE_FUNCTIONS:
+                return False
+            is_call = False
+
+            if (token.startswith("?") or token.startswith("$?")) \
+            and not token.startswith(template_var + ":"):
+                return False
+        return True
+
+
+
     def build_string_comparison_expr(self, op1, op1_type, 
                                      op2, op2_type, operator):
         if op1_type == "STRING" and op2_type == "STRING":
@@ -0,0 +1,425 @@
+import re
+
+from clips import CLIPSError
+
+from akashic.arules.lhs_optimizer import CLIPS_TOKEN
+
+
+# CLIPS functions defined by the index in every environment
+COUNT_VALUE_FUNC = "__count_value"
+RETRACT_FACT_FUNC = "__retract_fact"
+MODIFY_FACT_FUNC = "__modify_fact"
+FACTS_CHANGING_FUNC = "__facts_changing"
+FACTS_CHANGED_FUNC = "__facts_changed"
+
+# Prefix of generated deffunctions which apply filter to single fact
+MATCH_FUNC_PREFIX = "__count_match_"
+
+# Template name of CLIPS fact in string form
+FACT_TEMPLATE = re.compile(r'[ \t\n\r]*\([ \t\n\r]*([^\s()"]+)')
+
+
+class CountEntry(object):
+    """ CountEntry class
+
+    This class represents single counter: number of facts of one
+    template which satisfy filter expression.
+    """
+
+    def __init__(self, template_name, template_var, filter_code):
+        """ CountEntry constructor method
+
+        Parameters
+        ----------
+        template_name : str
+            Name of counted CLIPS template
+        template_var : str
+            Fact-set variable used in the filter, for example '?course0'
+        filter_code : str
+            CLIPS query expression, fields are referenced as
+            '?course0:field'
+        """
+
+        self.template_name = template_name
+        self.template_var = template_var
+        self.filter_code = filter_code
+
+        # Indexes of counted facts, None if they must be collected
+        # by scan of the working memory
+        self.facts = None
+
+        # Filter applied to single fact '?fact'
+        match_parts = []
+        for token in CLIPS_TOKEN.findall(filter_code):
+            if token.startswith(template_var + ":"):
+                match_parts.append("(fact-slot-value ?fact " + \
+                                   token[len(template_var) + 1:] + ")")
+            else:
+                match_parts.append(token)
+        self.match_code = " ".join(match_parts)
+
+        # Deffunction of the filter, None if it is not built yet,
+        # False if it cannot be built (then facts are always scanned)
+        self.match_function = None
+
+
+
+    def query(self):
+        return "(find-all-facts ((" + self.template_var + " " + \
+               self.template_name + ")) " + self.filter_code + ")"
+
+
+
+class CountIndex(object):
+    """ CountIndex class
+
+    We use this class to maintain count() aggregates of transpiled
+    rules incrementally, instead of scanning the working memory every
+    time count is evaluated.
+
+    Details
+    -------
+    Transpiler compiles count() of single template, whose filter
+    depends only on fields of counted facts, into call of
+    '__count_value'. Counter is created on its first evaluation
+    (by single scan) and then it is updated on every assert, modify
+    and retract done through EnvProvider, so reading it takes O(1).
+
+    Changes done by any other CLIPS code (RHS 'clips' statements
+    and EnvProvider.execute) are enclosed with '__facts_changing' and
+    '__facts_changed'. While such change is in progress, counts are
+    computed by scan, and all counters are collected again after it.
+    Count evaluated while pattern matching of a change is in progress
+    is computed by scan too, so results are always the same as
+    results of 'find-all-facts' query.
+
+    Primary-key index of the environment is notified about the same
+    changes, so it is kept current with the counters.
+    """
+
+    def __init__(self, env, key_index=None):
+        """ CountIndex constructor method
+
+        Parameters
+        ----------
+        env : clips.Environment
+            CLIPS environment of the index
+        key_index : KeyIndex
+            Primary-key index updated on every change of facts
+        """
+
+        self.env = env
+        self.key_index = key_index
+        self.entries = {}
+        self.template_entries = {}
+        self.changing_templates = set()
+        self.open_changes = 0
+        self.num_of_functions = 0
+
+
+
+    def define_functions(self):
+        """ Defines functions of the index in the CLIPS environment
+        """
+
+        self.env.define_function(self.count_value, COUNT_VALUE_FUNC)
+        self.env.define_function(self.retract_fact, RETRACT_FACT_FUNC)
+        self.env.define_function(self.modify_fact_func, MODIFY_FACT_FUNC)
+        self.env.define_function(self.begin_changes, FACTS_CHANGING_FUNC)
+        self.env.define_function(self.end_changes, FACTS_CHANGED_FUNC)
+
+
+
+    def count_value(self, template_name, template_var, filter_code):
+        """ Returns number of facts of template which satisfy filter
+
+        Returns
+        -------
+        int
+            The same number as '(length$ (find-all-facts ...))' query
+        """
+
+        key = (template_name, template_var, filter_code)
+        entry = self.entries.get(key)
+        if entry == None:
+            entry = CountEntry(template_name, template_var, filter_code)
+            self.entries[key] = entry
+            self.template_entries.setdefault(template_name, []).append(entry)
+
+        if self.open_changes > 0 \
+        or template_name in self.changing_templates \
+        or entry.match_function is False:
+            entry.facts = None
+            return int(self.env.eval("(length$ " + entry.query() + ")"))
+
+        if entry.facts == None:
+            facts = self.env.eval(entry.query())
+            entry.facts = set([fact.index for fact in facts])
+        return len(entry.facts)
+
+
+
+    def build_match_function(self, entry):
+        """ Builds deffunction which applies filter of the entry
+            to single fact
+
+        Details
+        -------
+        Function is called directly, which is much faster than
+        evaluation of the filter in string form. It is built after
+        the change of facts, never while pattern matching is
+        in progress.
+
+        Returns
+        -------
+        Function
+            Built CLIPS function
+        bool
+            False if function cannot be built (for example if binary
+            image is loaded)
+        """
+
+        function_name = MATCH_FUNC_PREFIX + str(self.num_of_functions)
+        self.num_of_functions += 1
+        try:
+            self.env.build("(deffunction " + function_name + " (?fact) " + \
+                           entry.match_code + ")")
+            return self.env.find_function(function_name)
+        except CLIPSError:
+            return False
+
+
+
+    def update_entries(self, template_name, fact_index, fact=None):
+        """ Adds fact to counters of its template, or removes it from
+            them if it is retracted or does not satisfy their filter
+
+        Parameters
+        ----------
+        template_name : str
+            Name of the fact template
+        fact_index : int
+            Index of the fact
+        fact : TemplateFact
+            The fact, None if it is retracted
+        """
+
+        exists = False if fact is None else fact.exists
+        for entry in self.template_entries.get(template_name, []):
+            if entry.facts == None:
+                continue
+            matches = exists
+            if exists and entry.filter_code != "TRUE":
+                if entry.match_function is None:
+                    entry.match_function = self.build_match_function(entry)
+                if entry.match_function is False:
+                    entry.facts = None
+                    continue
+                matches = entry.match_function(fact) != "FALSE"
+
+            if matches:
+                entry.facts.add(fact_index)
+            else:
+                entry.facts.discard(fact_index)
+
+
+
+    def update_keys(self, template_name, fact_index, fact=None):
+        if self.key_index != None:
+            self.key_index.update_fact(template_name, fact_index, fact)
+
+
+
+    def assert_fact(self, fact_string):
+        """ Asserts fact and adds it to counters of its template
+
+        Parameters
+        ----------
+        fact_string : str
+            CLIPS fact in string form
+
+        Returns
+        -------
+        Fact
+            Asserted fact (or the same existing fact)
+        """
+
+        match = FACT_TEMPLATE.match(fact_string)
+        template_name = match.group(1) if match != None else None
+        if template_name not in self.template_entries:
+            fact = self.env.assert_string(fact_string)
+            self.update_keys(template_name, fact.index, fact)
+            return fact
+
+        self.changing_templates.add(template_name)
+        try:
+            fact = self.env.assert_string(fact_string)
+        finally:
+            self.changing_templates.discard(template_name)
+
+        self.update_entries(template_name, fact.index, fact)
+        self.update_keys(template_name, fact.index, fact)
+        return fact
+
+
+
+    def assert_facts(self, template_name, slots_list):
+        """ Asserts facts of single template from their slots and adds
+            them to counters of the template
+
+        Details
+        -------
+        Facts are asserted through the template, without parsing
+        of CLIPS fact strings. Counters are updated once, after all
+        facts are asserted. Template is marked as changing even if it
+        has no counters, because pattern matching of the batch can
+        create them, and they must not count only part of the batch.
+
+        Parameters
+        ----------
+        template_name : str
+            Name of CLIPS template
+        slots_list : list
+            Dicts of pairs 'slot name: value', one for every fact
+
+        Returns
+        -------
+        list
+            Asserted facts (or the same existing facts)
+        """
+
+        template = self.env.find_template(template_name)
+        facts = []
+        self.changing_templates.add(template_name)
+        try:
+            for slots in slots_list:
+                facts.append(template.assert_fact(**slots))
+        finally:
+            self.changing_templates.discard(template_name)
+            for fact in facts:
+                self.update_entries(template_name, fact.index, fact)
+                self.update_keys(template_name, fact.index, fact)
+        return facts
+
+
+
+    def retract_fact(self, fact):
+        """ Retracts fact and removes it from counters of its template
+        """
+
+        template_name = fact.template.name
+        fact_index = fact.index
+        if template_name not in self.template_entries:
+            fact.retract()
+            self.update_keys(template_name, fact_index)
+            return 0
+
+        self.changing_templates.add(template_name)
+        try:
+            fact.retract()
+        finally:
+            self.changing_templates.discard(template_name)
+
+        self.update_entries(template_name, fact_index)
+        self.update_keys(template_name, fact_index)
+        return 0
+
+
+
+    def modify_fact(self, fact, slots):
+        """ Modifies slots of the fact and updates counters of its template
+
+        Parameters
+        ----------
+        fact : TemplateFact
+            Fact to modify, it keeps its index
+        slots : dict
+            Pairs 'slot name: new value'
+        """
+
+        template_name = fact.template.name
+        fact_index = fact.index
+        if template_name not in self.template_entries:
+            fact.modify_slots(**slots)
+            self.update_keys(template_name, fact_index, fact)
+            return 0
+
+        self.changing_templates.add(template_name)
+        try:
+            fact.modify_slots(**slots)
+        finally:
+            self.changing_templates.discard(template_name)
+
+        self.update_entries(template_name, fact_index, fact)
+        self.update_keys(template_name, fact_index, fact)
+        return 0
+
+
+
+    def modify_fact_func(self, fact, *args):
+        """ CLIPS function '(__modify_fact ?f slot1 value1 ...)'
+        """
+
+        slots = {}
+        for i in range(0, len(args) - 1, 2):
+            slots[str(args[i])] = args[i + 1]
+        return self.modify_fact(fact, slots)
+
+
+
+    def begin_changes(self):
+        self.open_changes += 1
+        return 0
+
+
+
+    def end_changes(self):
+        """ Ends change of facts not done through the index
+
+        Details
+        -------
+        After the last of nested changes ends, counted facts of all
+        counters are collected again when they are evaluated.
+        """
+
+        self.open_changes = max(self.open_changes - 1, 0)
+        if self.open_changes == 0:
+            self.invalidate()
+        return 0
+
+
+
+    def invalidate(self):
+        for entry in self.entries.values():
+            entry.facts = None
+        if self.key_index != None:
+            self.key_index.invalidate()
+        return 0
+
+
+
+    def reset(self):
+        """ Closes changes left open by CLIPS code which failed
+        """
+
+        if self.open_changes == 0 and len(self.changing_templates) == 0:
+            return 0
+
+        self.open_changes = 0
+        self.changing_templates = set()
+        return self.invalidate()
+
+
+
+    def remove_template(self, template_name):
+        """ Removes counters of template, when it is undefined
+        """
+
+        for entry in self.template_entries.pop(template_name, []):
+            if entry.match_function:
+                entry.match_function.undefine()
+            self.entries.pop((entry.template_name, entry.template_var,
+                              entry.filter_code), None)
+        if self.key_index != None:
+            self.key_index.remove_template(template_name)
+        return 0
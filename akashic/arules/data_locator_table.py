@@ -50,10 +50,13 @@ class DataLocatorTable(object):
     def __init__(self):
         """ DataLocatorTable constructor method
 
-        Init table as dictionary
+        Init table as dictionary.
+        Init reverse index, which maps variable name to list of
+        (template_name, field_name) pairs referenced by it.
         """
 
         self.table = {}
+        self.var_index = {}
 
 
 
@@ -87,6 +90,8 @@ class DataLocatorTable(object):
             f.dp_field = dp_field
 
             t.fields[field_name] = f
+            self.var_index.setdefault(var_name, []) \
+                          .append((template_name, field_name))
 
     
 
@@ -115,6 +120,71 @@ class DataLocatorTable(object):
         return None
 
 
+
+    def var_fields(self, var_name):
+        """ Returns data locators referenced by given variable
+
+        Parameters
+        ----------
+        var_name : str
+            Name of the variable
+
+        Returns
+        -------
+        list
+            List of (template_name, field_name) pairs, in the order
+            in which they were added
+        """
+
+        return list(self.var_index.get(var_name, []))
+
+
+
+    def rename_var(self, template_name, field_name, new_var_name):
+        """ Ascribes new variable to the given data locator
+
+        Parameters
+        ----------
+        template_name : str
+            Name of the referenced template
+        field_name : str
+            Name of the referenced field inside of referenced template
+        new_var_name : str
+            Name of the new variable
+        """
+
+        f = self.table[template_name].fields[field_name]
+        self.var_index[f.var_name].remove((template_name, field_name))
+        if len(self.var_index[f.var_name]) < 1:
+            self.var_index.pop(f.var_name)
+
+        f.var_name = new_var_name
+        self.var_index.setdefault(new_var_name, []) \
+                      .append((template_name, field_name))
+
+
+
+    def remove_var(self, var_name):
+        """ Removes all data locators referenced by given variable
+
+        Details
+        -------
+        Template is removed when it has no more fields.
+
+        Parameters
+        ----------
+        var_name : str
+            Name of the variable
+        """
+
+        for template_name, field_name in self.var_index.pop(var_name, []):
+            t = self.table[template_name]
+            t.fields.pop(field_name)
+            if len(t.fields) < 1:
+                self.table.pop(template_name)
+
+
+
     def __str__(self):
         val_array = []
         for template_name, template in self.table.items():
@@ -0,0 +1,651 @@
+import re
+
+from akashic.arules.rule_model import UnsupportedRule, RuleSyntaxError, \
+    SpecialBinaryLogicExpression, SpecialSingularLogicExpression, \
+    TestSingularLogicExpression, OneArgFunction, BridgeFunction, \
+    LogicExpression, CompExpression, PlusMinusExpr, \
+    MulDivExpr, SqrExpr, Factor, STRING_C, VARIABLE, DataLocator, \
+    TEMPLATE_CONNECTION_EXPRESSION, LHSValueLocator
+
+
+# Regular expressions are the same as in RULE_META_MODEL
+# (and textX base types)
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+ID = re.compile(r'[^\d\W]\w*\b')
+VAR_NAME = re.compile(r'\?[^\d\W]\w*\b')
+IS_QUERY = re.compile(r'\?\?*\?')
+STRICTFLOAT = re.compile(r'[+-]?(((\d+\.(\d*)?|\.\d+)([eE][+-]?\d+)?)|'
+                         r'((\d+)([eE][+-]?\d+)))(?<=[\w\.])(?![\w\.])')
+INT = re.compile(r'[-+]?[0-9]+\b')
+BOOL = re.compile(r'(True|true|False|false|0|1)\b')
+STRING_CONST = re.compile(r"(\')([^\']*)(\')")
+
+# Fixed sequences of the expression rules, whitespace is skipped
+# between their parts as textX does
+COUNT_TEMPLATE = re.compile(r'count[ \t\n\r]*\([ \t\n\r]*'
+                            r'([^\d\W]\w*\b)[ \t\n\r]*\)')
+BRACKETED_TEMPLATE = re.compile(r'([^\d\W]\w*\b)[ \t\n\r]*\]')
+LHS_VALUE_LOCATOR = re.compile(r'(\?[^\d\W]\w*\b)[ \t\n\r]*\.'
+                               r'[ \t\n\r]*([^\d\W]\w*\b)')
+CONNECTED_TEMPLATE = re.compile(r'~[ \t\n\r]*([^\d\W]\w*\b)')
+FIELD = re.compile(r'\.[ \t\n\r]*([^\d\W]\w*\b)')
+
+LOGIC = ["and", "or"]
+CMP = ["==", "!=", "<=", ">=", "<", ">"]
+PLUS_MINUS = ["+", "-"]
+MUL_DIV = ["*", "/"]
+SQR = ["^"]
+SPECIAL_SINGULAR = ["not", "exists", "forall"]
+
+# Built-in functions, called with single factor as argument
+ONE_ARG_FUNCS = ["not", "count", "str"]
+
+
+
+# Expression is not finished - parser waits for its operands
+PENDING = object()
+
+# Binary expression rules, from the loosest to the tightest binding
+LEVELS = [
+    (LogicExpression, LOGIC),
+    (CompExpression, CMP),
+    (PlusMinusExpr, PLUS_MINUS),
+    (MulDivExpr, MUL_DIV),
+    (SqrExpr, SQR)
+]
+NUM_OF_LEVELS = len(LEVELS)
+
+
+
+class PendingExpression(object):
+    """ PendingExpression class
+
+    We use this class to hold operands and operators of logic
+    expression (top level or parenthesized one) which is being parsed.
+
+    Details
+    -------
+    For every precedence level there is a list of operands and
+    operators of binary expression which is not closed yet. Levels
+    tighter than operator are closed when operator is read, so every
+    factor and every operator is handled a constant number of times.
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.starts = [start] * NUM_OF_LEVELS
+        self.operands = [None] * NUM_OF_LEVELS
+        self.operators = [None] * NUM_OF_LEVELS
+
+        # Levels from this one on get new operand lists
+        # with the next factor
+        self.fresh_level = 0
+
+
+
+    def add_factor(self, factor):
+        for level in range(self.fresh_level, NUM_OF_LEVELS):
+            self.starts[level] = factor._tx_position
+            self.operands[level] = []
+            self.operators[level] = []
+        self.fresh_level = NUM_OF_LEVELS
+        self.operands[-1].append(factor)
+
+
+
+    def add_operator(self, level, operator, end):
+        self.close_levels(level, end)
+        self.operators[level].append(operator)
+        self.fresh_level = level + 1
+
+
+
+    def finish(self, end):
+        self.close_levels(0, end)
+        return LogicExpression(self.starts[0], end,
+                               operands=self.operands[0],
+                               operator=self.operators[0])
+
+
+
+    def close_levels(self, level, end):
+        """ Closes binary expressions tighter than given level
+        """
+
+        for current in range(NUM_OF_LEVELS - 1, level, -1):
+            node_class = LEVELS[current][0]
+            node = node_class(self.starts[current], end,
+                              operands=self.operands[current],
+                              operator=self.operators[current])
+            self.operands[current - 1].append(node)
+
+
+
+class PendingFunction(object):
+    """ PendingFunction class
+
+    We use this class to hold function call whose argument
+    factors are being parsed.
+
+    Details
+    -------
+    'num_of_args' is 1 for built-in functions. It is None for bridge
+    functions, which take any number of comma separated arguments
+    in parentheses.
+    """
+
+    def __init__(self, start, func_name, num_of_args):
+        self.start = start
+        self.func_name = func_name
+        self.num_of_args = num_of_args
+        self.args = []
+
+
+
+class ExpressionParser(object):
+    """ ExpressionParser class
+
+    We use this class to parse expressions embedded in "when"
+    statements of Akashic rule.
+
+    Details
+    -------
+    Binary expressions are parsed by operator precedence, without
+    backtracking and without recursion: parenthesized expressions and
+    function calls are kept on explicit stack. Therefore parse time
+    is linear in expression length and nesting depth is not limited
+    by Python recursion limit.
+
+    Parser builds the same objects (with the same source positions)
+    as expression rules of RULE_META_MODEL do in textX: every
+    precedence level gets its binary expression object, even when it
+    holds single operand. Expression is parsed in place, inside of the
+    whole rule source, therefore positions are offsets in the rule
+    source.
+
+    Where textX could match differently than plain precedence
+    parsing does (keyword is prefix of longer name, expression holds
+    comment), UnsupportedRule is raised. Where expression is not
+    valid (textX 'Factor' rule would end up in infinite left
+    recursion, or match would cross the end of the expression
+    string), RuleSyntaxError is raised at the offset where parsing
+    failed.
+    """
+
+    def __init__(self, source):
+        """ ExpressionParser constructor method
+
+        Parameters
+        ----------
+        source : str
+            Whole rule source
+        """
+
+        self.source = source
+
+        self.pos = 0
+        self.end = 0
+        self.last_end = 0
+
+
+
+    def parse(self, entry_name, start, end):
+        """ Parses expression between given offsets
+
+        Parameters
+        ----------
+        entry_name : str
+            Name of the grammar rule expression is parsed by:
+            'Root', 'SpecialSingularLogicExpression' or 'Assertion'
+        start : int
+            Offset of the first character of expression
+        end : int
+            Offset after the last character of expression
+
+        Returns
+        -------
+        ModelNode
+            Expression object
+
+        Raises
+        ------
+        UnsupportedRule
+            If textX could parse expression differently
+        RuleSyntaxError
+            If expression is not valid
+        """
+
+        if "//" in self.source[start:end]:
+            # Comments are skipped by textX parser
+            raise UnsupportedRule()
+
+        self.pos = start
+        self.end = end
+        self.last_end = start
+
+        entry = {
+            "Root": self.logic_expression,
+            "SpecialSingularLogicExpression": \
+                self.special_singular_logic_expression,
+            "Assertion": self.assertion
+        }[entry_name]
+
+        expression = entry()
+
+        self.skip_ws()
+        if self.pos != self.end:
+            raise RuleSyntaxError("Unexpected text after the expression.",
+                                  self.pos)
+        return expression
+
+
+
+# ----------------------------------------------------------------
+#  MATCHING SECTION
+# ----------------------------------------------------------------
+
+    def skip_ws(self):
+        self.pos = WHITESPACE.match(self.source, self.pos).end()
+
+
+
+    def advance(self, new_pos):
+        if new_pos > self.end:
+            raise RuleSyntaxError("Expression is not finished.", self.end)
+        self.pos = new_pos
+        self.last_end = new_pos
+
+
+
+    def expect(self, string):
+        self.skip_ws()
+        if not self.source.startswith(string, self.pos):
+            raise RuleSyntaxError("Expected '{0}'.".format(string),
+                                  self.pos)
+        self.advance(self.pos + len(string))
+
+
+
+    def match_regex(self, regex):
+        """ Matches regular expression at current position
+
+        Returns
+        -------
+        re.Match
+            Match object, or None if regular expression does not match
+        """
+
+        self.skip_ws()
+        match = regex.match(self.source, self.pos)
+        if match != None:
+            self.advance(match.end())
+        return match
+
+
+
+    def prefix(self, keywords):
+        """ Finds keyword textX would match at current position
+
+        Details
+        -------
+        textX matches keywords as plain strings, in grammar order,
+        so keyword can be matched as prefix of longer name.
+
+        Returns
+        -------
+        str
+            Keyword, or None if no keyword matches
+        """
+
+        for keyword in keywords:
+            if self.source.startswith(keyword, self.pos):
+                return keyword
+        return None
+
+
+
+    def word(self):
+        match = ID.match(self.source, self.pos)
+        if match == None:
+            return None
+        return match.group()
+
+
+
+    def logic_operator(self):
+        """ Finds logic operator at current position
+
+        Raises
+        ------
+        UnsupportedRule
+            If logic operator is prefix of longer name
+        """
+
+        operator = self.prefix(LOGIC)
+        if operator != None and operator != self.word():
+            raise UnsupportedRule()
+        return operator
+
+
+
+    def binary_operator(self):
+        """ Finds binary operator at current position
+
+        Returns
+        -------
+        tuple
+            Precedence level and operator, or (None, None) if there is
+            no operator at current position
+        """
+
+        self.skip_ws()
+        if self.pos >= self.end:
+            return None, None
+
+        for level in range(NUM_OF_LEVELS - 1, 0, -1):
+            operator = self.prefix(LEVELS[level][1])
+            if operator != None:
+                return level, operator
+
+        operator = self.logic_operator()
+        if operator != None:
+            return 0, operator
+        return None, None
+
+
+
+# ----------------------------------------------------------------
+#  SPECIAL EXPRESSIONS SECTION
+# ----------------------------------------------------------------
+
+    def assertion(self):
+        self.skip_ws()
+        if self.prefix(SPECIAL_SINGULAR) != None \
+        or self.source.startswith('[', self.pos):
+            return self.special_binary_logic_expression()
+        return self.test_singular_logic_expression()
+
+
+
+    def special_binary_logic_expression(self):
+        self.skip_ws()
+        start = self.pos
+        operands = [self.special_singular_logic_expression()]
+        operator = []
+
+        while True:
+            self.skip_ws()
+            current_operator = self.logic_operator()
+            if current_operator == None:
+                break
+            self.advance(self.pos + len(current_operator))
+            operator.append(current_operator)
+            operands.append(self.special_singular_logic_expression())
+
+        return SpecialBinaryLogicExpression(start, self.last_end,
+                                            operands=operands,
+                                            operator=operator)
+
+
+
+    def special_singular_logic_expression(self):
+        self.skip_ws()
+        start = self.pos
+
+        operator = self.prefix(SPECIAL_SINGULAR)
+        if operator != None:
+            self.advance(self.pos + len(operator))
+        self.expect('[')
+
+        match = self.match_regex(BRACKETED_TEMPLATE)
+        if match != None:
+            return SpecialSingularLogicExpression(
+                start, self.last_end,
+                operator=operator, template=match.group(1), operand=None)
+
+        operand = self.logic_expression()
+        self.expect(']')
+        return SpecialSingularLogicExpression(
+            start, self.last_end,
+            operator=operator, template='', operand=operand)
+
+
+
+    def test_singular_logic_expression(self):
+        self.skip_ws()
+        start = self.pos
+        self.expect('test')
+        self.expect('[')
+        operand = self.logic_expression()
+        self.expect(']')
+        return TestSingularLogicExpression(start, self.last_end,
+                                           operator='test',
+                                           operand=operand)
+
+
+
+# ----------------------------------------------------------------
+#  EXPRESSIONS SECTION
+# ----------------------------------------------------------------
+
+    def logic_expression(self):
+        """ Parses logic expression
+
+        Details
+        -------
+        Stack holds PendingExpression objects of parenthesized
+        expressions and PendingFunction objects of function calls
+        whose arguments are being parsed. Finished factor is handed
+        to the object on top of the stack, which can finish it
+        (function call) and hand the result further down.
+
+        Returns
+        -------
+        LogicExpression
+            Expression object, text after it is not consumed
+        """
+
+        stack = [PendingExpression(self.pos)]
+        expect_factor = True
+
+        while True:
+            if expect_factor:
+                factor = self.factor(stack)
+                if factor == None:
+                    continue
+            else:
+                expression = stack[-1]
+                level, operator = self.binary_operator()
+                if operator != None:
+                    expression.add_operator(level, operator, self.last_end)
+                    self.advance(self.pos + len(operator))
+                    expect_factor = True
+                    continue
+
+                value = expression.finish(self.last_end)
+                stack.pop()
+                if not stack:
+                    return value
+                self.expect(')')
+                factor = Factor(expression.start, self.last_end,
+                                value=value)
+
+            # Hand finished factor to the innermost pending object
+            while True:
+                pending = stack[-1]
+                if isinstance(pending, PendingExpression):
+                    pending.add_factor(factor)
+                    expect_factor = False
+                    break
+
+                pending.args.append(factor)
+                if pending.num_of_args == None:
+                    self.skip_ws()
+                    if self.source.startswith(',', self.pos):
+                        self.advance(self.pos + 1)
+                        expect_factor = True
+                        break
+                    self.expect(')')
+                    function = BridgeFunction(pending.start, self.last_end,
+                                              func_name=pending.func_name,
+                                              args=pending.args)
+                else:
+                    function = OneArgFunction(pending.start, self.last_end,
+                                              func_name=pending.func_name,
+                                              template='', args=factor)
+
+                stack.pop()
+                factor = Factor(pending.start, self.last_end, value=function)
+
+
+
+    def factor(self, stack):
+        """ Parses factor
+
+        Details
+        -------
+        Alternatives are checked in order of the 'Factor' rule.
+        Parenthesized expression and function with argument are not
+        parsed here, they are pushed to the stack.
+
+        Last alternative of the 'Factor' rule ('value=LogicExpression',
+        without parentheses) starts at the same position in textX,
+        so it recurses until RecursionError. Therefore, if no other
+        alternative matches, operand is missing.
+
+        Returns
+        -------
+        Factor
+            Factor object, or None if factor is pushed to the stack
+        """
+
+        self.skip_ws()
+        start = self.pos
+        if start >= self.end:
+            raise RuleSyntaxError("Expected operand.", start)
+
+        value = self.function(stack)
+        if value == None:
+            value = self.constant()
+        if value == None:
+            value = self.locator()
+        if value == None:
+            if not self.source.startswith('(', start):
+                raise RuleSyntaxError("Expected operand.", start)
+            self.advance(start + 1)
+            stack.append(PendingExpression(start))
+            return None
+
+        if value is PENDING:
+            return None
+        return Factor(start, self.last_end, value=value)
+
+
+
+    def function(self, stack):
+        """ Parses function call
+
+        Details
+        -------
+        Built-in functions take single factor as argument. Any other
+        name followed by parenthesis is call of bridge function, its
+        existence and number of arguments are checked by transpiler.
+
+        Returns
+        -------
+        object
+            Function object, PENDING if function with arguments is
+            pushed to the stack, or None if there is no function call
+        """
+
+        start = self.pos
+        word = self.word()
+        if word == None:
+            return None
+
+        match = self.match_regex(COUNT_TEMPLATE)
+        if match != None:
+            return OneArgFunction(start, self.last_end, func_name='count',
+                                  template=match.group(1), args=None)
+
+        if word in ONE_ARG_FUNCS:
+            self.advance(start + len(word))
+            stack.append(PendingFunction(start, word, 1))
+            return PENDING
+
+        args_start = WHITESPACE.match(self.source, start + len(word)).end()
+        if not self.source.startswith('(', args_start):
+            return None
+
+        self.advance(args_start + 1)
+        self.skip_ws()
+        if self.source.startswith(')', self.pos):
+            self.advance(self.pos + 1)
+            return BridgeFunction(start, self.last_end,
+                                  func_name=word, args=[])
+
+        stack.append(PendingFunction(start, word, None))
+        return PENDING
+
+
+
+    def constant(self):
+        start = self.pos
+
+        match = self.match_regex(STRICTFLOAT)
+        if match != None:
+            return float(match.group())
+
+        match = self.match_regex(INT)
+        if match != None:
+            return int(match.group())
+
+        match = self.match_regex(BOOL)
+        if match != None:
+            value = match.group()
+            return value == '1' or value.lower() == 'true'
+
+        match = self.match_regex(STRING_CONST)
+        if match != None:
+            return STRING_C(start, self.last_end, val=match.group())
+        return None
+
+
+
+    def locator(self):
+        start = self.pos
+
+        if self.source.startswith('?', start):
+            match = self.match_regex(LHS_VALUE_LOCATOR)
+            if match != None:
+                return LHSValueLocator(start, self.last_end,
+                                       var_name=match.group(1),
+                                       field_name=match.group(2))
+            match = self.match_regex(VAR_NAME)
+            if match != None:
+                return VARIABLE(start, self.last_end, var_name=match.group())
+            return None
+
+        match = self.match_regex(ID)
+        if match == None:
+            return None
+        templates = [match.group()]
+        while True:
+            match = self.match_regex(CONNECTED_TEMPLATE)
+            if match == None:
+                break
+            templates.append(match.group(1))
+        template_conn_expr = TEMPLATE_CONNECTION_EXPRESSION(
+            start, self.last_end, templates=templates)
+
+        match = self.match_regex(FIELD)
+        if match == None:
+            return None
+        field = match.group(1)
+
+        match = self.match_regex(IS_QUERY)
+        is_query = match.group() if match != None else ''
+
+        return DataLocator(start, self.last_end,
+                           template_conn_expr=template_conn_expr,
+                           field=field, is_query=is_query)
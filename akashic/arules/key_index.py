@@ -0,0 +1,176 @@
+class KeyEntry(object):
+    """ KeyEntry class
+
+    This class represents primary-key index of single template:
+    facts of the template by value of their primary-key slot.
+    """
+
+    def __init__(self, template_name, key_field):
+        """ KeyEntry constructor method
+
+        Parameters
+        ----------
+        template_name : str
+            Name of indexed CLIPS template
+        key_field : str
+            Name of primary-key slot
+        """
+
+        self.template_name = template_name
+        self.key_field = key_field
+
+        # Facts by key value and by fact index (more facts can have
+        # the same key), None if they must be collected by scan
+        # of the working memory
+        self.facts = None
+        self.keys = None
+
+
+
+    def add(self, fact_index, fact):
+        key = key_value(fact[self.key_field])
+        self.facts.setdefault(key, {})[fact_index] = fact
+        self.keys[fact_index] = key
+
+
+
+    def discard(self, fact_index):
+        key = self.keys.pop(fact_index, None)
+        facts = self.facts.get(key)
+        if facts == None:
+            return
+        facts.pop(fact_index, None)
+        if len(facts) < 1:
+            del self.facts[key]
+
+
+
+class KeyIndex(object):
+    """ KeyIndex class
+
+    We use this class to find fact of DSD model by value of its
+    primary key in O(1), instead of matching it by temporary rule
+    or scanning the working memory.
+
+    Details
+    -------
+    Template is indexed on its first lookup (by single scan), and
+    then the index is updated by CountIndex on every assert, modify
+    and retract done through EnvProvider. Changes done by any other
+    CLIPS code invalidate all indexes, so they are collected again
+    on the next lookup.
+    """
+
+    def __init__(self, env):
+        """ KeyIndex constructor method
+
+        Parameters
+        ----------
+        env : clips.Environment
+            CLIPS environment of the index
+        """
+
+        self.env = env
+        self.entries = {}
+
+
+
+    def get_fact(self, template_name, key_field, value, scan=False):
+        """ Returns fact of template with given primary-key value
+
+        Parameters
+        ----------
+        template_name : str
+            Name of CLIPS template
+        key_field : str
+            Name of primary-key slot
+        value : object
+            Value of primary key
+        scan : bool
+            If True, working memory is scanned and the index is not
+            used, because facts are being changed by other CLIPS code
+
+        Returns
+        -------
+        TemplateFact
+            The most recently asserted fact with given key, None if
+            there is no such fact
+        """
+
+        entry = self.entries.get(template_name)
+        if entry == None or entry.key_field != key_field:
+            entry = KeyEntry(template_name, key_field)
+            self.entries[template_name] = entry
+
+        if scan:
+            entry.facts = None
+            facts = [fact for fact in self.scan(template_name) \
+                     if key_value(fact[key_field]) == key_value(value)]
+            return facts[-1] if len(facts) > 0 else None
+
+        if entry.facts == None:
+            entry.facts = {}
+            entry.keys = {}
+            for fact in self.scan(template_name):
+                entry.add(fact.index, fact)
+
+        facts = entry.facts.get(key_value(value))
+        if facts == None:
+            return None
+        return facts[max(facts)]
+
+
+
+    def scan(self, template_name):
+        return self.env.eval("(find-all-facts ((?f " + template_name + \
+                             ")) TRUE)")
+
+
+
+    def update_fact(self, template_name, fact_index, fact=None):
+        """ Adds fact to the index of its template, or removes it from
+            it if it is retracted
+
+        Parameters
+        ----------
+        template_name : str
+            Name of the fact template
+        fact_index : int
+            Index of the fact
+        fact : TemplateFact
+            The fact, None if it is retracted
+        """
+
+        entry = self.entries.get(template_name)
+        if entry == None or entry.facts == None:
+            return 0
+
+        entry.discard(fact_index)
+        if fact is not None and fact.exists:
+            entry.add(fact_index, fact)
+        return 0
+
+
+
+    def invalidate(self):
+        for entry in self.entries.values():
+            entry.facts = None
+            entry.keys = None
+        return 0
+
+
+
+    def remove_template(self, template_name):
+        """ Removes index of template, when it is undefined
+        """
+
+        self.entries.pop(template_name, None)
+        return 0
+
+
+
+def key_value(value):
+    # CLIPS stores BOOLEAN as INTEGER
+    if value.__class__ == bool:
+        return int(value)
+    return value
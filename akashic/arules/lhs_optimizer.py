@@ -0,0 +1,393 @@
+import re
+from enum import Enum
+
+
+# Token of CLIPS conditional element: string, parenthesis or atom
+CLIPS_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[()]|[^\s()"]+')
+
+# Single-field or multifield variable, without constraint connectives
+CLIPS_VAR = re.compile(r'\$?\?([^\s()&|~:=<>"]+)')
+
+# Variables, wildcards and connectives of field constraint
+CONSTRAINT_SYNTAX = re.compile(r'\$?\?[^\s()&|~:=<>"]*|[&|~:=]')
+
+# Conditional elements which only filter partial matches
+FILTER_CES = ["test", "not", "exists", "forall"]
+
+# Conditional elements which cannot be moved
+BARRIER_CES = ["or", "logical"]
+
+# Number of facts assumed for template when fact count is unknown
+DEFAULT_FACT_COUNT = 100
+
+# Estimated fraction of facts which satisfy single constraint
+CONSTRAINT_SELECTIVITY = 0.1
+
+# Estimated fraction of facts which join on single shared variable
+JOIN_SELECTIVITY = 0.1
+
+
+class CEKind(Enum):
+    """ CEKind enum class
+
+    We use this class to define kind of analysed
+    CLIPS conditional element
+    """
+
+    def __str__(self):
+        return str(self.name)
+
+    PATTERN     = 1
+    FILTER      = 2
+    BARRIER     = 3
+
+
+
+class ConditionalElement(object):
+    """ ConditionalElement class
+
+    This class represents single analysed CLIPS conditional element
+    of the rule LHS.
+    """
+
+    def __init__(self, clips_code, kind):
+        """ ConditionalElement constructor method
+
+        Set CLIPS code and kind of conditional element.
+        Init sets of bound and used variables, and set of variables
+        used before the conditional element binds them.
+        Set template name to None and number of constraints to 0.
+        """
+
+        self.clips_code = clips_code
+        self.kind = kind
+        self.binds = set()
+        self.uses = set()
+        self.unbound_uses = set()
+        self.deps = set()
+        self.template_name = None
+        self.num_of_constraints = 0
+
+
+
+class LHSOptimizer(object):
+    """ LHSOptimizer class
+
+    We use this class to reorder conditional elements of the
+    transpiled rule LHS, so that CLIPS (which joins patterns from left
+    to right) keeps as few partial matches as possible.
+
+    Details
+    -------
+    Patterns are placed greedily: next pattern is the one with the
+    smallest estimated number of matching facts, based on fact counts
+    of templates, its constant and predicate constraints and variables
+    shared with already placed patterns. Pattern is placed only after
+    patterns which bind variables used in its constraints.
+    Conditional elements which only filter partial matches (test, not,
+    exists, forall) are placed immediately after the last pattern which
+    binds their variables. Conditional elements 'or' and 'logical', and
+    code which cannot be analysed, are never moved and nothing is moved
+    across them.
+    """
+
+    def __init__(self, fact_counts=None):
+        """ LHSOptimizer constructor method
+
+        Parameters
+        ----------
+        fact_counts : dict
+            Pairs 'template_name: number of facts' from the live
+            environment, or None if statistics are not available
+        """
+
+        self.fact_counts = fact_counts
+
+
+
+    def optimize(self, clips_commands):
+        """ Reorders given LHS conditional elements
+
+        Parameters
+        ----------
+        clips_commands : list
+            List of LHS conditional elements in string form
+
+        Returns
+        -------
+        list
+            Reordered list of conditional elements in string form
+        """
+
+        ces = []
+        for clips_code in clips_commands:
+            ces.extend(self.analyse(clips_code))
+
+        # Variables local to filter conditional elements are
+        # not dependencies
+        bound_anywhere = set()
+        for ce in ces:
+            if ce.kind != CEKind.FILTER:
+                bound_anywhere |= ce.binds
+        for ce in ces:
+            ce.deps = ((ce.uses - ce.binds) | ce.unbound_uses) \
+                      & bound_anywhere
+
+        result = []
+        bound = set()
+        segment = []
+        for ce in ces:
+            if ce.kind == CEKind.BARRIER:
+                result.extend(self.order_segment(segment, bound))
+                result.append(ce)
+                bound |= ce.binds
+                segment = []
+            else:
+                segment.append(ce)
+        result.extend(self.order_segment(segment, bound))
+
+        return [ce.clips_code for ce in result]
+
+
+
+    def order_segment(self, segment, bound):
+        """ Orders conditional elements between two barriers
+
+        Parameters
+        ----------
+        segment : list
+            List of ConditionalElement objects in original order
+        bound : set
+            Variables bound before the segment, it is updated with
+            variables bound inside of the segment
+
+        Returns
+        -------
+        list
+            Ordered list of ConditionalElement objects
+        """
+
+        remaining = list(segment)
+        ordered = []
+        while len(remaining) > 0:
+            ready_filter = None
+            for ce in remaining:
+                if ce.kind == CEKind.FILTER and ce.deps <= bound:
+                    ready_filter = ce
+                    break
+
+            if ready_filter != None:
+                ordered.append(ready_filter)
+                remaining.remove(ready_filter)
+                continue
+
+            best = None
+            best_estimate = None
+            for ce in remaining:
+                if ce.kind != CEKind.PATTERN or not ce.deps <= bound:
+                    continue
+                estimate = self.estimate_matches(ce, bound)
+                if best == None or estimate < best_estimate:
+                    best = ce
+                    best_estimate = estimate
+
+            # Nothing can be placed safely, keep the original order
+            if best == None:
+                ordered.extend(remaining)
+                break
+
+            ordered.append(best)
+            remaining.remove(best)
+            bound |= best.binds
+
+        return ordered
+
+
+
+    def estimate_matches(self, ce, bound):
+        """ Estimates number of facts matching pattern
+
+        Parameters
+        ----------
+        ce : ConditionalElement
+            Pattern conditional element
+        bound : set
+            Variables bound by already placed patterns
+
+        Returns
+        -------
+        float
+            Estimated number of facts which match the pattern and
+            join with already placed patterns
+        """
+
+        fact_count = DEFAULT_FACT_COUNT
+        if self.fact_counts != None:
+            fact_count = max(self.fact_counts.get(ce.template_name, 0), 1)
+
+        return fact_count * \
+               CONSTRAINT_SELECTIVITY ** ce.num_of_constraints * \
+               JOIN_SELECTIVITY ** len(ce.binds & bound)
+
+
+
+# ----------------------------------------------------------------
+#  ANALYSIS SECTION
+# ----------------------------------------------------------------
+
+    def analyse(self, clips_code):
+        """ Analyses conditional element given in string form
+
+        Details
+        -------
+        Conditional element 'and' is split into its operands.
+
+        Returns
+        -------
+        list
+            List of ConditionalElement objects
+        """
+
+        items = self.parse(clips_code)
+        if items == None:
+            return [ConditionalElement(clips_code, CEKind.BARRIER)]
+
+        fact_address_var = None
+        if len(items) == 3 and isinstance(items[0], str) \
+        and CLIPS_VAR.fullmatch(items[0]) and items[1] == "<-" \
+        and isinstance(items[2], list):
+            fact_address_var = CLIPS_VAR.fullmatch(items[0]).group(1)
+            items = items[2:]
+
+        if len(items) != 1 or not isinstance(items[0], list) \
+        or len(items[0]) < 1 or not isinstance(items[0][0], str):
+            ce = ConditionalElement(clips_code, CEKind.BARRIER)
+            ce.binds = self.variables(items)
+            return [ce]
+
+        ce_list = items[0]
+        head = ce_list[0]
+
+        if head == "and" and fact_address_var == None:
+            ces = []
+            for operand in ce_list[1:]:
+                ces.extend(self.analyse(self.serialize(operand)))
+            return ces
+
+        if head in BARRIER_CES or head == "and":
+            ce = ConditionalElement(clips_code, CEKind.BARRIER)
+            ce.binds = self.variables(items)
+            return [ce]
+
+        if head in FILTER_CES:
+            ce = ConditionalElement(clips_code, CEKind.FILTER)
+            ce.uses = self.variables(ce_list[1:])
+            return [ce]
+
+        ce = ConditionalElement(clips_code, CEKind.PATTERN)
+        ce.template_name = head
+        if fact_address_var != None:
+            ce.binds.add(fact_address_var)
+
+        for field in ce_list[1:]:
+            if isinstance(field, list) and len(field) > 0 \
+            and isinstance(field[0], str) and not CLIPS_VAR.match(field[0]):
+                # Slot of template pattern
+                self.analyse_constraint(ce, field[1:])
+            else:
+                # Field of ordered pattern
+                self.analyse_constraint(ce, [field])
+        return [ce]
+
+
+
+    def analyse_constraint(self, ce, terms):
+        """ Analyses constraint of single slot (or field)
+
+        Details
+        -------
+        Variable which starts the constraint is bound by the pattern.
+        Variables inside of predicate and return value constraints,
+        or after connectives, are used by the pattern. Slots are
+        analysed in order, so variable used before the pattern binds
+        it stays the dependency of the pattern.
+        """
+
+        has_literal = False
+        has_call = False
+        for i in range(0, len(terms)):
+            term = terms[i]
+            if isinstance(term, list):
+                has_call = True
+                self.use_variables(ce, self.variables(term))
+                continue
+
+            if term.startswith('"'):
+                has_literal = True
+                continue
+
+            start = 0
+            match = CLIPS_VAR.match(term)
+            if i == 0 and match:
+                ce.binds.add(match.group(1))
+                start = match.end()
+
+            rest = term[start:]
+            self.use_variables(ce, set(CLIPS_VAR.findall(rest)))
+            if CONSTRAINT_SYNTAX.sub('', rest) != "":
+                has_literal = True
+
+        ce.num_of_constraints += int(has_literal) + int(has_call)
+
+
+
+    def use_variables(self, ce, variables):
+        ce.uses |= variables
+        ce.unbound_uses |= variables - ce.binds
+
+
+
+    def variables(self, items):
+        found = set()
+        for item in items:
+            if isinstance(item, list):
+                found |= self.variables(item)
+            elif not item.startswith('"'):
+                found |= set(CLIPS_VAR.findall(item))
+        return found
+
+
+
+    def parse(self, clips_code):
+        """ Parses CLIPS code into nested lists of tokens
+
+        Returns
+        -------
+        list
+            List of top level items
+        None
+            If parentheses are not balanced
+        """
+
+        stack = [[]]
+        for token in CLIPS_TOKEN.findall(clips_code):
+            if token == "(":
+                stack.append([])
+            elif token == ")":
+                if len(stack) < 2:
+                    return None
+                item = stack.pop()
+                stack[-1].append(item)
+            else:
+                stack[-1].append(token)
+
+        if len(stack) != 1:
+            return None
+        return stack[0]
+
+
+
+    def serialize(self, item):
+        if isinstance(item, list):
+            return "(" + " ".join([self.serialize(i) for i in item]) + ")"
+        return item
@@ -0,0 +1,319 @@
+from akashic.arules.lhs_optimizer import CLIPS_TOKEN, CLIPS_VAR
+
+from akashic.enums.construct_type import ConstructType
+
+
+# Functions whose arguments (except the first one) are not always
+# evaluated, their subexpressions are evaluated only when needed
+SHORT_CIRCUIT_FUNCTIONS = ["and", "or", "if", "while", "switch"]
+
+
+class RHSOptimizer(object):
+    """ RHSOptimizer class
+
+    We use this class to eliminate common subexpressions from
+    the transpiled rule RHS.
+
+    Details
+    -------
+    Binding variables are expanded into their CLIPS expressions
+    wherever they are used, so the same expression (for example
+    '(* ?v1 1.2)', or '(fact-slot-value ?c credits)') is often
+    evaluated several times in every rule activation. Expressions are
+    parsed into hash-consed trees (identical subexpressions are the
+    same tuple), repeated subexpressions are bound once to generated
+    variable (with CLIPS 'bind', right before the first command using
+    them) and all their occurrences reference that variable.
+
+    Only commands generated by the transpiler are optimized. CLIPS
+    code written by the user is never changed and nothing is shared
+    across it, because it could change facts read by subexpressions.
+    CLIPS does not allow 'bind' in LHS, so LHS is not optimized.
+    """
+
+    def __init__(self, variable_table):
+        """ RHSOptimizer constructor method
+
+        Parameters
+        ----------
+        variable_table : VariableTable
+            Variable table of the transpiled rule, used to generate
+            unique names of helper variables
+        """
+
+        self.variable_table = variable_table
+        self.nodes = {}
+        self.sizes = {}
+
+
+
+    def optimize(self, clips_commands, optimizable):
+        """ Eliminates common subexpressions from given RHS commands
+
+        Parameters
+        ----------
+        clips_commands : list
+            List of RHS commands in string form
+        optimizable : set
+            Indexes of commands generated by the transpiler
+
+        Returns
+        -------
+        list
+            List of RHS commands in string form, with 'bind' commands
+            of helper variables
+        """
+
+        result = []
+        segment = []
+        for i in range(0, len(clips_commands)):
+            command = None
+            if i in optimizable:
+                command = self.parse(clips_commands[i])
+
+            if command != None:
+                segment.append((clips_commands[i], command))
+            else:
+                result.extend(self.optimize_segment(segment))
+                result.append(clips_commands[i])
+                segment = []
+        result.extend(self.optimize_segment(segment))
+        return result
+
+
+
+    def optimize_segment(self, segment):
+        """ Eliminates common subexpressions shared by commands
+            of one segment
+
+        Details
+        -------
+        The largest repeated subexpression is replaced first, until
+        no subexpression is repeated. Subexpressions of replaced
+        expression, which are used elsewhere, are replaced inside
+        of its value too.
+
+        Parameters
+        ----------
+        segment : list
+            List of pairs (command in string form, parsed command)
+
+        Returns
+        -------
+        list
+            List of commands in string form
+        """
+
+        commands = [command for clips_code, command in segment]
+        helpers = []
+        while True:
+            counts = {}
+            for command in commands:
+                self.count(command, counts, True)
+            for var_name, value in helpers:
+                self.count(value, counts, True)
+
+            repeated = None
+            for node, count in counts.items():
+                if count < 2:
+                    continue
+                if repeated == None or self.size(node) > self.size(repeated):
+                    repeated = node
+            if repeated == None:
+                break
+
+            var_name = self.variable_table.add_helper_var({
+                "content": self.serialize(repeated),
+                "content_type": None,
+                "construct_type": ConstructType.NORMAL_EXP,
+                "_tx_position": None
+            })
+            commands = [self.replace(command, repeated, var_name) \
+                        for command in commands]
+            helpers = [(helper_name, self.replace(value, repeated, var_name)) \
+                       for helper_name, value in helpers]
+            helpers.append((var_name, repeated))
+
+        if len(helpers) == 0:
+            return [clips_code for clips_code, command in segment]
+
+        helper_values = dict(helpers)
+        bound = set()
+        result = []
+        for i in range(0, len(segment)):
+            clips_code, original = segment[i]
+            for var_name in self.variables(commands[i]):
+                result.extend(self.bind(var_name, helper_values, bound))
+            if commands[i] is original:
+                result.append(clips_code)
+            else:
+                result.append(self.serialize(commands[i]))
+        return result
+
+
+
+    def bind(self, var_name, helper_values, bound):
+        """ Builds 'bind' commands of helper variable and helper
+            variables used in its value, which are not bound yet
+
+        Returns
+        -------
+        list
+            List of 'bind' commands in string form
+        """
+
+        if var_name not in helper_values or var_name in bound:
+            return []
+
+        bound.add(var_name)
+        value = helper_values[var_name]
+        commands = []
+        for used_var_name in self.variables(value):
+            commands.extend(self.bind(used_var_name, helper_values, bound))
+        commands.append("(bind " + var_name + " " + \
+                        self.serialize(value) + ")")
+        return commands
+
+
+
+# ----------------------------------------------------------------
+#  EXPRESSION TREE SECTION
+# ----------------------------------------------------------------
+
+    def count(self, node, counts, is_root=False):
+        """ Counts always evaluated occurrences of subexpressions
+
+        Details
+        -------
+        Root node is a command (or value of helper variable), it is
+        never counted.
+        """
+
+        if not isinstance(node, tuple) or len(node) == 0:
+            return
+
+        if not is_root and self.is_eliminable(node):
+            counts[node] = counts.get(node, 0) + 1
+
+        children = node[1:]
+        if node[0] in SHORT_CIRCUIT_FUNCTIONS:
+            children = node[1:2]
+        for child in children:
+            self.count(child, counts)
+
+
+
+    def is_eliminable(self, node):
+        """ Checks if subexpression can be bound to helper variable
+
+        Details
+        -------
+        Subexpression must be function call which uses variables of
+        the rule. Calls which use fact-set query variables
+        ('?f:slot') are local to the query and cannot be moved.
+        """
+
+        if len(node) < 2 or not isinstance(node[0], str) \
+        or node[0].startswith("?") or node[0].startswith('"'):
+            return False
+
+        has_var = False
+        for var_token in self.var_tokens(node):
+            if ":" in var_token:
+                return False
+            has_var = True
+        return has_var
+
+
+
+    def var_tokens(self, node):
+        for item in node:
+            if isinstance(item, tuple):
+                yield from self.var_tokens(item)
+            elif item.startswith("?") or item.startswith("$?"):
+                yield item
+
+
+
+    def variables(self, node):
+        """ Returns names of variables used in the node, in order
+            of their first occurrence
+        """
+
+        found = []
+        for var_token in self.var_tokens(node):
+            match = CLIPS_VAR.match(var_token)
+            if match != None and match.group(0) not in found:
+                found.append(match.group(0))
+        return found
+
+
+
+    def replace(self, node, target, var_name):
+        if node is target:
+            return var_name
+        if not isinstance(node, tuple):
+            return node
+
+        children = tuple([self.replace(child, target, var_name) \
+                          for child in node])
+        return self.intern(children)
+
+
+
+    def size(self, node):
+        if not isinstance(node, tuple):
+            return 1
+        if node not in self.sizes:
+            self.sizes[node] = sum([self.size(child) for child in node])
+        return self.sizes[node]
+
+
+
+    def intern(self, node):
+        """ Returns shared instance of given tree
+
+        Details
+        -------
+        Identical trees are represented by the same tuple, so that
+        subexpressions can be compared by identity.
+        """
+
+        return self.nodes.setdefault(node, node)
+
+
+
+    def parse(self, clips_code):
+        """ Parses CLIPS command into hash-consed tree
+
+        Returns
+        -------
+        tuple
+            Tree of the command, strings are atoms
+        None
+            If code is not single balanced command
+        """
+
+        stack = [[]]
+        for token in CLIPS_TOKEN.findall(clips_code):
+            if token == "(":
+                stack.append([])
+            elif token == ")":
+                if len(stack) < 2:
+                    return None
+                item = self.intern(tuple(stack.pop()))
+                stack[-1].append(item)
+            else:
+                stack[-1].append(token)
+
+        if len(stack) != 1 or len(stack[0]) != 1 \
+        or not isinstance(stack[0][0], tuple):
+            return None
+        return stack[0][0]
+
+
+
+    def serialize(self, node):
+        if isinstance(node, tuple):
+            return "(" + " ".join([self.serialize(i) for i in node]) + ")"
+        return node
@@ -0,0 +1,178 @@
+import copy
+
+
+class RuleDependencyEntry(object):
+    """ RuleDependencyEntry class
+
+    This class represents single rule, which is live in the CLIPS
+    environment, together with DSD models and fields it depends on.
+    """
+
+    def __init__(self, rule_name, akashic_rule, cache_entry):
+        """ RuleDependencyEntry constructor method
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the rule
+        akashic_rule : str
+            String containing Akashic rule, used for recompilation
+        cache_entry : CacheEntry
+            Transpiled rule with its dependencies
+        """
+
+        self.rule_name = rule_name
+        self.akashic_rule = akashic_rule
+        self.cache_entry = cache_entry
+
+
+
+    @property
+    def model_ids(self):
+        return set(self.cache_entry.dependencies.keys())
+
+
+
+    def needs_recompile(self, model_id, old_data_provider, new_data_provider):
+        """ Checks if rule must be transpiled again after DSD change
+
+        Details
+        -------
+        Rule which depends only on unchanged fields of the model (or
+        only on its template) keeps its CLIPS code. If fields of the
+        rule are unknown (rule was transpiled before fields were
+        tracked), any change of model fingerprint recompiles the rule.
+
+        Parameters
+        ----------
+        model_id : str
+            Model id of the changed DSD
+        old_data_provider : DataProvider
+            Data provider which is replaced
+        new_data_provider : DataProvider
+            Data provider which replaces it
+
+        Returns
+        -------
+        bool
+            True if rule must be transpiled again
+        """
+
+        if new_data_provider.model_id != model_id:
+            return True
+
+        field_dependencies = self.cache_entry.field_dependencies
+        if field_dependencies == None:
+            return old_data_provider.fingerprint != \
+                   new_data_provider.fingerprint
+
+        for dep_model_id, field_name in field_dependencies:
+            if dep_model_id != model_id:
+                continue
+            if old_data_provider.field_signature(field_name) != \
+               new_data_provider.field_signature(field_name):
+                return True
+        return False
+
+
+
+    def rebased(self, model_id, fingerprint):
+        """ Returns copy of cache entry valid for changed DSD
+
+        Details
+        -------
+        Used for rules which keep their CLIPS code, so that persisted
+        dependencies reference the new fingerprint of the model.
+        """
+
+        cache_entry = copy.copy(self.cache_entry)
+        cache_entry.dependencies = dict(self.cache_entry.dependencies)
+        cache_entry.dependencies[model_id] = fingerprint
+        cache_entry.schema_key = None
+        return cache_entry
+
+
+
+class RuleDependencyTable(object):
+    """ RuleDependencyTable class
+
+    We use this class to find live rules which depend on given DSD
+    model, without scanning all rules.
+
+    Details
+    -------
+    Table maps rule name to its entry and keeps reverse index from
+    model id to names of rules which reference the model.
+    """
+
+    def __init__(self):
+        """ RuleDependencyTable constructor method
+
+        Init empty rule map and reverse model index.
+        """
+
+        self.rules = {}
+        self.model_index = {}
+
+
+
+    def add(self, rule_name, akashic_rule, cache_entry):
+        """ Adds rule to the table, replacing older entry
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the rule
+        akashic_rule : str
+            String containing Akashic rule
+        cache_entry : CacheEntry
+            Transpiled rule with its dependencies
+        """
+
+        self.remove(rule_name)
+        entry = RuleDependencyEntry(rule_name, akashic_rule, cache_entry)
+        self.rules[rule_name] = entry
+        for model_id in entry.model_ids:
+            self.model_index.setdefault(model_id, set()).add(rule_name)
+
+
+
+    def remove(self, rule_name):
+        """ Removes rule from the table
+
+        Returns
+        -------
+        RuleDependencyEntry
+            Removed entry, or None if rule is not in the table
+        """
+
+        entry = self.rules.pop(rule_name, None)
+        if entry == None:
+            return None
+
+        for model_id in entry.model_ids:
+            rule_names = self.model_index.get(model_id)
+            if rule_names != None:
+                rule_names.discard(rule_name)
+                if len(rule_names) == 0:
+                    del self.model_index[model_id]
+        return entry
+
+
+
+    def lookup(self, rule_name):
+        return self.rules.get(rule_name)
+
+
+
+    def dependent_rules(self, model_id):
+        """ Finds entries of rules which reference given model
+
+        Returns
+        -------
+        list
+            List of RuleDependencyEntry objects, ordered by rule name
+        """
+
+        rule_names = sorted(self.model_index.get(model_id, set()))
+        return [self.rules[rule_name] for rule_name in rule_names]
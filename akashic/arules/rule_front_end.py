@@ -0,0 +1,570 @@
+import re
+
+from akashic.arules.rule_model import UnsupportedRule, SourceMap, \
+    process_model, Rule, RuleParameter, LHS, RHS, LHSStatement, \
+    SYMBOLIC_VAR, BINDING_VAR, FACT_ADDRESS_VAR, ASSERTION, LHS_CLIPS_CODE, \
+    RHSStatement, CreateStatement, ReturnStatement, UpdateStatement, DeleteStatement, \
+    RHS_CLIPS_CODE, JSONObject, FieldEntry, RHSValueLocator, RHS_VARIABLE
+from akashic.arules.expression_parser import ExpressionParser
+
+
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+JSON_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+JSON_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+
+# Regular expressions are the same as in RULE_META_MODEL
+# (and textX base types)
+TX_STRING = re.compile(r'("(\\"|[^"])*")|(\'(\\\'|[^\'])*\')')
+TX_CLIPS_CODE = re.compile(r'(\")(.*)(\")')
+TX_ID = re.compile(r'[ \t\n\r]*([^\d\W]\w*\b)[ \t\n\r]*$')
+TX_INT = re.compile(r'[-+]?[0-9]+\b')
+TX_VAR_KEY = re.compile(r'[ \t\n\r]*(\?[^\d\W]\w*\b)[ \t\n\r]*(=|<-)?$')
+TX_VALUE_LOCATOR = re.compile(r'[ \t\n\r]*(\?[^\d\W]\w*\b)[ \t\n\r]*\.'
+                              r'[ \t\n\r]*([^\d\W]\w*\b)[ \t\n\r]*$')
+TX_VARIABLE = re.compile(r'[ \t\n\r]*(\?[^\d\W]\w*\b)[ \t\n\r]*$')
+TX_PARAMETER_TYPE = re.compile(r'(INTEGER|FLOAT|STRING|BOOLEAN)')
+
+
+class JsonValue(object):
+    """ JsonValue class
+
+    This class represents single JSON value together with its
+    position in the rule source.
+
+    Details
+    -------
+    'value' holds list of (key, value) pairs for objects, list of
+    items for arrays, raw string content (without quotes, escapes
+    are not processed) for strings and python value for numbers
+    and literals.
+    """
+
+    def __init__(self, kind, position, end, value):
+        self.kind = kind
+        self.position = position
+        self.end = end
+        self.value = value
+
+
+
+class JsonScanner(object):
+    """ JsonScanner class
+
+    We use this class to decode JSON text of the rule,
+    while keeping positions of all decoded values.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.pos = 0
+
+
+
+    def scan(self):
+        """ Decodes whole source
+
+        Returns
+        -------
+        JsonValue
+            Decoded top-level value
+
+        Raises
+        ------
+        UnsupportedRule
+            If source is not valid JSON
+        """
+
+        value = self.scan_value()
+        self.skip_ws()
+        if self.pos != len(self.source):
+            raise UnsupportedRule()
+        return value
+
+
+
+    def skip_ws(self):
+        self.pos = JSON_WHITESPACE.match(self.source, self.pos).end()
+
+
+
+    def expect(self, char):
+        self.skip_ws()
+        if not self.source.startswith(char, self.pos):
+            raise UnsupportedRule()
+        self.pos += 1
+
+
+
+    def scan_value(self):
+        self.skip_ws()
+        if self.pos >= len(self.source):
+            raise UnsupportedRule()
+
+        char = self.source[self.pos]
+        if char == '{':
+            return self.scan_object()
+        elif char == '[':
+            return self.scan_array()
+        elif char == '"':
+            return self.scan_string()
+
+        for literal, value in [("true", True), ("false", False),
+                               ("null", None)]:
+            if self.source.startswith(literal, self.pos):
+                start = self.pos
+                self.pos += len(literal)
+                return JsonValue("literal", start, self.pos, value)
+
+        match = JSON_NUMBER.match(self.source, self.pos)
+        if match == None:
+            raise UnsupportedRule()
+        self.pos = match.end()
+        if match.group(1) or match.group(2):
+            value = float(match.group())
+        else:
+            value = int(match.group())
+        return JsonValue("number", match.start(), match.end(), value)
+
+
+
+    def scan_string(self):
+        match = JSON_STRING.match(self.source, self.pos)
+        if match == None:
+            raise UnsupportedRule()
+        self.pos = match.end()
+        return JsonValue("string", match.start(), match.end(),
+                         match.group()[1:-1])
+
+
+
+    def scan_object(self):
+        start = self.pos
+        self.pos += 1
+        members = []
+
+        self.skip_ws()
+        if self.source.startswith('}', self.pos):
+            self.pos += 1
+            return JsonValue("object", start, self.pos, members)
+
+        while True:
+            self.skip_ws()
+            if not self.source.startswith('"', self.pos):
+                raise UnsupportedRule()
+            key = self.scan_string()
+            self.expect(':')
+            members.append((key, self.scan_value()))
+
+            self.skip_ws()
+            if self.source.startswith(',', self.pos):
+                self.pos += 1
+                continue
+            self.expect('}')
+            return JsonValue("object", start, self.pos, members)
+
+
+
+    def scan_array(self):
+        start = self.pos
+        self.pos += 1
+        items = []
+
+        self.skip_ws()
+        if self.source.startswith(']', self.pos):
+            self.pos += 1
+            return JsonValue("array", start, self.pos, items)
+
+        while True:
+            items.append(self.scan_value())
+
+            self.skip_ws()
+            if self.source.startswith(',', self.pos):
+                self.pos += 1
+                continue
+            self.expect(']')
+            return JsonValue("array", start, self.pos, items)
+
+
+
+class RuleFrontEnd(object):
+    """ RuleFrontEnd class
+
+    We use this class to build Akashic rule model directly from the
+    JSON text of the rule, without running textX parser over it.
+
+    Details
+    -------
+    JSON structure of the rule is walked by hand and only expressions
+    embedded in "when" statements are parsed, by ExpressionParser.
+    Built model has the same classes, attributes and source positions
+    as the model built by textX, so the same Transpiler processors
+    are used on it and errors carry the same line and column.
+
+    If rule is not structurally valid, UnsupportedRule is raised
+    and rule should be parsed by the textX instead. If expression
+    of the rule is not valid, RuleSyntaxError is raised.
+    """
+
+    def __init__(self):
+        """ RuleFrontEnd constructor method
+        """
+
+        self.source = None
+        self.expression_parser = None
+
+
+
+    def load(self, akashic_rule, processors):
+        """ Builds rule model and calls processors on it
+
+        Parameters
+        ----------
+        akashic_rule : str
+            String containing Akashic rule
+        processors : dict
+            Pairs 'rule name: processor function'
+
+        Returns
+        -------
+        Rule
+            Processed rule model
+        None
+            If rule is not supported by this front end
+
+        Raises
+        ------
+        RuleSyntaxError
+            If expression of the rule is not valid
+        """
+
+        try:
+            rule = self.build(akashic_rule)
+        except (UnsupportedRule, RecursionError):
+            return None
+
+        process_model(rule, processors)
+        return rule
+
+
+
+    def build(self, akashic_rule):
+        """ Builds rule model from given string
+
+        Raises
+        ------
+        UnsupportedRule
+            If rule is not structurally valid
+        RuleSyntaxError
+            If expression of the rule is not valid
+        """
+
+        self.source = akashic_rule
+        self.expression_parser = ExpressionParser(akashic_rule)
+
+        rule_obj = JsonScanner(akashic_rule).scan()
+        members = self.members(rule_obj,
+                               ["rule-name", "salience", "run-once",
+                                "optimize-lhs", "parameters", "when",
+                                "then"],
+                               ["rule-name", "salience", "when", "then"])
+
+        salience = members["salience"]
+        if salience.kind == "string" and salience.value == "system":
+            salience_value = '"system"'
+        elif salience.kind == "number" and \
+        TX_INT.fullmatch(self.raw(salience)):
+            salience_value = salience.value
+        else:
+            raise UnsupportedRule()
+
+        run_once = False
+        if "run-once" in members:
+            run_once = self.bool_value(members["run-once"])
+
+        optimize_lhs = False
+        if "optimize-lhs" in members:
+            optimize_lhs = self.bool_value(members["optimize-lhs"])
+
+        parameters = []
+        if "parameters" in members:
+            parameters = self.parameters(members["parameters"])
+
+        rule = Rule(rule_obj.position, rule_obj.end,
+                    rule_name=self.id_value(members["rule-name"]),
+                    salience=salience_value,
+                    run_once=run_once,
+                    optimize_lhs=optimize_lhs,
+                    parameters=parameters,
+                    lhs=self.lhs(self.key(rule_obj, "when"),
+                                 members["when"]),
+                    rhs=self.rhs(self.key(rule_obj, "then"),
+                                 members["then"]))
+
+        # Root of the model resolves positions, as textX parser does
+        rule._tx_parser = SourceMap(akashic_rule)
+        return rule
+
+
+
+# ----------------------------------------------------------------
+#  HELPER FUNCTIONS SECTION
+# ----------------------------------------------------------------
+
+    def raw(self, json_value):
+        return self.source[json_value.position:json_value.end]
+
+
+
+    def members(self, json_object, allowed, required):
+        """ Returns members of JSON object as dictionary
+
+        Details
+        -------
+        Keys are matched exactly, as keywords of the rule grammar.
+        Unknown, duplicate or missing keys make the rule unsupported.
+        """
+
+        if json_object.kind != "object":
+            raise UnsupportedRule()
+
+        members = {}
+        for key, value in json_object.value:
+            if not key.value in allowed or key.value in members:
+                raise UnsupportedRule()
+            members[key.value] = value
+
+        for key in required:
+            if not key in members:
+                raise UnsupportedRule()
+        return members
+
+
+
+    def key(self, json_object, name):
+        for key, value in json_object.value:
+            if key.value == name:
+                return key
+        return None
+
+
+
+    def single_member(self, json_object):
+        if json_object.kind != "object" or len(json_object.value) != 1:
+            raise UnsupportedRule()
+        return json_object.value[0]
+
+
+
+    def id_value(self, json_value):
+        if json_value.kind != "string":
+            raise UnsupportedRule()
+        match = TX_ID.match(json_value.value)
+        if match == None:
+            raise UnsupportedRule()
+        return match.group(1)
+
+
+
+    def bool_value(self, json_value):
+        if json_value.kind != "literal" or json_value.value == None:
+            raise UnsupportedRule()
+        return json_value.value
+
+
+
+    def string_value(self, json_value):
+        """ Converts JSON string as textX STRING base type does
+        """
+
+        if json_value.kind != "string":
+            raise UnsupportedRule()
+        match = TX_STRING.match(self.source, json_value.position)
+        if match == None or match.end() != json_value.end:
+            raise UnsupportedRule()
+        return json_value.value.replace(r'\"', '"').replace(r"\'", "'")
+
+
+
+    def clips_code(self, json_value):
+        if json_value.kind != "string":
+            raise UnsupportedRule()
+        match = TX_CLIPS_CODE.match(self.source, json_value.position)
+        if match == None or match.end() != json_value.end:
+            raise UnsupportedRule()
+        return match.group()
+
+
+
+    def expression(self, entry_name, json_value):
+        if json_value.kind != "string":
+            raise UnsupportedRule()
+        return self.expression_parser.parse(entry_name,
+                                            json_value.position + 1,
+                                            json_value.end - 1)
+
+
+
+    def parameters(self, json_array):
+        if json_array.kind != "array":
+            raise UnsupportedRule()
+
+        parameters = []
+        for json_parameter in json_array.value:
+            members = self.members(json_parameter,
+                                   ["parameter-name", "type"],
+                                   ["parameter-name", "type"])
+            parameter_type = members["type"]
+            if parameter_type.kind != "string" or \
+            not TX_PARAMETER_TYPE.fullmatch(parameter_type.value):
+                raise UnsupportedRule()
+
+            parameters.append(RuleParameter(
+                json_parameter.position, json_parameter.end,
+                name=self.id_value(members["parameter-name"]),
+                type=parameter_type.value))
+        return parameters
+
+
+
+# ----------------------------------------------------------------
+#  LEFT HAND SIDE SECTION
+# ----------------------------------------------------------------
+
+    def lhs(self, json_key, json_array):
+        if json_array.kind != "array":
+            raise UnsupportedRule()
+
+        statements = []
+        for json_statement in json_array.value:
+            stat = self.lhs_statement(json_statement)
+            statements.append(LHSStatement(json_statement.position,
+                                           json_statement.end,
+                                           stat=stat))
+        return LHS(json_key.position, json_array.end,
+                   statements=statements)
+
+
+
+    def lhs_statement(self, json_statement):
+        key, value = self.single_member(json_statement)
+        position = json_statement.position
+        end = json_statement.end
+
+        if key.value == "assert":
+            return ASSERTION(position, end,
+                             expr=self.expression("Assertion", value))
+
+        if key.value == "clips":
+            return LHS_CLIPS_CODE(position, end,
+                                  clips_code=self.clips_code(value))
+
+        match = TX_VAR_KEY.match(key.value)
+        if match == None:
+            raise UnsupportedRule()
+
+        var_name = match.group(1)
+        if match.group(2) == None:
+            return SYMBOLIC_VAR(position, end, var_name=var_name,
+                                expr=self.expression("Root", value))
+        elif match.group(2) == "=":
+            return BINDING_VAR(position, end, var_name=var_name,
+                               expr=self.expression("Root", value))
+        else:
+            return FACT_ADDRESS_VAR(
+                position, end, var_name=var_name,
+                expr=self.expression("SpecialSingularLogicExpression",
+                                     value))
+
+
+
+# ----------------------------------------------------------------
+#  RIGHT HAND SIDE SECTION
+# ----------------------------------------------------------------
+
+    def rhs(self, json_key, json_array):
+        if json_array.kind != "array":
+            raise UnsupportedRule()
+
+        statements = []
+        for json_statement in json_array.value:
+            stat = self.rhs_statement(json_statement)
+            statements.append(RHSStatement(json_statement.position,
+                                           json_statement.end,
+                                           stat=stat))
+        return RHS(json_key.position, json_array.end,
+                   statements=statements)
+
+
+
+    def rhs_statement(self, json_statement):
+        key, value = self.single_member(json_statement)
+        position = json_statement.position
+        end = json_statement.end
+
+        operations = {
+            "create": CreateStatement,
+            "update": UpdateStatement,
+            "delete": DeleteStatement
+        }
+
+        if key.value in operations:
+            members = self.members(value,
+                                   ["model-id", "reflect-on-web", "data"],
+                                   ["model-id", "reflect-on-web", "data"])
+            return operations[key.value](
+                position, end,
+                model_id=self.id_value(members["model-id"]),
+                reflect=self.bool_value(members["reflect-on-web"]),
+                json_object=self.json_object(members["data"]))
+
+        if key.value == "return":
+            members = self.members(value, ["tag", "data"], ["tag", "data"])
+            return ReturnStatement(
+                position, end,
+                tag=self.string_value(members["tag"]),
+                json_object=self.json_object(members["data"]))
+
+        if key.value == "clips":
+            return RHS_CLIPS_CODE(position, end,
+                                  clips_code=self.clips_code(value))
+
+        raise UnsupportedRule()
+
+
+
+    def json_object(self, json_value):
+        if json_value.kind != "object":
+            raise UnsupportedRule()
+
+        field_list = []
+        for key, value in json_value.value:
+            field_list.append(FieldEntry(key.position, value.end,
+                                         name=self.string_value(key),
+                                         value=self.field_value(value)))
+        return JSONObject(json_value.position, json_value.end,
+                          field_list=field_list)
+
+
+
+    def field_value(self, json_value):
+        if json_value.kind == "number":
+            return json_value.value
+
+        if json_value.kind == "literal":
+            return self.bool_value(json_value)
+
+        if json_value.kind != "string":
+            raise UnsupportedRule()
+
+        match = TX_VALUE_LOCATOR.match(json_value.value)
+        if match != None:
+            return RHSValueLocator(json_value.position, json_value.end,
+                                   var_name=match.group(1),
+                                   field_name=match.group(2))
+
+        match = TX_VARIABLE.match(json_value.value)
+        if match != None:
+            return RHS_VARIABLE(json_value.position, json_value.end,
+                                var_name=match.group(1))
+
+        return self.string_value(json_value)
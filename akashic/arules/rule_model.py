@@ -0,0 +1,290 @@
+import bisect
+
+
+class UnsupportedRule(Exception):
+    """ UnsupportedRule class
+
+    Raised when rule model cannot be built without textX parser
+    (rule is not structurally valid JSON rule, or textX could parse
+    its expression differently). Rule should then be parsed by the
+    textX, so that user gets textX syntax diagnostics.
+    """
+
+
+
+class RuleSyntaxError(Exception):
+    """ RuleSyntaxError class
+
+    Raised when expression of the rule is not valid. textX cannot
+    report such expression (it ends up in infinite left recursion),
+    so the error is reported at the offset where parsing failed.
+    """
+
+    def __init__(self, message, position):
+        """ RuleSyntaxError constructor method
+
+        Parameters
+        ----------
+        message : str
+            Error message
+        position : int
+            Offset in the rule source
+        """
+
+        super(RuleSyntaxError, self).__init__(message)
+        self.message = message
+        self.position = position
+
+
+
+class SourceMap(object):
+    """ SourceMap class
+
+    We use this class to convert offset in the rule source to
+    line and column. It replaces textX parser (model._tx_parser)
+    for models built without textX, so it uses the same rules
+    for line and column counting.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.line_ends = None
+
+
+
+    def pos_to_linecol(self, pos):
+        if self.line_ends == None:
+            self.line_ends = []
+            line_end = self.source.find("\n")
+            while line_end != -1:
+                self.line_ends.append(line_end)
+                line_end = self.source.find("\n", line_end + 1)
+
+        line = bisect.bisect_left(self.line_ends, pos)
+        col = pos
+        if line > 0:
+            col -= self.line_ends[line - 1]
+            if self.source[self.line_ends[line - 1]] in '\n\r':
+                col -= 1
+        return line + 1, col + 1
+
+
+
+class ModelNode(object):
+    """ ModelNode class
+
+    Base class of rule model objects built without textX.
+
+    Details
+    -------
+    Subclasses are named after rules of RULE_META_MODEL and have
+    the same attributes as textX objects of these rules, so that
+    Transpiler processors can be used on them. 'attrs' lists
+    attributes in order of their definition in the grammar, which
+    is the order in which textX visits them.
+    """
+
+    attrs = ()
+
+    def __init__(self, position, position_end, **attrs):
+        self._tx_position = position
+        self._tx_position_end = position_end
+        for name, value in attrs.items():
+            setattr(self, name, value)
+
+
+
+def process_model(obj, processors):
+    """ Calls processors on model objects
+
+    Details
+    -------
+    Objects are visited in the same order as textX visits them:
+    depth-first, attributes in grammar order, processor of object
+    is called after processors of all contained objects. If
+    processor returns value, it replaces the object in its parent.
+    Visit uses explicit stack, so deeply nested expressions do not
+    hit Python recursion limit.
+
+    Parameters
+    ----------
+    obj : ModelNode
+        Object to process, parent links are set on the way down
+    processors : dict
+        Pairs 'rule name: processor function'
+
+    Returns
+    -------
+    object
+        Return value of the object processor
+    """
+
+    # Stack of visited objects: object, its slots for contained
+    # objects, index of the next slot and its own slot in parent
+    stack = [(obj, child_slots(obj), [0], None)]
+    result = None
+
+    while stack:
+        current, slots, next_slot, slot = stack[-1]
+        if next_slot[0] < len(slots):
+            child_slot = slots[next_slot[0]]
+            next_slot[0] += 1
+            container, key = child_slot
+            if isinstance(container, list):
+                child = container[key]
+            else:
+                child = getattr(container, key)
+            child.parent = current
+            stack.append((child, child_slots(child), [0], child_slot))
+            continue
+
+        stack.pop()
+        processor = processors.get(current.__class__.__name__)
+        result = None if processor == None else processor(current)
+        if result != None and slot != None:
+            container, key = slot
+            if isinstance(container, list):
+                container[key] = result
+            else:
+                setattr(container, key, result)
+
+    return result
+
+
+
+def child_slots(obj):
+    """ Lists places of objects contained in given object
+
+    Returns
+    -------
+    list
+        Pairs (list, index) and (object, attribute name), in order
+        of attributes in the grammar
+    """
+
+    slots = []
+    for name in obj.attrs:
+        value = getattr(obj, name)
+        if isinstance(value, list):
+            for i in range(0, len(value)):
+                if isinstance(value[i], ModelNode):
+                    slots.append((value, i))
+        elif isinstance(value, ModelNode):
+            slots.append((obj, name))
+    return slots
+
+
+
+#### Rule structure
+
+class Rule(ModelNode):
+    attrs = ("rule_name", "salience", "run_once", "optimize_lhs",
+             "parameters", "lhs", "rhs")
+
+class RuleParameter(ModelNode):
+    attrs = ("name", "type")
+
+class LHS(ModelNode):
+    attrs = ("statements",)
+
+class RHS(ModelNode):
+    attrs = ("statements",)
+
+class LHSStatement(ModelNode):
+    attrs = ("stat",)
+
+class SYMBOLIC_VAR(ModelNode):
+    attrs = ("var_name", "expr")
+
+class BINDING_VAR(ModelNode):
+    attrs = ("var_name", "expr")
+
+class FACT_ADDRESS_VAR(ModelNode):
+    attrs = ("var_name", "expr")
+
+class ASSERTION(ModelNode):
+    attrs = ("expr",)
+
+class LHS_CLIPS_CODE(ModelNode):
+    attrs = ("clips_code",)
+
+class RHSStatement(ModelNode):
+    attrs = ("stat",)
+
+class CreateStatement(ModelNode):
+    attrs = ("model_id", "reflect", "json_object")
+
+class ReturnStatement(ModelNode):
+    attrs = ("tag", "json_object")
+
+class UpdateStatement(ModelNode):
+    attrs = ("model_id", "reflect", "json_object")
+
+class DeleteStatement(ModelNode):
+    attrs = ("model_id", "reflect", "json_object")
+
+class RHS_CLIPS_CODE(ModelNode):
+    attrs = ("clips_code",)
+
+class JSONObject(ModelNode):
+    attrs = ("field_list",)
+
+class FieldEntry(ModelNode):
+    attrs = ("name", "value")
+
+class RHSValueLocator(ModelNode):
+    attrs = ("var_name", "field_name")
+
+class RHS_VARIABLE(ModelNode):
+    attrs = ("var_name",)
+
+
+#### Expressions
+
+class SpecialBinaryLogicExpression(ModelNode):
+    attrs = ("operands", "operator")
+
+class SpecialSingularLogicExpression(ModelNode):
+    attrs = ("operator", "template", "operand")
+
+class TestSingularLogicExpression(ModelNode):
+    attrs = ("operator", "operand")
+
+class OneArgFunction(ModelNode):
+    attrs = ("func_name", "template", "args")
+
+class BridgeFunction(ModelNode):
+    attrs = ("func_name", "args")
+
+class LogicExpression(ModelNode):
+    attrs = ("operands", "operator")
+
+class CompExpression(ModelNode):
+    attrs = ("operands", "operator")
+
+class PlusMinusExpr(ModelNode):
+    attrs = ("operands", "operator")
+
+class MulDivExpr(ModelNode):
+    attrs = ("operands", "operator")
+
+class SqrExpr(ModelNode):
+    attrs = ("operands", "operator")
+
+class Factor(ModelNode):
+    attrs = ("value",)
+
+class STRING_C(ModelNode):
+    attrs = ("val",)
+
+class VARIABLE(ModelNode):
+    attrs = ("var_name",)
+
+class DataLocator(ModelNode):
+    attrs = ("template_conn_expr", "field", "is_query")
+
+class TEMPLATE_CONNECTION_EXPRESSION(ModelNode):
+    attrs = ("templates",)
+
+class LHSValueLocator(ModelNode):
+    attrs = ("var_name", "field_name")
@@ -0,0 +1,177 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def rule_hash(akashic_rule):
+    """ Computes content hash of Akashic rule in string form
+
+    Parameters
+    ----------
+    akashic_rule : str
+        String containing Akashic rule
+
+    Returns
+    -------
+    str
+        Hex digest of sha256 hash
+    """
+
+    return hashlib.sha256(akashic_rule.encode('utf-8')).hexdigest()
+
+
+
+class CacheEntry(object):
+    """ CacheEntry class
+
+    This class represents single transpiled rule inside of
+    transpilation cache.
+    """
+
+    def __init__(self, rule_name, clips_code, dependencies,
+                 bridge_signature, schema_key=None, warnings=None,
+                 field_dependencies=None, parameters=None):
+        """ CacheEntry constructor method
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the transpiled rule
+        clips_code : str
+            Transpiled CLIPS rule
+        dependencies : dict
+            Pairs 'model_id: fingerprint' of all DSDs referenced
+            by the rule, at the time of transpilation
+        bridge_signature : str
+            Signature of bridge functions (rule grammar and code
+            generation version) at the time of transpilation
+        schema_key : tuple
+            Schema registry state key at the time of transpilation
+            (entry is surely valid while registry is unchanged)
+        warnings : list
+            Warnings reported while rule was transpiled
+        field_dependencies : list
+            Pairs [model_id, field_name] the rule depends on (field_name
+            None stands for the whole model), or None if unknown
+        parameters : list
+            Pairs [parameter name, type] of rule template, empty if
+            rule is not a template
+        """
+
+        self.rule_name = rule_name
+        self.clips_code = clips_code
+        self.dependencies = dependencies
+        self.bridge_signature = bridge_signature
+        self.schema_key = schema_key
+        self.warnings = warnings if warnings != None else []
+        self.field_dependencies = field_dependencies
+        self.parameters = parameters if parameters != None else []
+
+
+
+class TranspilationCache(object):
+    """ TranspilationCache class
+
+    Content addressed cache of transpiled rules. Entries are keyed by
+    the rule hash. Entry is valid only if fingerprints of all referenced
+    DSDs and bridge signature are the same as in given environment.
+    Least recently used entries are evicted when cache is full.
+    """
+
+    def __init__(self, max_size=10000):
+        """ TranspilationCache constructor method
+
+        Init ordered entry dictionary (used as LRU list)
+        and lock which guards it.
+        """
+
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+
+
+    def is_valid(self, entry, env_provider):
+        """ Checks if entry can be used in given environment
+
+        Parameters
+        ----------
+        entry : CacheEntry
+            Cached transpiled rule
+        env_provider : EnvProvider
+            Environment in which rule will be used
+
+        Returns
+        -------
+        bool
+            True if DSDs referenced by rule and bridges are unchanged
+        """
+
+        if entry.bridge_signature != env_provider.get_bridge_signature():
+            return False
+
+        schema_registry = env_provider.schema_registry
+        schema_key = schema_registry.state_key()
+        if entry.schema_key == schema_key:
+            return True
+
+        for model_id, fingerprint in entry.dependencies.items():
+            if schema_registry.fingerprint(model_id) != fingerprint:
+                return False
+
+        # Referenced DSDs are the same, so entry is valid
+        # for current registry state too
+        entry.schema_key = schema_key
+        return True
+
+
+
+    def lookup(self, rule_hash, env_provider):
+        """ Searches for valid transpiled rule with given hash
+
+        Returns
+        -------
+        CacheEntry
+            If valid entry is found
+        None
+            If entry is not found or it is outdated
+        """
+
+        with self.lock:
+            entry = self.entries.get(rule_hash)
+            if entry == None:
+                return None
+
+            if not self.is_valid(entry, env_provider):
+                self.entries.pop(rule_hash)
+                return None
+
+            self.entries.move_to_end(rule_hash)
+            return entry
+
+
+
+    def store(self, rule_hash, entry):
+        """ Stores transpiled rule, evicts least recently used
+            entry if cache is full
+        """
+
+        with self.lock:
+            self.entries[rule_hash] = entry
+            self.entries.move_to_end(rule_hash)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+
+    def clear(self):
+        """ Removes all entries from the cache
+        """
+
+        with self.lock:
+            self.entries = OrderedDict()
+
+
+
+# Process-wide transpilation cache
+TRANSPILATION_CACHE = TranspilationCache()
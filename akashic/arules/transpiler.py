@@ -1,16 +1,36 @@
+import os
+import re
 import uuid
+import threading
 from os.path import join, dirname
+from concurrent.futures import ProcessPoolExecutor
 
-from textx import metamodel_from_file, metamodel_from_str
+from textx import metamodel_from_file
 from textx.export import metamodel_export, model_export
-from textx.model import get_model
 from textx.exceptions import TextXSyntaxError, TextXSemanticError
 
 from akashic.arules.variable_table import VariableTable, VarType
 from akashic.arules.data_locator_table import DataLocatorTable
 from akashic.arules.clips_statement_builder import ClipsStatementBuilder
-
-from akashic.exceptions import AkashicError, ErrType
+from akashic.arules.lhs_optimizer import LHSOptimizer
+from akashic.arules.rhs_optimizer import RHSOptimizer
+from akashic.arules.transpilation_cache import TRANSPILATION_CACHE, \
+                                               CacheEntry, rule_hash
+from akashic.arules.batch_transpilation import EnvSnapshot, \
+                                               TranspilationResult, \
+                                               transpile_rule, \
+                                               MIN_PARALLEL_BATCH, \
+                                               CHUNKS_PER_WORKER
+from akashic.arules.rule_front_end import RuleFrontEnd
+from akashic.arules.rule_model import SourceMap, RuleSyntaxError
+from akashic.arules.count_index import FACTS_CHANGING_FUNC, \
+                                       FACTS_CHANGED_FUNC
+
+from akashic.meta_models.meta_model_cache import META_MODEL_CACHE
+from akashic.system.dsds.rule_parameters import rule_parameters_model_id, \
+                                                INSTANCE_ID_FIELD
+
+from akashic.exceptions import AkashicError, AkashicWarning, ErrType
 
 from akashic.util.type_converter import clips_to_py_type, py_to_clips_type, \
                                         translate_if_c_bool
@@ -21,43 +41,85 @@ from akashic.enums.construct_type import ConstructType
 from akashic.enums.data_type import DataType
 
 
+# Version of generated CLIPS code, part of the bridge signature, so
+# rules transpiled by older transpiler are never taken from cache
+# (or from stored rules). Bump it whenever generated code changes.
+CODEGEN_VERSION = 5
+
+# CLIPS function which applies updates and deletes of facts queued
+# by RHS statements, called at the end of RHS
+APPLY_CHANGES_FUNC = "__apply_changes"
+
+# Transpiler which is currently loading a rule in this thread.
+# Processors registered on shared (cached) meta-model dispatch to it.
+active_transpiler = threading.local()
+
+
+# CLIPS expression which is always false, used in place of conditions
+# which can never be satisfied (CLIPS requires function call there)
+CLIPS_FALSE = "(not TRUE)"
+
+# Call of CLIPS function which can change facts (or anything else)
+FACT_CHANGING_CALL = re.compile(r'\([ \t\n\r]*(assert|retract|modify|'
+                                r'duplicate|reset|clear|load-facts|'
+                                r'bload-facts|eval|build)[\s()]')
+
+
+def dispatch_processor(processor_name):
+    def processor(obj):
+        return active_transpiler.current.processors[processor_name](obj)
+    return processor
+
+
+
+# Transpiler of batch worker process, created once per worker
+worker_transpiler = None
+
+
+def init_batch_worker(env_snapshot, is_assistance_session):
+    global worker_transpiler
+    worker_transpiler = Transpiler(env_snapshot.activate(),
+                                   is_assistance_session,
+                                   debug=False, use_cache=False)
+
+
+def transpile_in_worker(akashic_rule):
+    return transpile_rule(worker_transpiler, akashic_rule)
+
+
+
 class Transpiler(object):
     """ Transpiler class
 
     We use this class to transpile Akashic rule into the CLIPS rule.
     """
 
-    def __init__(self, env_provider, is_assistance_session=False, debug=True):
+    def __init__(self, env_provider, is_assistance_session=False, debug=True,
+                 use_cache=True):
         """ Transpiler constructor method
         
         Details
         -------
         1. Imports created data_providers.
-        2. Creates new Variable table (used for managing symbolic
-           and real variables).
-        3. Creates new DataLocatorTable (used for namaging fact
-           data referencing inside of rule).
-        4. Setups model processor functions - transpiler loop.
-        5. Loads Akashic meta-model.
-        6. Loads CLIPS Pattern Builder module.
+        2. Setups model processor functions - transpiler loop.
+        3. Obtains Akashic meta-model from process-wide meta-model cache
+           (grammar is compiled only once per process).
+        4. Creates JSON front end, used instead of textX parser
+           for structurally valid rules.
+        5. Inits per-transpilation state.
         """
         
         self.debug = debug
+        self.use_cache = use_cache and not is_assistance_session
 
         self.env_provider = env_provider
         self.data_providers = env_provider.data_providers
+        self.schema_registry = env_provider.schema_registry
         self.functions = env_provider.functions
 
-        self.variable_table = VariableTable()
-        self.data_locator_table = DataLocatorTable()
-        self.lhs_clips_command_list = []
-        self.rhs_clips_command_list = []
-
-        # Keep track of used variables in this array
-        self.data_locator_vars = []
-
-        processors = {
+        self.processors = {
             'Rule': self.rule,
+            'RuleParameter':    self.rule_parameter,
 
             #### LHS processors
             'LHSStatement':     self.lhs_statement,
@@ -74,9 +136,8 @@ class Transpiler(object):
             'TestSingularLogicExpression': \
                 self.test_singular_logic_expression,
 
-            'ZeroArgFunction':      self.zero_arg_function,
             'OneArgFunction':       self.one_arg_function,
-            'OnePlusArgFunction':   self.one_plus_arg_function,
+            'BridgeFunction':       self.bridge_function,
 
             'LogicExpression':  self.logic_expression,
             'CompExpression':   self.comp_expression,
@@ -96,23 +157,79 @@ class Transpiler(object):
             'DeleteStatement':  self.delete_statement,
         }
 
-        # this_folder = dirname(__file__)
-        # self.meta_model = metamodel_from_file(
-        #                     join(this_folder, 'meta_model.tx'), debug=False)
-        self.meta_model = metamodel_from_str(self.env_provider.rule_mm, 
-                                             debug=False)
-        self.meta_model.register_obj_processors(processors)
+        # Meta-model is shared between all transpilers using the same
+        # grammar, so only dispatching processors are registered on it
+        self.meta_model = META_MODEL_CACHE.get(
+            self.env_provider.rule_mm,
+            {name: dispatch_processor(name) for name in self.processors}
+        )
+        self.front_end = RuleFrontEnd()
+
+        self.is_assistance_session = is_assistance_session
+        self.reset_state()
+
+
+
+    def reset_state(self):
+        """ Inits per-transpilation state
+
+        Details
+        -------
+        1. Creates new Variable table (used for managing symbolic
+           and real variables).
+        2. Creates new DataLocatorTable (used for namaging fact
+           data referencing inside of rule).
+        3. Creates new LHS and RHS command lists.
+        4. Loads CLIPS Pattern Builder module.
+        5. Drops source map of previous rule.
+        6. Drops warnings reported for previous rule.
+        """
+
+        self.variable_table = VariableTable()
+        self.data_locator_table = DataLocatorTable()
+        self.lhs_clips_command_list = []
+        self.rhs_clips_command_list = []
+
+        # Indexes of RHS commands generated from RHS statements,
+        # only they are optimized (CLIPS code of the user is not)
+        self.generated_rhs_commands = set()
+
+        # Keep track of used variables in this array
+        self.data_locator_vars = []
 
         # Get builder classes
         self.clips_statement_builder = ClipsStatementBuilder()
 
         self.rule = None
+        self.rule_name = None
         self.tranpiled_rule = None
 
-        self.is_assistance_session = is_assistance_session
+        # Processors carry source offsets, they are converted to
+        # line and column only when error is reported
+        self.source_map = None
+
+        # Compile-time warnings, e.g. about rule which can never fire
+        self.warnings = []
+
+        # Keep track of referenced DSD models, so that
+        # transpiled rule can be cached and invalidated
+        self.referenced_models = set()
+        self.cache_entry = None
+
+        # Pairs (model_id, field_name) the rule depends on, field_name
+        # None means that rule depends on the whole model
+        self.referenced_fields = set()
+        self.is_from_cache = False
+
         self.is_assistance_rule = False
         self.assistance_clips_command_list = []
 
+        # True if RHS updates or deletes facts
+        self.has_fact_changes = False
+
+        # Parameters of rule template: name, type and CLIPS variable
+        self.parameters = []
+
 
 
     def load(self, akashic_rule):
@@ -123,18 +240,54 @@ class Transpiler(object):
         akashic_rule : str
             String containing Akashic rule
 
+        Details
+        -------
+        If rule with the same content was already transpiled against
+        the same referenced DSDs and bridges, transpiled rule is taken
+        from the transpilation cache and parsing is skipped.
+
+        Rule model is built by the JSON front end. Only if rule is not
+        structurally valid JSON rule, it is parsed by the textX,
+        which reports syntax errors. Syntax errors of expressions
+        are reported by the front end.
+
         Raises
         ------
         AkashicError
-            If infinite left recursion is detected.
+            If rule is not valid, or infinite left recursion is
+            detected.
         """
 
+        self.reset_state()
+
+        current_rule_hash = rule_hash(akashic_rule)
+        if self.use_cache:
+            entry = TRANSPILATION_CACHE.lookup(current_rule_hash, 
+                                               self.env_provider)
+            if entry:
+                self.rule_name = entry.rule_name
+                self.tranpiled_rule = entry.clips_code
+                self.warnings = list(entry.warnings)
+                self.cache_entry = entry
+                self.is_from_cache = True
+                return 0
+
+        self.source_map = SourceMap(akashic_rule)
+
+        previous_transpiler = getattr(active_transpiler, "current", None)
+        active_transpiler.current = self
         try:
-            self.rule = self.meta_model.model_from_str(akashic_rule)
+            self.rule = self.front_end.load(akashic_rule, self.processors)
+            if self.rule == None:
+                self.rule = self.meta_model.model_from_str(akashic_rule)
         except RecursionError as re:
             message = "Infinite left recursion is detected. " \
                       "There was unknown syntactic error."
             raise AkashicError(message, 0, 0, ErrType.SYNTACTIC)
+        except RuleSyntaxError as syntaxError:
+            line, col = self.resolve_position(syntaxError.position)
+            raise AkashicError(syntaxError.message, line, col,
+                               ErrType.SYNTACTIC)
         except TextXSyntaxError as syntaxError:
             raise AkashicError(
                 syntaxError.message, 
@@ -149,28 +302,141 @@ class Transpiler(object):
                 semanticError.col, 
                 ErrType.SEMANTIC
             )
+        finally:
+            active_transpiler.current = previous_transpiler
+
+        self.rule_name = self.rule.rule_name
+        self.cache_entry = self.build_cache_entry()
+
+        # Assistance rules generate unique query rules,
+        # so they must be transpiled every time
+        if self.use_cache and not self.is_assistance_rule:
+            TRANSPILATION_CACHE.store(current_rule_hash, self.cache_entry)
         return 0
 
 
 
+    def build_cache_entry(self):
+        """ Builds transpilation cache entry from transpiled rule
+
+        Returns
+        -------
+        CacheEntry
+            Entry containing transpiled rule, fingerprints of referenced
+            DSDs and current bridge signature
+        """
+
+        dependencies = {}
+        for model_id in self.referenced_models:
+            data_provider = self.schema_registry.lookup(model_id)
+            if data_provider != None:
+                dependencies[model_id] = data_provider.fingerprint
+
+        return CacheEntry(
+            self.rule_name,
+            self.tranpiled_rule,
+            dependencies,
+            self.env_provider.get_bridge_signature(),
+            self.schema_registry.state_key(),
+            list(self.warnings),
+            sorted([list(pair) for pair in self.referenced_fields],
+                   key=lambda pair: (pair[0], pair[1] or "")),
+            [[name, parameter_type] \
+             for name, parameter_type, var_name in self.parameters]
+        )
+
+
+
+    def compile_many(self, akashic_rules, max_workers=None):
+        """ Transpiles batch of Akashic rules
+
+        Parameters
+        ----------
+        akashic_rules : list
+            List of strings containing Akashic rules
+        max_workers : int
+            Number of worker processes, defaults to number of CPUs
+
+        Details
+        -------
+        Rules found in transpilation cache are taken from it. Other
+        rules are parsed and transpiled in pool of worker processes,
+        each holding snapshot of this transpiler's environment.
+        Small batches (or max_workers=1) are transpiled serially
+        in this process.
+
+        Error of one rule does not abort the batch, it is returned
+        in result of that rule. Transpiled rules are stored in
+        transpilation cache, but they are not built in CLIPS
+        environment - that is left to the environment owner.
+
+        Returns
+        -------
+        list
+            TranspilationResult objects, in order of given rules
+        """
+
+        if max_workers == None:
+            max_workers = os.cpu_count() or 1
+
+        results = [None] * len(akashic_rules)
+        pending = []
+        for i, akashic_rule in enumerate(akashic_rules):
+            if self.use_cache:
+                entry = TRANSPILATION_CACHE.lookup(rule_hash(akashic_rule),
+                                                   self.env_provider)
+                if entry:
+                    results[i] = TranspilationResult(
+                        entry.rule_name, entry.clips_code, entry,
+                        True, True)
+                    continue
+            pending.append(i)
+
+        if max_workers <= 1 or len(pending) < MIN_PARALLEL_BATCH:
+            for i in pending:
+                results[i] = transpile_rule(self, akashic_rules[i])
+            return results
+
+        env_snapshot = EnvSnapshot(self.env_provider)
+        chunksize = max(1, len(pending) // (max_workers * CHUNKS_PER_WORKER))
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_batch_worker,
+            initargs=(env_snapshot, self.is_assistance_session)
+        ) as executor:
+            pending_rules = [akashic_rules[i] for i in pending]
+            for i, result in zip(pending, executor.map(
+                transpile_in_worker, pending_rules, chunksize=chunksize)):
+                results[i] = result
+
+                if self.use_cache and result.error == None \
+                and result.is_cacheable:
+                    TRANSPILATION_CACHE.store(rule_hash(akashic_rules[i]),
+                                              result.cache_entry)
+        return results
+
+
+
 # ----------------------------------------------------------------
 #  HELPER FUNCTIONS SECTION
 # ----------------------------------------------------------------
 
+    def add_field_dependency(self, model_id, field_name=None):
+        self.referenced_fields.add((model_id, field_name))
+        return 0
+
+
+
+    def add_generated_rhs_command(self, clips_command):
+        self.generated_rhs_commands.add(len(self.rhs_clips_command_list))
+        self.rhs_clips_command_list.append(clips_command)
+        return 0
+
+
+
     def clear_after_binding_var(self):
-        fields_to_remove = []
         for var_name in self.data_locator_vars:
-            for template_name, template in self.data_locator_table \
-                                           .table.items():
-                for field_name, field in template.fields.items():
-                    if field.var_name == var_name:
-                        fields_to_remove.append((template_name, field_name))
-                    
-        for f in fields_to_remove:
-            self.data_locator_table.table[f[0]].fields.pop(f[1])
-
-            if len(self.data_locator_table.table[f[0]].fields.items()) < 1:
-                self.data_locator_table.table.pop(f[0])
+            self.data_locator_table.remove_var(var_name)
         return 0
 
 
@@ -182,53 +448,147 @@ class Transpiler(object):
         -------
         1. We go through variables used to reference CLIPS facts 
             (data locators (DL) - in Akashic terminology)
-        2. We through data locator table to get every entry using
-            current DL variable
+        2. We get every data locator table entry using current
+            DL variable from the table's reverse index
         3. We generate new variable in varialbe table
             (with new name - 'name rotation')
         4. We reassign this new variable to mentioned entry
         
-        5. We go through all defined variables* and replace old
-            helper varialbe names with new ones.
-        6. We go through list of variables refenrenced in statement
-            of * and replace their names also.
+        5. We rename old variable in variable table: in statements
+            and lists of referenced variables of only those
+            variables which use it (found by reverse indexes).
         """
 
-        new_data_locator_vars = self.data_locator_vars.copy()
+        renamed_vars = {}
 
         for var_name in self.data_locator_vars:
-            for template_name, template in self.data_locator_table \
-                                           .table.items():
-                for field_name, field in template.fields.items():
-                    if field.var_name != var_name:
-                        continue
-
-                    gen_var_name = self.variable_table.next_var_name()
-
-                    for vn, var_value in self.variable_table.table.items():
-                        if var_value.value["construct_type"] != \
-                        ConstructType.WORKABLE:
-                            field.var_name = gen_var_name
-                            var_value.value["content"] = \
-                                var_value.value["content"] \
-                                .replace(var_name, gen_var_name)
-
-                        var_value.used_variables = \
-                            [gen_var_name if uv == var_name \
-                            else uv for uv in var_value.used_variables]
-                        new_data_locator_vars = \
-                            [gen_var_name if dlv == var_name \
-                            else dlv for dlv in new_data_locator_vars]
+            for template_name, field_name in self.data_locator_table \
+                                             .var_fields(var_name):
+                gen_var_name = self.variable_table.next_var_name()
+
+                self.data_locator_table.rename_var(template_name,
+                                                   field_name,
+                                                   gen_var_name)
+                self.variable_table.rename_var(var_name, gen_var_name)
+
+                if not var_name in renamed_vars:
+                    renamed_vars[var_name] = gen_var_name
         
-        self.data_locator_vars = new_data_locator_vars
+        self.data_locator_vars = [renamed_vars.get(dlv, dlv) \
+                                  for dlv in self.data_locator_vars]
         return 0
 
 
 
-    def check_func_num_of_args(self,func, n):
-        line, col = get_model(func)._tx_parser \
-                    .pos_to_linecol(func._tx_position)
+    def resolve_position(self, position):
+        """ Converts offset in the rule source to line and column
+
+        Details
+        -------
+        Processors pass source offsets (textX '_tx_position') between
+        each other. This conversion is done only when error is
+        reported, so that rules without errors do not pay for it.
+
+        Parameters
+        ----------
+        position : int
+            Offset in the rule source
+
+        Returns
+        -------
+        tuple
+            Line and column, as textX reports them
+        """
+
+        return self.source_map.pos_to_linecol(position)
+
+
+
+    def warn(self, message, err_pos):
+        """ Reports compile-time warning
+
+        Parameters
+        ----------
+        message : str
+            Warning message
+        err_pos : int
+            Offset in the rule source which warning refers to
+        """
+
+        line, col = self.resolve_position(err_pos)
+        warning = AkashicWarning(message, line, col)
+        self.warnings.append(warning)
+
+        if self.debug:
+            print(str(warning))
+
+
+
+    def is_constant_condition(self, result):
+        return result["construct_type"] == ConstructType.WORKABLE and \
+               result["content_type"] in ["INTEGER", "FLOAT", "BOOLEAN"]
+
+
+
+    def short_circuit_logic(self, operator, left, right, position):
+        """ Partially evaluates logic operation with one constant operand
+
+        Details
+        -------
+        If constant operand decides the result ('and' with false or 
+        'or' with true constant), result is that constant. Otherwise 
+        result is the other operand, if it is boolean expression.
+
+        Parameters
+        ----------
+        operator : str
+            'and' or 'or'
+        left : dict
+            Left operand
+        right : dict
+            Right operand
+        position : int
+            Offset of logic expression in the rule source
+
+        Returns
+        -------
+        dict
+            Evaluated operation
+        None
+            If none or both operands are constant, or if operation
+            cannot be evaluated at compile time
+        """
+
+        if left["construct_type"] == ConstructType.WORKABLE \
+        and right["construct_type"] != ConstructType.WORKABLE:
+            constant, other = left, right
+        elif right["construct_type"] == ConstructType.WORKABLE \
+        and left["construct_type"] != ConstructType.WORKABLE:
+            constant, other = right, left
+        else:
+            return None
+
+        truth_value = bool(constant["content"])
+        if (operator == 'and' and not truth_value) \
+        or (operator == 'or' and truth_value):
+            return {
+                "content": truth_value, 
+                "content_type": "BOOLEAN",
+                "construct_type": ConstructType.WORKABLE,
+                "_tx_position": position
+            }
+
+        if other["construct_type"] == ConstructType.NORMAL_EXP \
+        and other["content_type"] == "BOOLEAN":
+            result = other.copy()
+            result["_tx_position"] = position
+            return result
+
+        return None
+
 
+
+    def check_func_num_of_args(self,func, n):
         length = 0
         if isinstance(func.args, list): 
             length = len(func.args)
@@ -236,11 +596,13 @@ class Transpiler(object):
             length = 1
 
         if int(n) >= 0 and length != int(n):
+            line, col = self.resolve_position(func._tx_position)
             message = "Function '{0}' must have {1} arguments." \
                         .format(func.func_name, int(n))
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         if int(n) <= -1 and length < (-1) * int(n):
+            line, col = self.resolve_position(func._tx_position)
             message = "Function '{0}' must have at least {1} arguments." \
                         .format(func.func_name, (-1) * int(n))
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -266,21 +628,18 @@ class Transpiler(object):
         
             elif isinstance(rule.salience, int) :
                 if rule.salience < -10000:
-                    line, col = get_model(rule)._tx_parser \
-                                .pos_to_linecol(rule._tx_position)
+                    line, col = self.resolve_position(rule._tx_position)
                     message = "Rule salience cannot be lower than -10 000."
                     raise AkashicError(message, line, col, ErrType.SEMANTIC)
                 elif rule.salience > 9000:
-                    line, col = get_model(rule)._tx_parser \
-                                .pos_to_linecol(rule._tx_position)
+                    line, col = self.resolve_position(rule._tx_position)
                     message = "Rule salience cannot higher than 9 000."
                     raise AkashicError(message, line, col, ErrType.SEMANTIC)
                 else:
                     clips_salience = "\n\t(declare (salience " + \
                                     str(rule.salience) + "))\n"
             else:
-                line, col = get_model(rule)._tx_parser \
-                            .pos_to_linecol(rule._tx_position)
+                line, col = self.resolve_position(rule._tx_position)
                 message = "Salience must be integer between " \
                           "-10 000 and 9 000 or \"system\""
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -291,18 +650,38 @@ class Transpiler(object):
         if (hasattr(rule, 'run_once') and \
         rule.run_once == True) and \
         not self.is_assistance_rule:
+            # Instances share the rule, so removing it after the first
+            # firing would remove all of the instances
+            if len(self.parameters) > 0:
+                line, col = self.resolve_position(rule._tx_position)
+                message = "Rule template cannot be run once, its " \
+                          "instances share the rule."
+                raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
             run_once_rhs_expression = \
                 "(assert (__RuleToRemove (rule_name \"{0}\")) )" \
                 .format(rule.rule_name)
             self.rhs_clips_command_list.append(run_once_rhs_expression)
 
 
+        # Rule template is matched against facts of its instances,
+        # they bind parameters of the rule
+        if len(self.parameters) > 0 and not self.is_assistance_rule:
+            parameter_slots = ["(" + name + " " + var_name + ")" \
+                               for name, parameter_type, var_name \
+                               in self.parameters]
+            self.lhs_clips_command_list.insert(
+                0, "(" + rule_parameters_model_id(rule.rule_name) + " " + \
+                   " ".join(parameter_slots) + ")")
+
         # Check if rule scheduled for deletion
         # Prevent it from getting into agenda
+        # (rule name is literal constant, so CLIPS pattern network
+        # matches control fact only against guards of that rule)
         run_once_lhs_expression = \
             "(not " \
                 "(__RuleToRemove " \
-                    "(rule_name ?rn&: (= (str-compare ?rn \"{0}\") 0))" \
+                    "(rule_name \"{0}\")" \
                 ")" \
             ")".format(rule.rule_name)
         self.lhs_clips_command_list.insert(0, run_once_lhs_expression)
@@ -312,18 +691,28 @@ class Transpiler(object):
         block_check_lhs_expression = \
             "(not " \
                 "(__RuleToBlock " \
-                   "(rule_name ?rn&: (= (str-compare ?rn \"{0}\") 0))" \
+                   "(rule_name \"{0}\")" \
                 ")" \
             ")".format(rule.rule_name)
         self.lhs_clips_command_list.insert(0, block_check_lhs_expression)
 
-        # Prevent all non assistance related rules from running,
-        # during assistance process
-        if not self.is_assistance_session:
-            assistance_check_lhs_expression = \
-                "(not (__AssistanceOn) )"
-            self.lhs_clips_command_list.insert(
-                    0, assistance_check_lhs_expression)
+        # Reorder LHS conditional elements, so that CLIPS
+        # keeps less partial matches
+        if hasattr(rule, 'optimize_lhs') and rule.optimize_lhs == True:
+            lhs_optimizer = LHSOptimizer(self.env_provider.get_fact_counts())
+            self.lhs_clips_command_list = lhs_optimizer.optimize(
+                self.lhs_clips_command_list)
+
+        # Evaluate repeated RHS subexpressions only once
+        if not self.is_assistance_rule:
+            rhs_optimizer = RHSOptimizer(self.variable_table)
+            self.rhs_clips_command_list = rhs_optimizer.optimize(
+                self.rhs_clips_command_list, self.generated_rhs_commands)
+
+        # Updates and deletes are applied after all RHS statements
+        # are evaluated, so they all see facts as they were matched
+        if self.has_fact_changes:
+            self.rhs_clips_command_list.append("(" + APPLY_CHANGES_FUNC + ")")
         
         # FINALLY BUILD THE RULE
         lhs_commands = ["\t" + comm for comm in self.lhs_clips_command_list]
@@ -343,6 +732,50 @@ class Transpiler(object):
 
 
 
+    def rule_parameter(self, parameter):
+        """ Defines parameter of rule template as binding variable
+
+        Details
+        -------
+        Parameter 'name' is referenced as variable '?name'. Its value
+        is bound by the pattern of the instance fact, which is the
+        first pattern of the rule.
+        """
+
+        var_name = "?" + parameter.name
+        if parameter.name == INSTANCE_ID_FIELD:
+            line, col = self.resolve_position(parameter._tx_position)
+            message = "Parameter name '{0}' is reserved for id of " \
+                      "rule template instance.".format(parameter.name)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
+        if self.variable_table.lookup(var_name):
+            line, col = self.resolve_position(parameter._tx_position)
+            message = "Parameter '{0}' is already defined." \
+                      .format(parameter.name)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
+        gen_var_name = self.variable_table.add_helper_var({
+            "content": parameter.name,
+            "content_type": parameter.type,
+            "construct_type": ConstructType.NOTHING
+        })
+        self.variable_table.add_named_var(
+            var_name,
+            {
+                "content": gen_var_name,
+                "content_type": parameter.type,
+                "construct_type": ConstructType.VARIABLE,
+                "_tx_position": parameter._tx_position
+            },
+            [],
+            VarType.BINDING
+        )
+        self.parameters.append((parameter.name, parameter.type, gen_var_name))
+        return 0
+
+
+
     def lhs_statement(self, lhss):
         """ Informs about creation of new statement
 
@@ -377,16 +810,25 @@ class Transpiler(object):
 
 
     def rhs_clips_code(self, cc):
-        clips_command = remove_quotes(cc.clips_code)
-        self.rhs_clips_command_list.append(to_clips_quotes(clips_command))
+        clips_command = to_clips_quotes(remove_quotes(cc.clips_code))
+
+        # Counters of count() aggregates are not updated by facts
+        # changed in CLIPS code, they are collected again after it
+        if FACT_CHANGING_CALL.search(clips_command):
+            self.rhs_clips_command_list.append(
+                "(" + FACTS_CHANGING_FUNC + ")")
+            self.rhs_clips_command_list.append(clips_command)
+            self.rhs_clips_command_list.append(
+                "(" + FACTS_CHANGED_FUNC + ")")
+        else:
+            self.rhs_clips_command_list.append(clips_command)
         return 0
     
 
 
     def symbolic_var(self, sv):
         if self.variable_table.lookup(sv.var_name):
-            line, col = get_model(sv)._tx_parser \
-                        .pos_to_linecol(sv._tx_position)
+            line, col = self.resolve_position(sv._tx_position)
             message = "Variable '{0}' is already defined." \
                       .format(sv.var_name)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -404,8 +846,7 @@ class Transpiler(object):
 
     def fact_address_var(self, fav):
         if self.variable_table.lookup(fav.var_name):
-            line, col = get_model(fav)._tx_parser \
-                        .pos_to_linecol(fav._tx_position)
+            line, col = self.resolve_position(fav._tx_position)
             message = "Variable '{0}' is already defined." \
                       .format(fav.var_name)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -416,6 +857,11 @@ class Transpiler(object):
             [],
             VarType.FACT_ADDRESS
         )
+        if fav.expr["truth_value"] == False:
+            self.warn("Fact address variable '{0}' can never be bound, " \
+                      "so the rule can never fire.".format(fav.var_name),
+                      fav._tx_position)
+
         clips_command = fav.var_name + \
                         " <- " + \
                         fav.expr["content"]
@@ -426,8 +872,7 @@ class Transpiler(object):
 
     def binding_var(self, bv):
         if self.variable_table.lookup(bv.var_name):
-            line, col = get_model(bv)._tx_parser \
-                        .pos_to_linecol(bv._tx_position)
+            line, col = self.resolve_position(bv._tx_position)
             message = "Variable '{0}' is already defined." \
                       .format(bv.var_name)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -455,29 +900,59 @@ class Transpiler(object):
 
 
     def special_binary_logic_expression(self, binary):
-        if len(binary.operands) < 2:
-            self.lhs_clips_command_list.append(binary.operands[0]["content"])
-            return 0
+        """ Builds CLIPS conditional element from special expressions
+
+        Details
+        -------
+        Special expressions, which are always satisfied or never
+        satisfied, are partially evaluated: 'and' with always
+        satisfied and 'or' with never satisfied operand are reduced 
+        to the other operand. Condition which is always satisfied 
+        is eliminated. Condition which is never satisfied is replaced
+        by test which always fails and warning is reported, because
+        rule can never fire.
+        """
 
-        args = []
         for i in range(0, len(binary.operands)):
-            if binary.operands[i]["construct_type"] == \
+            if binary.operands[i]["construct_type"] != \
             ConstructType.SPECIAL_CON_EXP:
-                args.append(binary.operands[i]["content"])
-            else:
-                line, col = binary.operands[i]["_tx_position"]
+                line, col = self.resolve_position(
+                                binary.operands[i]["_tx_position"])
                 message = "Special Binary Operation argument must be a " \
                           "Special Conditional Expression, but '{0}' found." \
                           .format(binary.operands[i]["construct_type"])
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
-                
-        clips_command = args[0]
+
+        clips_command = binary.operands[0]["content"]
+        truth_value = binary.operands[0]["truth_value"]
         for i in range(1, len(binary.operands)):
-            clips_command = "(" + \
-                            binary.operator[i-1] + " " + \
-                            clips_command + " " + \
-                            args[i] + \
-                            ")"
+            current = binary.operands[i]
+
+            # Value which decides the result of the operation
+            deciding_value = binary.operator[i-1] == 'or'
+
+            if truth_value == deciding_value \
+            or current["truth_value"] == deciding_value:
+                truth_value = deciding_value
+            elif truth_value == (not deciding_value):
+                clips_command = current["content"]
+                truth_value = current["truth_value"]
+            elif current["truth_value"] == (not deciding_value):
+                pass
+            else:
+                clips_command = "(" + \
+                                binary.operator[i-1] + " " + \
+                                clips_command + " " + \
+                                current["content"] + \
+                                ")"
+
+        if truth_value == True:
+            return 0
+
+        if truth_value == False:
+            self.warn("Condition can never be satisfied, " \
+                      "so the rule can never fire.", binary._tx_position)
+            clips_command = "(test " + CLIPS_FALSE + ")"
 
         self.lhs_clips_command_list.append(clips_command)
         return 0
@@ -485,11 +960,9 @@ class Transpiler(object):
 
 
     def special_singular_logic_expression(self, singular):
-        bline, bcol = get_model(singular)._tx_parser \
-                      .pos_to_linecol(singular._tx_position)
 
         if hasattr(singular, "template") and singular.template != '':
-            self.get_data_provider(singular.template, bline, bcol)
+            self.get_data_provider(singular.template, singular._tx_position)
             clips_command = '(' + singular.template + ')'
             if not singular.operator:
                 clips_content = clips_command
@@ -503,8 +976,9 @@ class Transpiler(object):
                 "content": clips_content, 
                 "content_type": None,
                 "construct_type": ConstructType.SPECIAL_CON_EXP,
-                "_tx_position": (bline, bcol),
-                "model_id": singular.template
+                "_tx_position": singular._tx_position,
+                "model_id": singular.template,
+                "truth_value": None
             }
 
         print("\n\nData locator table:")
@@ -516,19 +990,35 @@ class Transpiler(object):
         print("\n")
 
         print("\n\nSINGULAR OPERAND: ")
-        print(singular.operand["content"] + "\n\n")
-
-        if singular.operand["construct_type"] != ConstructType.NORMAL_EXP:
-            line, col = singular.operand["_tx_position"]
+        print(str(singular.operand["content"]) + "\n\n")
+
+        # Constant constraint is either satisfied by every fact
+        # (then it is eliminated), or by none of facts
+        constraint = singular.operand["content"]
+        constraint_value = None
+        if self.is_constant_condition(singular.operand) \
+        and len(self.data_locator_vars) > 0:
+            constraint_value = bool(singular.operand["content"])
+            constraint = None if constraint_value else CLIPS_FALSE
+
+        elif singular.operand["construct_type"] != ConstructType.NORMAL_EXP:
+            line, col = self.resolve_position(singular.operand["_tx_position"])
             message = "Special Singular Operation argument must be a " \
                       "Normal Expression, but '{0}' found." \
                       .format(singular.operand["construct_type"])
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
+        truth_value = None
+        if constraint_value == False:
+            if not singular.operator or singular.operator == "exists":
+                truth_value = False
+            elif singular.operator == "not":
+                truth_value = True
+
         clips_command = self.clips_statement_builder.build_special_pattern(
             self.data_locator_table, 
             self.data_locator_vars, 
-            singular.operand["content"],
+            constraint,
             singular
         )
 
@@ -556,28 +1046,43 @@ class Transpiler(object):
             "content": clips_content, 
             "content_type": None,
             "construct_type": ConstructType.SPECIAL_CON_EXP,
-            "_tx_position": (bline, bcol),
-            "model_id": template.name
+            "_tx_position": singular._tx_position,
+            "model_id": template.name,
+            "truth_value": truth_value
         }
 
 
 
     def test_singular_logic_expression(self, test):
-        if test.operand["construct_type"] != ConstructType.NORMAL_EXP:
-            line, col = test.operand["_tx_position"]
+        if self.is_constant_condition(test.operand):
+            if test.operand["content"]:
+                # Test which is always satisfied is eliminated
+                clips_commands = self.clips_statement_builder \
+                                .build_regular_dl_patterns(
+                                    self.data_locator_table)
+                self.lhs_clips_command_list.extend(clips_commands)
+            else:
+                self.warn("Test can never be satisfied, " \
+                          "so the rule can never fire.", test._tx_position)
+                self.lhs_clips_command_list.append(
+                    "(test " + CLIPS_FALSE + ")")
+
+        elif test.operand["construct_type"] != ConstructType.NORMAL_EXP:
+            line, col = self.resolve_position(test.operand["_tx_position"])
             message = "Test Operation argument must be a " \
                       "Normal Expression, but '{0}' found." \
                       .format(test.operand["construct_type"])
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
-        # Build clips commands
-        clips_commands = self.clips_statement_builder \
-                         .build_regular_dl_patterns(self.data_locator_table)
+        else:
+            # Build clips commands
+            clips_commands = self.clips_statement_builder \
+                            .build_regular_dl_patterns(self.data_locator_table)
 
-        self.lhs_clips_command_list.extend(clips_commands)
-        self.lhs_clips_command_list.append("(test " + \
-                                           test.operand["content"] + \
-                                           ")")
+            self.lhs_clips_command_list.extend(clips_commands)
+            self.lhs_clips_command_list.append("(test " + \
+                                               test.operand["content"] + \
+                                               ")")
         # Rotate defined variables for next special expression
         self.rotate_used_data_locator_vars()
         self.clear_after_binding_var()
@@ -587,32 +1092,18 @@ class Transpiler(object):
 
 
 
-    def zero_arg_function(self, func):
-        if not func.func_name in self.functions:
-            line, col = get_model(obj)._tx_parser \
-                        .pos_to_linecol(obj._tx_position)
-            message = "Function '{0}' is not defined in any bridge." \
-                        .format(func.func_name)
-            raise AkashicError(message, line, col, ErrType.SEMANTIC)
-            
-        return self.generic_function(func)
-
-
-
     def one_arg_function(self, func):
         if hasattr(func, "template") and func.template != '':
-            bline, bcol = get_model(func)._tx_parser \
-                         .pos_to_linecol(func._tx_position)
-            self.get_data_provider(func.template, bline, bcol)
-            clips_content = "(length$ (find-all-facts ((?fct {0})) TRUE)))" \
-                            .format(func.template)
+            self.get_data_provider(func.template, func._tx_position)
+            clips_content = self.clips_statement_builder.build_count_value(
+                func.template, "?fct", "TRUE")
             
             resolved_c_type = "INTEGER"
             return {
                 "content": clips_content,
                 "content_type": resolved_c_type,
                 "construct_type": ConstructType.COUNT_FUNC_CALL,
-                "_tx_position": (bline, bcol)
+                "_tx_position": func._tx_position
             }
 
         if func.func_name == "not":
@@ -624,51 +1115,49 @@ class Transpiler(object):
         elif func.func_name == 'str':
             self.check_func_num_of_args(func, 1)
             return self.str_function(func)
-        else:
-            if not func.func_name in self.functions:
-                line, col = get_model(func)._tx_parser \
-                            .pos_to_linecol(func._tx_position)
-                message = "Function '{0}' is not defined in any bridge." \
-                          .format(func.func_name)
-                raise AkashicError(message, line, col, ErrType.SEMANTIC)
-            
-            self.check_func_num_of_args(func, 1)
-            return self.generic_function(func)
 
 
 
-    def one_plus_arg_function(self, func):
+    def bridge_function(self, func):
+        """ Resolves call of bridge function
+
+        Details
+        -------
+        Grammar accepts any function name, so name, number of arguments
+        and return type are resolved against functions of bridges
+        imported into the environment, when rule is transpiled.
+        """
+
         if not func.func_name in self.functions:
-            line, col = get_model(func)._tx_parser \
-                        .pos_to_linecol(func._tx_position)
+            line, col = self.resolve_position(func._tx_position)
             message = "Function '{0}' is not defined in any bridge." \
                         .format(func.func_name)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
-        
-        self.check_func_num_of_args(func, len(func.args))
+
+        self.check_func_num_of_args(func,
+                                    self.functions[func.func_name] \
+                                    ["num_of_args"])
         return self.generic_function(func)
 
 
 
     def negation_function(self, neg_f):
         result = neg_f.args
-        bline, bcol = get_model(neg_f)._tx_parser \
-                      .pos_to_linecol(neg_f._tx_position)
 
         if result["content_type"] not in ["INTEGER", "FLOAT", "BOOLEAN"]:
-            line, col = result["_tx_position"]
+            line, col = self.resolve_position(result["_tx_position"])
             message = "Negation argument type INTEGER, FLOAT or BOOLEAN " \
                       "is expected, but '{0}' found." \
                       .format(result["content_type"])
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
-        if result["content_type"] == ConstructType.WORKABLE:
+        if result["construct_type"] == ConstructType.WORKABLE:
             clips_content = not result["content"]
             return {
                 "content": clips_content, 
                 "content_type": py_to_clips_type(clips_content.__class__),
                 "construct_type": ConstructType.WORKABLE,
-                "_tx_position": (bline, bcol)
+                "_tx_position": neg_f._tx_position
             }
         else:
             clips_content = '(not ' + \
@@ -680,18 +1169,16 @@ class Transpiler(object):
                 "content": clips_content, 
                 "content_type": resolved_c_type,
                 "construct_type": ConstructType.NORMAL_EXP,
-                "_tx_position": (bline, bcol)
+                "_tx_position": neg_f._tx_position
             }
 
 
 
     def count_function(self, count_f):
         result = count_f.args
-        bline, bcol = get_model(count_f)._tx_parser \
-                      .pos_to_linecol(count_f._tx_position)
 
         if result["construct_type"] != ConstructType.NORMAL_EXP:
-            line, col = result["_tx_position"]
+            line, col = self.resolve_position(result["_tx_position"])
             message = "Count operation argument must be expression. " \
                       "{0} given.".format(result["construct_type"])
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -708,24 +1195,22 @@ class Transpiler(object):
             "content": clips_content,
             "content_type": resolved_c_type,
             "construct_type": ConstructType.COUNT_FUNC_CALL,
-            "_tx_position": (bline, bcol)
+            "_tx_position": count_f._tx_position
         }
 
 
 
     def str_function(self, str_f):
         result = str_f.args
-        bline, bcol = get_model(str_f)._tx_parser \
-                      .pos_to_linecol(str_f._tx_position)
 
         resolved_c_type = "STRING"
-        if result["content_type"] == ConstructType.WORKABLE:
-            clips_content = str(result["content"])
+        if result["construct_type"] == ConstructType.WORKABLE:
+            clips_content = str(translate_if_c_bool(result["content"]))
             return {
                 "content": clips_content,
                 "content_type": resolved_c_type,
                 "construct_type": ConstructType.WORKABLE,
-                "_tx_position": (bline, bcol)
+                "_tx_position": str_f._tx_position
             }
         else:
             clips_content = '(str-cat ' + \
@@ -734,14 +1219,12 @@ class Transpiler(object):
                 "content": clips_content, 
                 "content_type": resolved_c_type,
                 "construct_type": ConstructType.FUNCTION_CALL,
-                "_tx_position": (bline, bcol)
+                "_tx_position": str_f._tx_position
             }
 
 
 
     def generic_function(self, generic):
-        bline, bcol = get_model(generic)._tx_parser \
-                      .pos_to_linecol(generic._tx_position)
 
         clips_args = []
         if hasattr(generic, "args"):
@@ -772,15 +1255,13 @@ class Transpiler(object):
             "content": clips_content,
             "content_type": resolved_c_type,
             "construct_type": construct_type,
-            "_tx_position": (bline, bcol)
+            "_tx_position": generic._tx_position
         }
 
 
 
     def logic_expression(self, logic):
         result = logic.operands[0]
-        bline, bcol = get_model(logic)._tx_parser \
-                      .pos_to_linecol(logic._tx_position)
 
         l = len(logic.operands)
         i = 1
@@ -788,14 +1269,14 @@ class Transpiler(object):
             current = logic.operands[i]
             
             if result["content_type"] not in ["INTEGER", "FLOAT", "BOOLEAN"]:
-                line, col = result["_tx_position"]
+                line, col = self.resolve_position(result["_tx_position"])
                 message = "Logic operation argument type INTEGER, FLOAT " \
                           "or BOOLEAN is expected, but '{0}' found." \
                           .format(result["content_type"])
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
             if current["content_type"] not in ["INTEGER", "FLOAT", "BOOLEAN"]:
-                line, col = current["_tx_position"]
+                line, col = self.resolve_position(current["_tx_position"])
                 message = "Logic operation argument type INTEGER, FLOAT " \
                           "or BOOLEAN is expected, but '{0}' found." \
                           .format(current["content_type"])
@@ -803,6 +1284,10 @@ class Transpiler(object):
 
             operator = logic.operator[i-1]
 
+            # Partially evaluated operation with one constant operand
+            short_circuited = self.short_circuit_logic(
+                operator, result, current, logic._tx_position)
+
             if (result["construct_type"]  == ConstructType.WORKABLE 
             and current["construct_type"] == ConstructType.WORKABLE):
                 if operator == 'and':
@@ -814,9 +1299,12 @@ class Transpiler(object):
                     "content": val, 
                     "content_type": py_to_clips_type(val.__class__),
                     "construct_type": ConstructType.WORKABLE,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": logic._tx_position
                 }
 
+            elif short_circuited != None:
+                result = short_circuited
+
             else:
                 val = '(' + operator + ' ' + \
                       str(translate_if_c_bool(result["content"])) + ' ' + \
@@ -833,7 +1321,7 @@ class Transpiler(object):
                     "content": val,
                     "content_type": resolved_c_type,
                     "construct_type": ConstructType.NORMAL_EXP,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": logic._tx_position
                 }
 
             i += 1
@@ -843,7 +1331,6 @@ class Transpiler(object):
 
     def comp_expression(self, comp):
         result = comp.operands[0]
-        bline, bcol = get_model(comp)._tx_parser.pos_to_linecol(comp._tx_position)
 
         l = len(comp.operands)
         i = 1
@@ -852,7 +1339,7 @@ class Transpiler(object):
             
             if result["content_type"] not in ["INTEGER", "FLOAT", "STRING", 
                                               "BOOLEAN"]:
-                line, col = result["_tx_position"]
+                line, col = self.resolve_position(result["_tx_position"])
                 message = "Comparison operation of type INTEGER, FLOAT, " \
                           "STRING or BOOLEAN is expected, but '{0}' found." \
                           .format(result["content_type"])
@@ -861,7 +1348,7 @@ class Transpiler(object):
 
             if current["content_type"] not in ["INTEGER", "FLOAT", "STRING", 
                                               "BOOLEAN"]:
-                line, col = current["_tx_position"]
+                line, col = self.resolve_position(current["_tx_position"])
                 message = "Comparison operation of type INTEGER, FLOAT, " \
                           "STRING or BOOLEAN is expected, but '{0}' found." \
                           .format(result["content_type"])
@@ -876,7 +1363,7 @@ class Transpiler(object):
             if ((result["content_type"] == "BOOLEAN" \
             and current["content_type"] == "BOOLEAN")):
                 if operator not in ['=', '!=']:
-                    line, col = current["_tx_position"]
+                    line, col = self.resolve_position(current["_tx_position"])
                     message = "Comparison operation of type BOOLEAN must be " \
                               "'==' or '!=', but '{0}' found." \
                               .format(operator)
@@ -900,13 +1387,13 @@ class Transpiler(object):
                 elif operator == '=':
                     val = result["content"] == current["content"]
                 elif operator == '!=':
-                    val = result["content"] + current["content"]
+                    val = result["content"] != current["content"]
                 
                 result = {
                     "content": val, 
                     "content_type": py_to_clips_type(val.__class__),
                     "construct_type": ConstructType.WORKABLE,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": comp._tx_position
                 }
 
             else:
@@ -942,7 +1429,7 @@ class Transpiler(object):
 
                 # Check if type is resolved correctly
                 if resolved_c_type == 1:
-                    line, col = result["_tx_position"]
+                    line, col = self.resolve_position(result["_tx_position"])
                     message = "Incompatible operand types " \
                               "present in comparison expression."
                     raise AkashicError(message, line, col, ErrType.SEMANTIC)
@@ -951,7 +1438,7 @@ class Transpiler(object):
                     "content": val,
                     "content_type": resolved_c_type,
                     "construct_type": ConstructType.NORMAL_EXP,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": comp._tx_position
                 }
 
             i += 1
@@ -960,8 +1447,6 @@ class Transpiler(object):
 
 
     def plus_minus_expr(self, plus_minus):
-        bline, bcol = get_model(plus_minus)._tx_parser \
-                        .pos_to_linecol(plus_minus._tx_position)
 
         # Check if expression is numeric
         result = plus_minus.operands[0]
@@ -972,14 +1457,14 @@ class Transpiler(object):
             current = plus_minus.operands[i]
 
             if result["content_type"] not in ["INTEGER", "FLOAT", "STRING"]:
-                line, col = result["_tx_position"]
+                line, col = self.resolve_position(result["_tx_position"])
                 message = "Addition or subtraction operand type INTEGER " \
                           "or FLOAT is expected, '{0}' but found." \
                           .format(result["content_type"])
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
                
             if current["content_type"] not in ["INTEGER", "FLOAT","STRING"]:
-                line, col = current["_tx_position"]
+                line, col = self.resolve_position(current["_tx_position"])
                 message = "Addition or subtraction operand type INTEGER " \
                           "or FLOAT is expected, but '{0}' found." \
                           .format(current["content_type"])
@@ -992,10 +1477,11 @@ class Transpiler(object):
                 if result["content_type"] == "STRING" \
                 or current["content_type"] == "STRING":
                     if operator == '+':
-                        val = '"' + str(result["content"]) + \
-                              str(current["content"]) + '"'
+                        val = str(translate_if_c_bool(result["content"])) + \
+                              str(translate_if_c_bool(current["content"]))
                     elif operator == '-':
-                        line, col = result["_tx_position"]
+                        line, col = self.resolve_position(
+                                        result["_tx_position"])
                         message = "Cannot perform operation 'minus' " \
                                     "on strings."
                         raise AkashicError(message, line, col, 
@@ -1011,7 +1497,7 @@ class Transpiler(object):
                     "content": val, 
                     "content_type": py_to_clips_type(val.__class__),
                     "construct_type": ConstructType.WORKABLE,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": plus_minus._tx_position
                 }
 
             else:
@@ -1062,7 +1548,7 @@ class Transpiler(object):
                     "content": val,
                     "content_type": resolved_c_type,
                     "construct_type": ConstructType.NORMAL_EXP,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": plus_minus._tx_position
                 }
 
             i += 1
@@ -1072,8 +1558,6 @@ class Transpiler(object):
 
     def mul_div_expr(self, mul_div):
         result = mul_div.operands[0]
-        bline, bcol = get_model(mul_div)._tx_parser \
-                      .pos_to_linecol(mul_div._tx_position)
 
         l = len(mul_div.operands)
         i = 1
@@ -1081,14 +1565,14 @@ class Transpiler(object):
             current = mul_div.operands[i]
 
             if result["content_type"] not in ["INTEGER", "FLOAT"]:
-                line, col = result["_tx_position"]
+                line, col = self.resolve_position(result["_tx_position"])
                 message = "Multiplication or division operand type INTEGER " \
                           "or FLOAT is expected, but '{0}' found." \
                           .format(result["content_type"])
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
             if current["content_type"] not in ["INTEGER", "FLOAT"]:
-                line, col = current["_tx_position"]
+                line, col = self.resolve_position(current["_tx_position"])
                 message = "Multiplication or division operand type INTEGER " \
                           "or FLOAT is expected, but '{0}' found." \
                           .format(current["content_type"])
@@ -1101,13 +1585,19 @@ class Transpiler(object):
                 if operator == '*':
                     val = result["content"] * current["content"]
                 elif operator == '/':
+                    if current["content"] == 0:
+                        line, col = self.resolve_position(
+                                        current["_tx_position"])
+                        message = "Division by zero."
+                        raise AkashicError(message, line, col, 
+                                           ErrType.SEMANTIC)
                     val = result["content"] / current["content"]
                 
                 result = {
                     "content": val, 
                     "content_type": py_to_clips_type(val.__class__),
                     "construct_type": ConstructType.WORKABLE,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": mul_div._tx_position
                 }
 
             else:
@@ -1129,7 +1619,7 @@ class Transpiler(object):
                     "content": val,
                     "content_type": resolved_c_type,
                     "construct_type": ConstructType.NORMAL_EXP,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": mul_div._tx_position
                 }
 
             i += 1
@@ -1139,8 +1629,6 @@ class Transpiler(object):
 
     def sqr_expr(self, sqr):
         result = sqr.operands[0]
-        bline, bcol = get_model(sqr)._tx_parser \
-                      .pos_to_linecol(sqr._tx_position)
 
         l = len(sqr.operands)
         i = 1
@@ -1148,14 +1636,14 @@ class Transpiler(object):
             current = sqr.operands[i]
            
             if result["content_type"] not in ["INTEGER", "FLOAT"]:
-                line, col = result["_tx_position"]
+                line, col = self.resolve_position(result["_tx_position"])
                 message = "Exponentiation or root extraction operand type " \
                           "INTEGER or FLOAT is expected, but '{0}' found." \
                           .format(result["content_type"])
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
             if current["content_type"] not in ["INTEGER", "FLOAT"]:
-                line, col = current["_tx_position"]
+                line, col = self.resolve_position(current["_tx_position"])
                 message = "Exponentiation or root extraction operand type " \
                           "INTEGER or FLOAT is expected, but '{0}' found." \
                           .format(current["content_type"])
@@ -1171,7 +1659,7 @@ class Transpiler(object):
                     "content": val, 
                     "content_type": py_to_clips_type(val.__class__),
                     "construct_type": ConstructType.WORKABLE,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": sqr._tx_position
                 }
 
             else:
@@ -1190,7 +1678,7 @@ class Transpiler(object):
                     "content": val, 
                     "content_type": resolved_c_type,
                     "construct_type": ConstructType.NORMAL_EXP,
-                    "_tx_position": (bline, bcol)
+                    "_tx_position": sqr._tx_position
                 }
 
             i += 1
@@ -1199,16 +1687,13 @@ class Transpiler(object):
 
 
     def factor(self, factor):
-        line, col = get_model(factor)._tx_parser \
-                    .pos_to_linecol(factor._tx_position)
-
         if factor.value.__class__.__name__ in ["int", "float", "bool"]:
             # If factor class is simple python type
             return {
                 "content": factor.value, 
                 "content_type": py_to_clips_type(factor.value.__class__),
                 "construct_type": ConstructType.WORKABLE,
-                "_tx_position": (line, col)
+                "_tx_position": factor._tx_position
             }
         elif factor.value.__class__.__name__ == "STRING_C":
             # Remove single quotation marks if factor class is string
@@ -1216,7 +1701,7 @@ class Transpiler(object):
                 "content": remove_quotes(factor.value.val),
                 "content_type": py_to_clips_type(str),
                 "construct_type": ConstructType.WORKABLE,
-                "_tx_position": (line, col)
+                "_tx_position": factor._tx_position
             }
         else:
             # Enters when factor class is: VARIABLE or 
@@ -1228,8 +1713,7 @@ class Transpiler(object):
     def variable(self, var):
         var_entry = self.variable_table.lookup(var.var_name)
         if var_entry == None:
-            line, col = get_model(var)._tx_parser \
-                        .pos_to_linecol(var._tx_position)
+            line, col = self.resolve_position(var._tx_position)
             message = "Undefined variable {0}.".format(var.var_name)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
         else:
@@ -1243,12 +1727,20 @@ class Transpiler(object):
 
 
     def build_query(self, template_name, field_name, dl_obj):
+        # Query runs data bridge and returns possible values, so it
+        # must not reach live environment (only its fork, which holds
+        # no other rules)
+        if not self.is_assistance_session:
+            line, col = self.resolve_position(dl_obj._tx_position)
+            message = "Assistance query '{0}.{1}{2}' can be used only " \
+                      "in assistance session." \
+                      .format(template_name, field_name, dl_obj.is_query)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
         self.is_assistance_rule = True
 
-        line_start, col_start = get_model(dl_obj)._tx_parser.pos_to_linecol(
-                                    dl_obj._tx_position)
-        line_end, col_end = get_model(dl_obj)._tx_parser.pos_to_linecol(
-                                    dl_obj._tx_position_end)
+        line_start, col_start = self.resolve_position(dl_obj._tx_position)
+        line_end, col_end = self.resolve_position(dl_obj._tx_position_end)
 
         unique_rule_name = str(uuid.uuid4()).replace('-', '')
         arg_array = list([
@@ -1277,11 +1769,6 @@ class Transpiler(object):
         clips_command = "(return_func " + " ".join(arg_array) + ")"
         self.assistance_clips_command_list.append(clips_command)
 
-        # Turns on the engine's assistance mode ON,
-        # This means taht all non query RULES will not be executed
-        clips_command = "(assert (__AssistanceOn (id \"something\")) )"
-        self.assistance_clips_command_list.append(clips_command)
-
         print("COMMS:")
         print(self.assistance_clips_command_list)
         # Use direct call to bridge - for debugging
@@ -1293,99 +1780,209 @@ class Transpiler(object):
         
 
     def data_locator(self, data_locator):
-        # Get needed data
-        template_name = data_locator.template_conn_expr.templates[0]
+        # Get needed data, field belongs to the last connected template
+        self.connect_templates(data_locator)
+        template_name = data_locator.template_conn_expr.templates[-1]
         field_name = data_locator.field
 
-        # Get position of token
-        line, col = get_model(data_locator)._tx_parser \
-                    .pos_to_linecol(data_locator._tx_position)
-
         # Search for existing entry in data locator table
         field = self.data_locator_table.lookup(template_name, field_name)
         if field and field.var_name:
-            # Build data query if needed
-            if hasattr(data_locator, 'is_query') and \
-            data_locator.is_query != None and \
-            data_locator.is_query != "":
-                print("THEREE IS ????*")
-                self.build_query(template_name, field_name, data_locator)
+            var_name = field.var_name
+            dp_field = field.dp_field
+        else:
+            var_name, dp_field = self.add_data_locator(
+                template_name, field_name, data_locator._tx_position)
 
-            return {
-                "content": field.var_name, 
-                "content_type": field.dp_field.type,
-                "construct_type": ConstructType.VARIABLE,
-                "_tx_position": (line, col)
-            }
+        # Build data query if needed
+        if hasattr(data_locator, 'is_query') and \
+        data_locator.is_query != None and \
+        data_locator.is_query != "":
+            print("THEREE IS ????*")
+            self.build_query(template_name, field_name, data_locator)
 
-        else:
-            # Checks field names against given data_providers
-            found_data_provider = None
-            for data_provider in self.data_providers:
-                if data_provider.dsd.model_id == template_name:
-                    found_data_provider = data_provider
-
-            if found_data_provider == None:
-                message = "There is no data provider defined for " \
-                          "template connection '{0}'." \
-                          .format(template_name)
-                raise AkashicError(message, line, col, ErrType.SEMANTIC)
-            
-            found_dp_field = found_data_provider.field_lookup(field_name)
+        return {
+            "content": var_name,
+            "content_type": dp_field.type,
+            "construct_type": ConstructType.VARIABLE,
+            "_tx_position": data_locator._tx_position
+        }
 
-            if not found_dp_field:
-                message = "Template field '{0}' is not defined in data " \
-                          "provider's template '{1}'" \
-                          .format(field_name, template_name)
-                raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
-            # Generate new variable and add new entry 
-            # to the data locator table
-            gen_var_name = self.variable_table.add_helper_var({
+
+    def add_data_locator(self, template_name, field_name, err_pos,
+                         var_name=None):
+        """ Adds new entry to the data locator table
+
+        Details
+        -------
+        Field names are checked against given data providers. If
+        variable name is not given, new variable is generated.
+
+        Returns
+        -------
+        tuple
+            Variable name and data provider field of the entry
+        """
+
+        # Checks field names against given data_providers
+        self.referenced_models.add(template_name)
+        found_data_provider = self.schema_registry.lookup(template_name)
+
+        if found_data_provider == None:
+            message = "There is no data provider defined for " \
+                      "template connection '{0}'." \
+                      .format(template_name)
+            line, col = self.resolve_position(err_pos)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
+        found_dp_field = found_data_provider.field_lookup(field_name)
+        self.add_field_dependency(template_name, field_name)
+
+        if not found_dp_field:
+            message = "Template field '{0}' is not defined in data " \
+                      "provider's template '{1}'" \
+                      .format(field_name, template_name)
+            line, col = self.resolve_position(err_pos)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
+        # Generate new variable and add new entry
+        # to the data locator table
+        if var_name == None:
+            var_name = self.variable_table.add_helper_var({
                 "content": template_name + "." + field_name,
                 "content_type": found_dp_field.type,
                 "construct_type": ConstructType.NOTHING,
             })
-            self.data_locator_vars.append(gen_var_name)
-            self.data_locator_table.add(
-                template_name, 
-                field_name, 
-                gen_var_name, 
-                found_dp_field
-            )
+        if var_name not in self.data_locator_vars:
+            self.data_locator_vars.append(var_name)
+        self.data_locator_table.add(
+            template_name,
+            field_name,
+            var_name,
+            found_dp_field
+        )
+        return var_name, found_dp_field
 
-            # Build data query if needed
-            if hasattr(data_locator, 'is_query') and \
-            data_locator.is_query != None and \
-            data_locator.is_query != "":
-                print("THEREE IS ????*")
-                self.build_query(template_name, field_name, data_locator)
-            
-            return {
-                "content": gen_var_name,
-                "content_type": found_dp_field.type,
-                "construct_type": ConstructType.VARIABLE,
-                "_tx_position": (line, col)
-            }
+
+
+    def connect_templates(self, data_locator):
+        """ Joins templates of template connection expression
+
+        Details
+        -------
+        For every pair of connected templates ('a~b'), foreign key
+        field of one of them and referenced field of the other one are
+        added to the data locator table with the same variable. Their
+        patterns are then joined by equality of that variable, which
+        CLIPS matches through its alpha and beta memories, instead of
+        testing every combination of facts.
+        """
+
+        templates = data_locator.template_conn_expr.templates
+        err_pos = data_locator._tx_position
+
+        if len(set(templates)) < len(templates):
+            message = "Template connection '{0}' references the same " \
+                      "template more than once." \
+                      .format("~".join(templates))
+            line, col = self.resolve_position(err_pos)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
+        for i in range(0, len(templates) - 1):
+            join_fields = self.foreign_key_join(templates[i],
+                                                templates[i + 1],
+                                                err_pos)
+
+            var_names = set()
+            for template_name, field_name in join_fields:
+                field = self.data_locator_table.lookup(template_name,
+                                                       field_name)
+                if field and field.var_name:
+                    var_names.add(field.var_name)
+
+            if len(var_names) > 1:
+                message = "Fields '{0}' and '{1}', which connect templates " \
+                          "'{2}' and '{3}', are already referenced " \
+                          "separately. Reference them after the template " \
+                          "connection." \
+                          .format(".".join(join_fields[0]),
+                                  ".".join(join_fields[1]),
+                                  templates[i], templates[i + 1])
+                line, col = self.resolve_position(err_pos)
+                raise AkashicError(message, line, col, ErrType.SEMANTIC)
+
+            var_name = var_names.pop() if len(var_names) > 0 else None
+            for template_name, field_name in join_fields:
+                if self.data_locator_table.lookup(template_name,
+                                                  field_name) == None:
+                    var_name, dp_field = self.add_data_locator(
+                        template_name, field_name, err_pos, var_name)
+        return 0
+
+
+
+    def foreign_key_join(self, template_name, other_template_name, err_pos):
+        """ Finds foreign key which connects two templates
+
+        Details
+        -------
+        Foreign key can be defined in either of templates, but
+        templates must be connected by exactly one foreign key.
+
+        Returns
+        -------
+        list
+            Pairs (template name, field name) of foreign key field
+            and the field referenced by it
+        """
+
+        join_fields = []
+        for from_name, to_name in [(template_name, other_template_name),
+                                   (other_template_name, template_name)]:
+            data_provider = self.get_data_provider(from_name, err_pos)
+            for dp_field in data_provider.dsd.fields:
+                if dp_field.use_as == '\"foreign-key\"' \
+                and dp_field.ref_foreign_model_id == to_name:
+                    join_fields.append([
+                        (from_name, dp_field.field_name),
+                        (to_name, dp_field.ref_foreign_field_name)
+                    ])
+
+        if len(join_fields) != 1:
+            if len(join_fields) == 0:
+                message = "Templates '{0}' and '{1}' are not connected " \
+                          "by foreign key."
+            else:
+                message = "Templates '{0}' and '{1}' are connected by " \
+                          "more than one foreign key."
+            line, col = self.resolve_position(err_pos)
+            raise AkashicError(message.format(template_name,
+                                              other_template_name),
+                               line, col, ErrType.SEMANTIC)
+        return join_fields[0]
 
 
 
-    def check_fact_address_def(self, var_name, field_name, line, col):
+    def check_fact_address_def(self, var_name, field_name, err_pos):
         var_entry = self.variable_table.lookup(var_name)
         
         if not var_entry:
             message = "Variable '{0}' is not defined." \
                       .format(var_name)
+            line, col = self.resolve_position(err_pos)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
         
         if var_entry.var_type != VarType.FACT_ADDRESS:
             message = "Variable '{0}' is not fact address." \
                       .format(var_name)
+            line, col = self.resolve_position(err_pos)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         if not "model_id" in var_entry.value:
             message = "Variable '{0}' does not point to any fact." \
                       .format(var_name)
+            line, col = self.resolve_position(err_pos)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         # Extract information 
@@ -1395,12 +1992,12 @@ class Transpiler(object):
         # Check semantics of fact_address model name and 
         # fact_address field name
         found_data_provider = self.get_data_provider(fact_address_model_id,
-                                                     line, 
-                                                     col)
+                                                     err_pos)
         if found_data_provider == None:
             message = "There is no data provider defined for " \
                       "fact address template '{0}'." \
                       .format(fact_address_model_id)
+            line, col = self.resolve_position(err_pos)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         found_dp_field = self.get_dp_field(fact_address_field_name,
@@ -1410,26 +2007,22 @@ class Transpiler(object):
                       "data provider's template '{1}'" \
                       .format(fact_address_field_name,
                               fact_address_model_id)
+            line, col = self.resolve_position(err_pos)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
 
 
     def lhs_value_locator(self, lhs_vl):
-        line, col = get_model(lhs_vl)._tx_parser \
-                    .pos_to_linecol(lhs_vl._tx_position)
-
         self.check_fact_address_def(
             lhs_vl.var_name, 
             lhs_vl.field_name, 
-            line, 
-            col
+            lhs_vl._tx_position
         )
 
         found_field_type = self.get_value_locator_type (
             lhs_vl.var_name, 
             lhs_vl.field_name, 
-            line, 
-            col
+            lhs_vl._tx_position
         )
 
         clips_content = '(fact-slot-value ' + \
@@ -1440,7 +2033,7 @@ class Transpiler(object):
             "content": clips_content,
             "content_type": found_field_type,
             "construct_type": ConstructType.VARIABLE,
-            "_tx_position": (line, col)
+            "_tx_position": lhs_vl._tx_position
         }
 
 
@@ -1449,16 +2042,15 @@ class Transpiler(object):
 # ----------------------------------------------------------------
 
 
-    def get_data_provider(self, model_id, err_line, err_col):
-        data_provider = None
-        for ds in self.data_providers:
-            if ds.dsd.model_id == model_id:
-                data_provider = ds
+    def get_data_provider(self, model_id, err_pos):
+        self.referenced_models.add(model_id)
+        data_provider = self.schema_registry.lookup(model_id)
 
         if not data_provider:
             message = "DSD model with name '{0}' does not exist." \
                         .format(model_id)
-            raise AkashicError(message, err_line, err_col, ErrType.SEMANTIC)
+            line, col = self.resolve_position(err_pos)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         return data_provider
 
@@ -1467,11 +2059,8 @@ class Transpiler(object):
     def get_dp_field(self, field_name, data_provider):
         if data_provider == None:
             return None
-
-        for dp_field in data_provider.dsd.fields:
-            if dp_field.field_name == field_name:
-                return dp_field
-        return None
+        self.add_field_dependency(data_provider.dsd.model_id, field_name)
+        return data_provider.field_lookup(field_name)
 
 
 
@@ -1486,17 +2075,17 @@ class Transpiler(object):
 
 
 
-    def get_value_locator_type(self, var_name, field_name, err_line, err_col):
+    def get_value_locator_type(self, var_name, field_name, err_pos):
         var_entry = self.variable_table.lookup(var_name)
         if not "model_id" in var_entry.value:
             message = "Variable '{0}' does not reference any model." \
                       "Therefore it cannot be used as data locator." \
                       .format(var_name)
-            raise AkashicError(message, err_line, err_col, ErrType.SEMANTIC)
+            line, col = self.resolve_position(err_pos)
+            raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         data_provider = self.get_data_provider(var_entry.value["model_id"], 
-                                               err_line, 
-                                               err_col)
+                                               err_pos)
         dp_field = self.get_dp_field(field_name, data_provider)
         return dp_field.type
 
@@ -1509,15 +2098,11 @@ class Transpiler(object):
 
 
     def check_fact_address_def_rhs(self, json_field, dp_field):
-        line, col = get_model(json_field.value)._tx_parser \
-                    .pos_to_linecol(json_field.value._tx_position)
-
         # Check fact address definition aka. data locator
         self.check_fact_address_def(
             json_field.value.var_name,
             json_field.value.field_name,
-            line,
-            col
+            json_field.value._tx_position
         )
 
         # Check if type of fact accress field is 
@@ -1525,8 +2110,7 @@ class Transpiler(object):
         found_dp_field_type = self.get_value_locator_type (
             json_field.value.var_name,
             json_field.value.field_name,
-            line,
-            col
+            json_field.value._tx_position
         )
         if dp_field != None and found_dp_field_type != dp_field.type:
             message = "Type missmatch in field '{0}'. " \
@@ -1535,23 +2119,23 @@ class Transpiler(object):
                       .format(json_field.name,
                               dp_field.type,
                               found_dp_field.type)
+            line, col = self.resolve_position(json_field.value._tx_position)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
 
 
     def check_binding_variable(self, var_obj, dp_field=None):
-        line, col = get_model(var_obj)._tx_parser \
-                    .pos_to_linecol(var_obj._tx_position)
-
         var_entry = self.variable_table.lookup(var_obj.var_name)
         
         if var_entry == None:
             message = "Undefined variable {0}.".format(var_obj.var_name)
+            line, col = self.resolve_position(var_obj._tx_position)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         if var_entry.var_type != VarType.BINDING:
             message = "Cannot reference non-binding " \
                       "variable in RHS of the rule."
+            line, col = self.resolve_position(var_obj._tx_position)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
         entry_type = var_entry.value["content_type"]
@@ -1561,6 +2145,7 @@ class Transpiler(object):
                       .format(dp_field.field_name,
                               dp_field.type,
                               entry_type)
+            line, col = self.resolve_position(var_obj._tx_position)
             raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
 
@@ -1574,8 +2159,7 @@ class Transpiler(object):
                 if json_field != None:
                     data_fields.append((json_field, dp_field))
                 else:
-                    line, col = get_model(json_object)._tx_parser \
-                                .pos_to_linecol(json_object._tx_position)
+                    line, col = self.resolve_position(json_object._tx_position)
                     message = "Primary key field '{0}' is omitted " \
                               "from the operation request." \
                               .format(dp_field.field_name)
@@ -1593,8 +2177,7 @@ class Transpiler(object):
             if json_field != None:
                 data_fields.append((json_field, dp_field))
             else:
-                line, col = get_model(json_object)._tx_parser \
-                            .pos_to_linecol(json_object._tx_position)
+                line, col = self.resolve_position(json_object._tx_position)
                 message = "Field '{0}' is omitted from the " \
                           "operation request." \
                           .format(dp_field.field_name)
@@ -1611,18 +2194,15 @@ class Transpiler(object):
                                              json_object.field_list)
 
             if json_field == None:
-                line, col = get_model(json_object)._tx_parser \
-                    .pos_to_linecol(json_object._tx_position)
+                line, col = self.resolve_position(json_object._tx_position)
                 message = "Foreign model reference field " \
                           "'{0}' is omitted from the " \
                           "operation request." \
                           .format(ref.url_placement)
                 raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
-            line, col = get_model(json_field)._tx_parser \
-                    .pos_to_linecol(json_field._tx_position)
-
-            data_provider = self.get_data_provider(ref.model_id, line, col)
+            data_provider = self.get_data_provider(ref.model_id,
+                                                   json_field._tx_position)
             dp_field = self.get_dp_field(ref.field_name, data_provider)
 
             ref_fields.append((json_field, dp_field))
@@ -1634,9 +2214,6 @@ class Transpiler(object):
     def analyse_fields(self, fields):
         analysed_fields = []
         for json_field, dp_field in fields:
-            err_line, err_col = get_model(json_field)._tx_parser \
-                                .pos_to_linecol(json_field._tx_position)
-
             given_type = py_to_clips_type(json_field.value.__class__)
             json_field_type = None
             json_field_class = None
@@ -1648,8 +2225,7 @@ class Transpiler(object):
                     json_field_type = self.get_value_locator_type(
                         json_field.value.var_name,
                         json_field.value.field_name,
-                        err_line,
-                        err_col
+                        json_field.value._tx_position
                     )
                     json_field_class = "RHSValueLocator"
 
@@ -1669,8 +2245,8 @@ class Transpiler(object):
                               .format(json_field.name,
                                       dp_field.type,
                                       given_type)
-                    raise AkashicError(message, err_line, err_col, 
-                                        ErrType.SEMANTIC)
+                    line, col = self.resolve_position(json_field._tx_position)
+                    raise AkashicError(message, line, col, ErrType.SEMANTIC)
                 json_field_type = py_to_clips_type(json_field.value.__class__)
                 json_field_class = "NORMAL"
 
@@ -1724,16 +2300,14 @@ class Transpiler(object):
 
 
 
-    def checkout_duplicates(self, json_field_list, err_line, err_col):
+    def checkout_duplicates(self, json_field_list, err_pos):
         for i in range(0, len(json_field_list)):
             for j in range(i+1, len(json_field_list)):
                 if json_field_list[i].name == json_field_list[j].name:
                     message = "Duplicate fields with name '{0}' detected." \
                               .format(json_field_list[i].name)
-                    raise AkashicError(message, 
-                                       err_line, 
-                                       err_col, 
-                                       ErrType.SEMANTIC)
+                    line, col = self.resolve_position(err_pos)
+                    raise AkashicError(message, line, col, ErrType.SEMANTIC)
 
 
     def check_api_vs_reflect(self, 
@@ -1745,8 +2319,7 @@ class Transpiler(object):
         # but DSD cannot reflect
         if rhs_operation_obj.reflect and \
         not data_provider.dsd.can_reflect:
-            line, col = get_model(rhs_operation_obj)._tx_parser \
-            .pos_to_linecol(rhs_operation_obj._tx_position)
+            line, col = self.resolve_position(rhs_operation_obj._tx_position)
             message = "Model '{0}' does not support " \
                       "web reflection." \
                       .format(rhs_operation_obj.model_id)
@@ -1756,8 +2329,7 @@ class Transpiler(object):
         # but DSD does not have given operation api
         if (rhs_operation_obj.reflect) and \
         not hasattr(data_provider.dsd.apis, api_operation_name):
-            line, col = get_model(rhs_operation_obj)._tx_parser \
-            .pos_to_linecol(rhs_operation_obj._tx_position)
+            line, col = self.resolve_position(rhs_operation_obj._tx_position)
             message = "Model '{0}' does not support " \
                       "'{1}' operation." \
                       .format(rhs_operation_obj.model_id,
@@ -1780,13 +2352,10 @@ class Transpiler(object):
                               rhs_operation_obj, 
                               api_operation_name):
 
-        line, col = get_model(rhs_operation_obj)._tx_parser \
-                    .pos_to_linecol(rhs_operation_obj._tx_position)
-
         # Find data provider for given model
         data_provider = self.get_data_provider(rhs_operation_obj.model_id,
-                                               line, 
-                                               col)
+                                               rhs_operation_obj._tx_position)
+        self.add_field_dependency(rhs_operation_obj.model_id)
 
         # Check reflection option against settings in DSD
         self.check_api_vs_reflect(data_provider,
@@ -1795,8 +2364,7 @@ class Transpiler(object):
 
         # Check field list for duplicate fileds
         self.checkout_duplicates(rhs_operation_obj.json_object.field_list,
-                                 line, 
-                                 col)
+                                 rhs_operation_obj._tx_position)
 
         # DO NOT GET REFS IF NOT REFLECT
         # Separate data and do primary field checks
@@ -1842,7 +2410,7 @@ class Transpiler(object):
         )
 
         clips_command = "(create_func " + " ".join(arg_array) + ")"
-        self.rhs_clips_command_list.append(clips_command)
+        self.add_generated_rhs_command(clips_command)
 
         # Use direct call to bridge - for debugging
         # self.env_provider.bridges["DataBridge"].create_func(*arg_array)
@@ -1856,7 +2424,8 @@ class Transpiler(object):
         )
 
         clips_command = "(update_func " + " ".join(arg_array) + ")"
-        self.rhs_clips_command_list.append(clips_command)
+        self.add_generated_rhs_command(clips_command)
+        self.has_fact_changes = True
 
         # Use direct call to bridge - for debugging
         # self.env_provider.bridges["DataBridge"].update_func(*arg_array)
@@ -1864,13 +2433,9 @@ class Transpiler(object):
 
 
     def return_statement(self, return_s):
-        line, col = get_model(return_s)._tx_parser \
-                    .pos_to_linecol(return_s._tx_position)
-
         # Check field list for duplicate fileds
         self.checkout_duplicates(return_s.json_object.field_list,
-                                 line, 
-                                 col)
+                                 return_s._tx_position)
 
         all_fields = [(json_field, None) for json_field in \
                      return_s.json_object.field_list]
@@ -1890,7 +2455,7 @@ class Transpiler(object):
         ])
 
         clips_command = "(return_func " + " ".join(arg_array) + ")"
-        self.rhs_clips_command_list.append(clips_command)
+        self.add_generated_rhs_command(clips_command)
 
         # Use direct call to bridge - for debugging
         #self.env_provider.bridges["DataBridge"].return_func(*arg_array)
@@ -1898,13 +2463,10 @@ class Transpiler(object):
 
 
     def delete_statement(self, delete_s):
-        line, col = get_model(delete_s)._tx_parser \
-                    .pos_to_linecol(delete_s._tx_position)
-
         # Find data provider for given model
         data_provider = self.get_data_provider(delete_s.model_id,
-                                               line, 
-                                               col)
+                                               delete_s._tx_position)
+        self.add_field_dependency(delete_s.model_id)
 
         # Check reflection option against settings in DSD
         self.check_api_vs_reflect(data_provider,
@@ -1913,8 +2475,7 @@ class Transpiler(object):
 
         # Check field list for duplicate fileds
         self.checkout_duplicates(delete_s.json_object.field_list,
-                                 line, 
-                                 col)
+                                 delete_s._tx_position)
 
         # Take only refs
         if delete_s.reflect:
@@ -1942,7 +2503,8 @@ class Transpiler(object):
         ])
 
         clips_command = "(delete_func " + " ".join(arg_array) + ")"
-        self.rhs_clips_command_list.append(clips_command)
+        self.add_generated_rhs_command(clips_command)
+        self.has_fact_changes = True
 
         # Use direct call to bridge - for debugging
         # self.env_provider.bridges["DataBridge"].delete_func(*arg_array)
@@ -1,7 +1,15 @@
 
 
+import re
 from enum import Enum
 
+from akashic.enums.construct_type import ConstructType
+
+
+# CLIPS variable inside of generated CLIPS expression
+VAR_TOKEN = re.compile(r'\?[^\d\W]\w*')
+
+
 class VarType(Enum):
     def __str__(self):
         return str(self.name)
@@ -39,11 +47,18 @@ class VariableTable(object):
 
         We set starting index of generated variables names.
         We init the variable table - in form of dictionary.
+        We init reverse indexes, which map variable name to names of
+        entries using it (in list of used variables or in the value
+        CLIPS expression), so that variable can be renamed without
+        going through the whole table.
         """
 
         self.gen_var_index = 0
         self.table = {}
 
+        self.used_by = {}
+        self.referenced_by = {}
+
 
     def next_var_name(self):
         gen_name = "?v" + str(self.gen_var_index)
@@ -78,6 +93,7 @@ class VariableTable(object):
         e.var_type = var_type
 
         self.table[name] = e
+        self.index_entry(e)
         return e.name
 
 
@@ -105,6 +121,7 @@ class VariableTable(object):
        
         
         self.table[e.name] = e
+        self.index_entry(e)
         return e.name
 
 
@@ -128,13 +145,81 @@ class VariableTable(object):
         """
 
         if self.lookup(name):
+            self.unindex_entry(self.table[name])
             self.table[name].value = value
+            self.index_entry(self.table[name])
             return 0
         else:
             return 1
 
 
 
+    def rename_var(self, old_name, new_name):
+        """ Renames variable in all entries using it
+
+        Details
+        -------
+        Variable is renamed in lists of used variables of all entries,
+        and in CLIPS expressions of entries which are not WORKABLE
+        (constant) values. Only entries found in reverse indexes
+        are touched. Expressions are renamed by whole variable names,
+        so renaming '?v1' does not change '?v10'.
+
+        Parameters
+        ----------
+        old_name : str
+            Current name of the variable
+        new_name : str
+            New name of the variable
+        """
+
+        for name in self.used_by.pop(old_name, set()):
+            e = self.table[name]
+            e.used_variables = [new_name if uv == old_name else uv \
+                                for uv in e.used_variables]
+            self.used_by.setdefault(new_name, set()).add(name)
+
+        # Value can be shared between entries (variable assigned
+        # to variable), so it is renamed only once
+        renamed_values = set()
+        pattern = re.compile(re.escape(old_name) + r'(?!\w)')
+        for name in self.referenced_by.pop(old_name, set()):
+            e = self.table[name]
+            if not id(e.value) in renamed_values:
+                renamed_values.add(id(e.value))
+                e.value["content"] = pattern.sub(new_name,
+                                                 e.value["content"])
+            self.referenced_by.setdefault(new_name, set()).add(name)
+
+
+
+    def index_entry(self, e):
+        for var_name in e.used_variables:
+            self.used_by.setdefault(var_name, set()).add(e.name)
+
+        for var_name in self.referenced_vars(e):
+            self.referenced_by.setdefault(var_name, set()).add(e.name)
+
+
+
+    def unindex_entry(self, e):
+        for var_name in e.used_variables:
+            self.used_by.get(var_name, set()).discard(e.name)
+
+        for var_name in self.referenced_vars(e):
+            self.referenced_by.get(var_name, set()).discard(e.name)
+
+
+
+    def referenced_vars(self, e):
+        if not isinstance(e.value, dict) or \
+        e.value.get("construct_type") == ConstructType.WORKABLE or \
+        not isinstance(e.value.get("content"), str):
+            return set()
+        return set(VAR_TOKEN.findall(e.value["content"]))
+
+
+
     def lookup(self, name):
         """ Searches for the variable with given name in variable table
 
@@ -1,15 +1,12 @@
 
 import sys
-import uuid
 import json
 import traceback
 
-from akashic.arules.transpiler import Transpiler
+from akashic.arules.transpiler import Transpiler, APPLY_CHANGES_FUNC
 
 from akashic.util.type_converter import string_to_py_type
-from akashic.exceptions import AkashicError, ErrType
 
-from akashic.system.rules.generic_rule import GENERIC_RULE
 from akashic.system.rules.query_rule import QUERY_RULE
 
 from akashic.ads.data_provider import FactGenType
@@ -30,7 +27,11 @@ class DataBridge(object):
 
         self.data_providers_map = {}
         for dp in self.data_providers:
-            self.data_providers_map[dp.dsd.model_id] = dp
+            self.data_providers_map[dp.model_id] = dp
+
+        # Updates and deletes of RHS statements, applied when RHS ends:
+        # tuples (data provider, primary-key args, slots or None)
+        self.pending_changes = []
 
         # If num_of_args are -1, -2, -3,
         # then it is actually 'more than 1,2,3..'
@@ -114,11 +115,20 @@ class DataBridge(object):
         
 
 
+    def define_functions(self):
+        """ Defines system functions of the bridge in CLIPS environment
+        """
+
+        self.env_provider.env.define_function(self.apply_changes,
+                                              APPLY_CHANGES_FUNC)
+
+
+
     def refresh_data_providers(self, data_providers):
         self.data_providers = data_providers
         self.data_providers_map = {}
         for dp in self.data_providers:
-            self.data_providers_map[dp.dsd.model_id] = dp
+            self.data_providers_map[dp.model_id] = dp
 
 
 
@@ -204,43 +214,16 @@ class DataBridge(object):
             self.env_provider.insert_fact(clips_fact)
         
         else:
-            clips_fact = data_provider.generate_one_clips_fact(
-                data_json_construct,
-                FactGenType.PLAIN
-            )
-            self.env_provider.insert_fact(clips_fact)
+            self.env_provider.insert_facts(data_provider.model_id,
+                                           [data_json_construct])
 
         return 0
 
 
 
-    def gen_clips_modify_fact_expr(self, var_name, args):
-        clips_field_mods = []
-        length = len(args)
-        i = 0
-        while i < length:
-            field_name = args[i]
-            field_value = args[i+1]
-            field_type = args[i+2]
-
-            if field_type == "STRING":
-                field_value = '"' + field_value + '"'
-            clips_field_mods.append("(" + \
-                                    field_name + " " + \
-                                    field_value + \
-                                    ")")
-            i += 3
-        
-        return "(modify " + var_name + " " + \
-               " ".join(clips_field_mods) + \
-               ")"
-
-
-
     def get_primary_key_field(self, data_provider):
-        for field in data_provider.dsd.fields:
-            if field.use_as == "\"primary-key\"":
-                return field
+        return self.env_provider.schema_registry \
+                   .primary_key_field(data_provider.dsd.model_id)
 
 
 
@@ -252,14 +235,40 @@ class DataBridge(object):
             value = args[i+1]
             value_type = args[i+2]
             if f_name == field_name:
-                new_value = value
-                if value_type == "STRING":
-                    new_value = '"' + new_value + '"'
-                return new_value
+                return string_to_py_type(value, value_type)
             i += 3
 
 
 
+    def find_fact(self, data_provider, args):
+        """ Finds fact of data provider's model by its primary key
+
+        Parameters
+        ----------
+        args : list
+            Field args of the call, holding primary-key field
+
+        Returns
+        -------
+        TemplateFact
+            The most recently inserted fact with given primary key,
+            None if there is no such fact
+        """
+
+        primary_key_field_name = \
+            self.get_primary_key_field(data_provider).field_name
+        primary_key_field_value = self.get_field_value_from_args(
+            args, primary_key_field_name)
+
+        if self.debug:
+            print("PRIM KEY NAME: " + primary_key_field_name)
+            print("PRIM KEY VALUE: " + str(primary_key_field_value))
+            print("ENDD")
+        return self.env_provider.get_fact(data_provider.model_id,
+                                          primary_key_field_value)
+
+
+
     def update_func_call(self, *args):
         args = map(lambda arg: arg.replace('"', ''), args)
         args = list(args)
@@ -281,54 +290,18 @@ class DataBridge(object):
         
         ref_len = string_to_py_type(args[REF_LEN_POS], "INTEGER")
         
-        # Build and deploy modification rule
-        primary_key_field_name = \
-            self.get_primary_key_field(data_provider).field_name
-        
+        # Queue modification of the fact, found by its primary key
+        # when RHS ends
         if reflect_on_web:
-            primary_key_field_value = self.get_field_value_from_args(
-                args[REF_START_POS:REF_START_POS+ref_len],
-                primary_key_field_name
-            )
-        else: 
-            primary_key_field_value = self.get_field_value_from_args(
-                args[DATA_START_POS:DATA_START_POS+data_len],
-                primary_key_field_name
-            )
-        if self.debug:
-            print("PRIM KEY NAME: " + primary_key_field_name)
-            print("PRIM KEY VALUE: " + str(primary_key_field_value))
-            print("ENDD")
-        rhs = """{{ "?to_update<-": "[{0}.{1} == {2}]" }}""".format(
-                data_provider.dsd.model_id,
-                str(primary_key_field_name),
-                str(primary_key_field_value).replace('"', "'")
-            )
-        lhs = """{{ "clips": "{0}" }}""".format(
-            self.gen_clips_modify_fact_expr(
-                "?to_update",
-                args[DATA_START_POS:DATA_START_POS+data_len]
-            )
-        )
-        tmp_update_rule = GENERIC_RULE.format(
-            "__update_fact_" + str(uuid.uuid4()).replace('-', ''),
-            "\"system\"",
-            "true",
-            rhs,
-            lhs
+            key_args = args[REF_START_POS:REF_START_POS+ref_len]
+        else:
+            key_args = args[DATA_START_POS:DATA_START_POS+data_len]
+        slots = data_provider.generate_fact_slots(
+            self.data_arg_list_to_request_body(
+                args[DATA_START_POS:DATA_START_POS+data_len]),
+            complete=False
         )
-        if self.debug:
-            print("\nMODIFICATION FULE: " + tmp_update_rule)
-            print("\nMOD. RULE TRANSPILATION PRINT:")
-        transpiler = Transpiler(self.env_provider)
-
-        try:
-            transpiler.load(tmp_update_rule)
-        except AkashicError as ae:
-            print(ae.message)
-
-        self.env_provider.insert_rule(transpiler.rule.rule_name, 
-                                      transpiler.tranpiled_rule)
+        self.pending_changes.append((data_provider, key_args, slots))
         
         # Reflect modification on web if required
         if reflect_on_web:
@@ -348,15 +321,6 @@ class DataBridge(object):
             if self.debug:
                 print("\nMAP: " + str(url_map_args))
                 print("\nUPDATE RESPONSE:\n" + str(response_obj) + "\n\n")
-
-        # Print all facts
-        if self.debug:
-            print("FACTS - print from bridge:")
-            for f in self.env_provider.env.facts():
-                print("---------")
-                print(f)
-
-            print("****")
         return 0
 
 
@@ -403,39 +367,10 @@ class DataBridge(object):
         reflect_on_web = string_to_py_type(args[REFLECT_INFO_POS], "BOOLEAN")        
         ref_len = string_to_py_type(args[REF_LEN_POS], "INTEGER")
         
-        # Build and deploy modification rule
-        primary_key_field_name = \
-            self.get_primary_key_field(data_provider).field_name
-        primary_key_field_value = self.get_field_value_from_args(
-            args[REF_START_POS:REF_START_POS+ref_len],
-            primary_key_field_name
-        )
-        rhs = """{{ "?to_delete<-": "[{0}.{1} == {2}]" }}""".format(
-                data_provider.dsd.model_id,
-                str(primary_key_field_name),
-                str(primary_key_field_value).replace('"', "'")
-            )
-        lhs = """{{ "clips": "{0}" }}""".format(
-            "(retract ?to_delete)"
-        )
-        tmp_delete_rule = GENERIC_RULE.format(
-            "__delete_fact_" + str(uuid.uuid4()).replace('-', ''),
-            "\"system\"",
-            "true",
-            rhs,
-            lhs
-        )
-        if self.debug:
-            print("\nDELETION RULE: " + tmp_delete_rule)
-            print("\nDEL. RULE TRANSPILATION PRINT:")
-        transpiler = Transpiler(self.env_provider)
-        try:
-            transpiler.load(tmp_delete_rule)
-        except AkashicError as ae:
-            print(ae.message)
-
-        self.env_provider.insert_rule(transpiler.rule.rule_name, 
-                                      transpiler.tranpiled_rule)
+        # Queue retraction of the fact, found by its primary key
+        # when RHS ends
+        self.pending_changes.append(
+            (data_provider, args[REF_START_POS:REF_START_POS+ref_len], None))
         
         # Reflect modification on web if required
         if reflect_on_web:
@@ -452,19 +387,47 @@ class DataBridge(object):
                 print("\nMAP: " + str(url_map_args))
                 print("\nDELETION RESPONSE:\n" + str(response_obj) + "\n\n")
 
-        # Print all facts
-        if self.debug:
-            print("FACTS - print from bridge:")
-            for f in self.env_provider.env.facts():
-                print("---------")
-                print(f)
-
-            print("****")
         return 0
 
 
 
 
+    def apply_changes(self):
+        """ Applies queued updates and deletes of facts, in order
+
+        Details
+        -------
+        Called at the end of RHS which updates or deletes facts, so
+        statements of the RHS are evaluated against facts as they
+        were matched, same as if every change was done by separate
+        rule fired after the RHS. Fact with given primary key is
+        found when the change is applied. If there is no such fact,
+        nothing is changed.
+        """
+
+        pending_changes = self.pending_changes
+        self.pending_changes = []
+        for data_provider, key_args, slots in pending_changes:
+            fact = self.find_fact(data_provider, key_args)
+            if fact is None:
+                continue
+
+            if slots == None:
+                if self.debug:
+                    print("RETRACTED FACT - print from bridge:")
+                    print(fact)
+                    print("****")
+                self.env_provider.retract_fact(fact)
+            else:
+                self.env_provider.modify_fact(fact, **slots)
+                if self.debug:
+                    print("MODIFIED FACT - print from bridge:")
+                    print(fact)
+                    print("****")
+        return 0
+
+
+
     def process_query_call(self, *args):
         args = map(lambda arg: arg.replace('"', ''), args)
         args = list(args)
@@ -496,7 +459,7 @@ class DataBridge(object):
         transpiler = Transpiler(self.env_provider, True)
         transpiler.load(tmp_update_rule)
 
-        self.env_provider.insert_rule(transpiler.rule.rule_name, 
+        self.env_provider.insert_rule(transpiler.rule_name, 
                                       transpiler.tranpiled_rule)
 
         return 0
\ No newline at end of file
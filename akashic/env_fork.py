@@ -0,0 +1,359 @@
+import os
+import re
+import tempfile
+from collections import Counter
+
+from clips._clips import lib
+
+from akashic.ads.data_provider import DataProvider
+from akashic.bridges.data_bridge import DataBridge
+from akashic.bridges.time_bridge import TimeBridge
+
+
+# Prefix of system DSD models and rules, which are created
+# by every environment
+SYSTEM_PREFIX = "__"
+
+# Bridges created by every environment, bound to it
+SYSTEM_BRIDGES = (DataBridge, TimeBridge)
+
+# Fact references in basis of CLIPS activation, like '0 R: f-1,*,f-3'
+FACT_REF = re.compile(r'f-(\d+)')
+
+
+class ForkSnapshot(object):
+    """ ForkSnapshot class
+
+    This class holds everything needed to build copy of the
+    environment: DSDs, CLIPS code of rules and facts in CLIPS form.
+    It does not reference the environment, so the copy can be built
+    after the environment is released.
+    """
+
+    def __init__(self, env_class):
+        self.env_class = env_class
+        self.custom_bridges = []
+
+        # Tuples (DSD string, model id, fingerprint, CLIPS template)
+        self.data_providers = []
+
+        # Tuples (rule name, CLIPS code, dependency entry or None)
+        self.rules = []
+
+        # Facts in save-facts form and their indexes, in the same order
+        self.facts = ""
+        self.fact_indexes = []
+
+        # Indexes of blocking facts and facts of rule instances
+        self.rule_blocks = {}
+        self.rule_instances = {}
+
+        # Bases of activations on the agenda, None if agenda
+        # is not taken
+        self.activations = None
+
+
+
+def snapshot_env(env_provider, rule_names=None, with_agenda=False):
+    """ Takes snapshot of the environment, from which its copy
+        can be built
+
+    Parameters
+    ----------
+    env_provider : EnvProvider
+        Environment to copy, it is not changed
+    rule_names : list
+        Names of rules to copy, all rules are copied if not given
+    with_agenda : bool
+        If True, activations on the agenda are taken too, so the
+        environment can be restored from the snapshot
+
+    Details
+    -------
+    Snapshot only collects strings of the environment (facts are
+    saved by CLIPS save-facts), nothing is built or parsed, so the
+    environment is held for short time.
+
+    Returns
+    -------
+    ForkSnapshot
+        Snapshot of the environment
+    """
+
+    snapshot = ForkSnapshot(env_provider.__class__)
+    snapshot.custom_bridges = [
+        bridge for bridge in env_provider.bridges.values() \
+        if not isinstance(bridge, SYSTEM_BRIDGES)
+    ]
+
+    for dp in env_provider.data_providers:
+        if dp.model_id.startswith(SYSTEM_PREFIX):
+            continue
+        clips_template = dp.clips_template
+        if clips_template == None:
+            clips_template = dp.generate_clips_template()
+        snapshot.data_providers.append((dp.dsd_string, dp.model_id,
+                                        dp.fingerprint, clips_template))
+
+    for rule in env_provider.env.rules():
+        if rule.name.startswith(SYSTEM_PREFIX):
+            continue
+        if rule_names != None and not rule.name in rule_names:
+            continue
+        entry = env_provider.rule_dependencies.lookup(rule.name)
+        if entry == None:
+            snapshot.rules.append((rule.name, str(rule), None))
+        else:
+            snapshot.rules.append((rule.name,
+                                   entry.cache_entry.clips_code, entry))
+
+    snapshot.fact_indexes = [fact.index for fact in env_provider.env.facts()]
+    if len(snapshot.fact_indexes) > 0:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            facts_path = os.path.join(temp_dir, "facts.clp")
+            env_provider.env.save_facts(facts_path)
+            with open(facts_path, "r") as facts_file:
+                snapshot.facts = facts_file.read()
+
+    for rule_name, fact in env_provider.rule_blocks.items():
+        if fact.exists:
+            snapshot.rule_blocks[rule_name] = fact.index
+    for rule_name, instances in env_provider.rule_instances.items():
+        snapshot.rule_instances[rule_name] = {
+            instance_id: fact.index \
+            for instance_id, fact in instances.items() if fact.exists
+        }
+
+    if with_agenda:
+        snapshot.activations = [
+            activation_basis(activation) \
+            for activation in env_provider.env.activations() \
+            if rule_names == None or activation.name in rule_names
+        ]
+    return snapshot
+
+
+
+def build_fork(snapshot):
+    """ Builds new environment from snapshot
+
+    Parameters
+    ----------
+    snapshot : ForkSnapshot
+        Snapshot taken by snapshot_env
+
+    Details
+    -------
+    1. New environment is created with the same custom bridges.
+    2. Data providers are restored without parsing their DSDs (as
+       from ruleset bundle) and their templates are defined.
+    3. Rules are built from their CLIPS code, and registered for DSD
+       updates if the original ones are.
+    4. Facts are loaded by CLIPS load-facts, in the same order.
+
+    Returns
+    -------
+    EnvProvider
+        Built environment
+    dict
+        Pairs 'index of original fact: fact of the fork'
+    """
+
+    fork = snapshot.env_class(snapshot.custom_bridges)
+
+    for dsd_string, model_id, fingerprint, clips_template \
+    in snapshot.data_providers:
+        data_provider = DataProvider(fork)
+        data_provider.restore(dsd_string, model_id,
+                              fingerprint, clips_template)
+        fork.schema_registry.add(data_provider)
+        fork.data_providers.append(data_provider)
+        fork.define_template(clips_template)
+    fork.refresh_data_proviers_in_bridges()
+
+    for rule_name, clips_code, entry in snapshot.rules:
+        fork.env.build(clips_code)
+        if entry != None:
+            fork.rule_dependencies.add(rule_name, entry.akashic_rule,
+                                       entry.cache_entry)
+
+    facts = load_facts(fork, snapshot)
+    fork.count_index.invalidate()
+
+    for rule_name, fact_index in snapshot.rule_blocks.items():
+        fork.rule_blocks[rule_name] = facts[fact_index]
+    for rule_name, instances in snapshot.rule_instances.items():
+        fork.rule_instances[rule_name] = {
+            instance_id: facts[fact_index] \
+            for instance_id, fact_index in instances.items()
+        }
+    return fork, facts
+
+
+
+def fork_env(env_provider):
+    """ Creates copy of the environment with its DSDs, rules, facts
+        and agenda
+
+    Parameters
+    ----------
+    env_provider : EnvProvider
+        Environment to copy, it is not changed
+
+    Details
+    -------
+    Copy is built from snapshot of the environment. Activations which
+    are not on the agenda of the original environment (rules already
+    fired on them) are removed, so the copy fires exactly the rules
+    the original would.
+
+    Returns
+    -------
+    EnvProvider
+        Independent environment, changes of the copy do not
+        affect the original and vice versa
+    """
+
+    fork, facts = build_fork(snapshot_env(env_provider))
+    copy_agenda(env_provider, fork, facts)
+    return fork
+
+
+
+def restore_env(snapshot):
+    """ Builds environment from snapshot taken with agenda
+
+    Details
+    -------
+    Used to restore the environment after failed change, so
+    the restored one fires exactly the rules the original would
+    before the change.
+
+    Parameters
+    ----------
+    snapshot : ForkSnapshot
+        Snapshot taken by snapshot_env with agenda
+
+    Returns
+    -------
+    EnvProvider
+        Restored environment
+    """
+
+    fork, facts = build_fork(snapshot)
+
+    new_indexes = {str(old_index): str(fact.index) \
+                   for old_index, fact in facts.items()}
+    expected = Counter([replace_fact_indexes(basis, new_indexes) \
+                        for basis in snapshot.activations])
+    for activation in list(fork.env.activations()):
+        basis = activation_basis(activation)
+        if expected[basis] > 0:
+            expected[basis] -= 1
+        else:
+            delete_activation(activation)
+    return fork
+
+
+
+def load_facts(fork, snapshot):
+    """ Loads facts of the snapshot into the fork, in the same order
+
+    Returns
+    -------
+    dict
+        Pairs 'index of original fact: fact of the fork'
+    """
+
+    if len(snapshot.fact_indexes) < 1:
+        return {}
+
+    known = set([fact.index for fact in fork.env.facts()])
+    fork.env.load_facts(snapshot.facts)
+
+    new_facts = [fact for fact in fork.env.facts() \
+                 if not fact.index in known]
+    return {old_index: new for old_index, new \
+            in zip(snapshot.fact_indexes, new_facts)}
+
+
+
+def copy_agenda(env_provider, fork, facts):
+    """ Removes activations of the fork which original does not have
+
+    Details
+    -------
+    Fork has activation for every match of its rules. Rules which
+    have the same number of activations in the original (none of
+    them fired) or none (all of them fired) are handled as a whole,
+    because listing of activations is slow. Only activations of rules
+    which fired some of them are compared one by one.
+    """
+
+    complete = []
+    partial = []
+    is_changed = False
+    for rule in fork.env.rules():
+        fork_count = rule.matches()[2]
+        count = env_provider.env.find_rule(rule.name).matches()[2]
+        if fork_count > 0 and count == fork_count:
+            complete.append(rule)
+        elif fork_count > 0:
+            is_changed = True
+            if count > 0:
+                partial.append(rule)
+
+    if not is_changed:
+        return 0
+
+    # Refresh places all activations of the rule on the agenda again
+    delete_all_activations(fork)
+    for rule in partial:
+        rule.refresh()
+
+    if len(partial) > 0:
+        new_indexes = {str(old_index): str(fact.index) \
+                       for old_index, fact in facts.items()}
+        rule_names = set([rule.name for rule in partial])
+        expected = Counter([activation_basis(activation, new_indexes) \
+                            for activation in env_provider.env.activations() \
+                            if activation.name in rule_names])
+        for activation in list(fork.env.activations()):
+            basis = activation_basis(activation)
+            if expected[basis] > 0:
+                expected[basis] -= 1
+            else:
+                delete_activation(activation)
+
+    for rule in complete:
+        rule.refresh()
+    return 0
+
+
+
+def delete_all_activations(env_provider):
+    # Agenda.delete_activations of clipspy calls CLIPS library with
+    # wrong arguments, so the library is called directly
+    lib.DeleteAllActivations(lib.GetCurrentModule(env_provider.env._env))
+
+
+
+def delete_activation(activation):
+    # Activation.delete of clipspy lists the whole agenda first
+    lib.DeleteActivation(activation._act)
+
+
+
+def activation_basis(activation, indexes=None):
+    # Rule name and fact references, without salience, fact
+    # indexes are replaced by given ones
+    basis = str(activation).split(" ", 1)[1]
+    if indexes == None:
+        return basis
+    return replace_fact_indexes(basis, indexes)
+
+
+
+def replace_fact_indexes(basis, indexes):
+    return FACT_REF.sub(
+        lambda m: "f-" + indexes.get(m.group(1), m.group(1)), basis)
@@ -0,0 +1,208 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+from akashic.env_provider import EnvProvider
+from akashic.env_fork import restore_env
+
+from akashic.exceptions import AkashicError, ErrType
+
+
+class EnvPool(object):
+    """ EnvPool class
+
+    We use this class to hold a number of identically configured
+    environments (EnvProvider objects). Request checks out single
+    environment, so requests which only read rules and DSDs (like
+    running the engine) run concurrently, each on its own environment.
+    CLIPS releases the GIL while it runs, so threads are enough.
+    Changes of rules and DSDs are broadcast to all environments.
+
+    Facts are not shared: every environment holds facts created by
+    runs done on it, so facts of two environments can differ.
+    """
+
+    def __init__(self, size=1, custom_bridges=[]):
+        """ EnvPool constructor method
+
+        Parameters
+        ----------
+        size : int
+            Number of environments in the pool
+        custom_bridges : list
+            Bridges imported into every environment
+
+        Raises
+        ------
+        AkashicError
+            If size of the pool is less than 1
+        """
+
+        if size < 1:
+            message = "Size of environment pool must be at least 1, " \
+                      "but {0} is given.".format(size)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        self.size = size
+        self.custom_bridges = custom_bridges
+        self.env_providers = []
+        self.idle = queue.Queue()
+
+        # Broadcast waits for all environments to be checked in,
+        # only one broadcast can wait at a time
+        self.broadcast_lock = threading.Lock()
+
+        self.reset()
+
+
+
+    def reset(self):
+        """ Replaces all environments with new, empty ones
+
+        Details
+        -------
+        Waits for all checked out environments to be checked in.
+        """
+
+        with self.broadcast_lock:
+            for i in range(0, len(self.env_providers)):
+                self.idle.get()
+
+            self.env_providers = [EnvProvider(self.custom_bridges) \
+                                  for i in range(0, self.size)]
+            for env_provider in self.env_providers:
+                self.idle.put(env_provider)
+        return 0
+
+
+
+    def checkout(self, timeout=None):
+        """ Takes environment out of the pool
+
+        Details
+        -------
+        Blocks until some environment is checked in, if all of them
+        are checked out. Environment must not be changed by anything
+        but broadcast, except if changes are reverted before checkin.
+
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for environment, waits forever if not given
+
+        Returns
+        -------
+        EnvProvider
+            Environment for exclusive use until it is checked in
+
+        Raises
+        ------
+        AkashicError
+            If no environment is checked in before timeout
+        """
+
+        try:
+            return self.idle.get(timeout=timeout)
+        except queue.Empty:
+            message = "No environment became available in {0} seconds." \
+                      .format(timeout)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+
+
+    def checkin(self, env_provider):
+        """ Returns checked out environment to the pool
+        """
+
+        self.idle.put(env_provider)
+        return 0
+
+
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """ Checks out environment for the body of with statement
+
+        Details
+        -------
+        Usage:
+            with env_pool.acquire() as env_provider:
+                env_provider.run()
+        """
+
+        env_provider = self.checkout(timeout)
+        try:
+            yield env_provider
+        finally:
+            self.checkin(env_provider)
+
+
+
+    def broadcast(self, change):
+        """ Applies change to every environment of the pool
+
+        Details
+        -------
+        Waits for all checked out environments to be checked in, so no
+        request sees environments in different states. Change is first
+        applied to single environment, which validates it, and then to
+        others. Snapshot of every environment is taken before it is
+        changed; if change fails on any environment, all environments
+        changed so far are restored from their snapshots (with their
+        facts and agenda), so the pool is left as it was. Must not be
+        called while environment is checked out by the same thread,
+        because it would wait forever.
+
+        Parameters
+        ----------
+        change : function
+            Function which takes EnvProvider and changes it
+
+        Returns
+        -------
+        object
+            Result of the change applied to the first environment
+
+        Raises
+        ------
+        AkashicError
+            Error raised by the change
+        """
+
+        with self.broadcast_lock:
+            env_providers = [self.idle.get() \
+                             for i in range(0, self.size)]
+            snapshots = []
+            try:
+                results = []
+                for env_provider in env_providers:
+                    snapshots.append(env_provider.snapshot(with_agenda=True))
+                    results.append(change(env_provider))
+                return results[0]
+            except:
+                self.restore(env_providers, snapshots)
+                raise
+            finally:
+                for env_provider in env_providers:
+                    self.idle.put(env_provider)
+
+
+
+    def restore(self, env_providers, snapshots):
+        """ Replaces environments by ones built from their snapshots
+
+        Parameters
+        ----------
+        env_providers : list
+            Checked out environments, restored ones are replaced
+            in place
+        snapshots : list
+            Snapshots of the first environments, in the same order
+        """
+
+        for i, snapshot in enumerate(snapshots):
+            restored = restore_env(snapshot)
+            self.env_providers[
+                self.env_providers.index(env_providers[i])] = restored
+            env_providers[i] = restored
+        return 0
@@ -1,22 +1,39 @@
 
+import hashlib
+
 import clips
 from clips.agenda import Agenda
 from clips.error import CLIPSError
 
 from akashic.ads.data_provider import DataProvider
-from akashic.arules.transpiler import Transpiler
+from akashic.ads.schema_registry import SchemaRegistry
+from akashic.arules.transpiler import Transpiler, CODEGEN_VERSION
+from akashic.arules.batch_transpilation import EnvSnapshot
+from akashic.arules.rule_dependency_table import RuleDependencyTable, \
+                                                 RuleDependencyEntry
+from akashic.arules.transpilation_cache import TRANSPILATION_CACHE, \
+                                               rule_hash
+from akashic.arules.count_index import CountIndex
+from akashic.arules.key_index import KeyIndex
 
 from akashic.system.dsds.rule_to_block import RULE_TO_BLOCK
 from akashic.system.dsds.rule_to_remove import RULE_TO_REMOVE
-from akashic.system.dsds.assistance_on import ASSISTANCE_ON
+from akashic.system.dsds.rule_parameters import rule_parameters_dsd, \
+                                                rule_parameters_model_id, \
+                                                INSTANCE_ID_FIELD
 from akashic.system.rules.remove_rule import REMOVE_RULE
 
+from akashic.ruleset_bundle import export_bundle, import_bundle
+from akashic.env_fork import fork_env, snapshot_env
+
 from akashic.bridges.data_bridge import DataBridge
 from akashic.bridges.time_bridge import TimeBridge
 
 from akashic.meta_models.dsd import DSD_META_MODEL
 from akashic.meta_models.rule import RULE_META_MODEL
 
+from akashic.util.type_converter import py_to_clips_type
+
 from akashic.exceptions import AkashicError, ErrType
 
 
@@ -37,22 +54,44 @@ class EnvProvider(object):
         # Define holders for data_providers, bridges, functions, 
         # built-it funcs, return func data
         self.data_providers = []
+        self.schema_registry = SchemaRegistry()
         self.bridges = {}
         self.functions = {}
         self.built_in_functions = ["not", "count", "str"]
         self.return_data = []
+        self.bridge_signature = None
+
+        # Control facts of blocked rules, by rule name
+        self.rule_blocks = {}
+
+        # Parameter facts of rule template instances, by rule name
+        # and instance id
+        self.rule_instances = {}
+
+        # Sources and dependencies of live rules, used to recompile
+        # rules when DSD they depend on is changed
+        self.rule_dependencies = RuleDependencyTable()
        
         # Create new empty CLIPS environment
         self.env = clips.Environment()
+
+        # Facts by primary key and counters of count() aggregates,
+        # maintained on fact changes
+        self.key_index = KeyIndex(self.env)
+        self.count_index = CountIndex(self.env, self.key_index)
+        self.count_index.define_functions()
         
 
-        # Prepare DSD meta-model and fill RULE meta model
+        # Prepare DSD and RULE meta-models, rule grammar does not
+        # depend on bridges, so it is shared by all environments
         self.dsd_mm = DSD_META_MODEL
-        mm_fill = self.import_custom_bridges(custom_bridges)
-        self.rule_mm = self.fill_rule_meta_model(*mm_fill)
+        self.rule_mm = RULE_META_MODEL
+        self.import_custom_bridges(custom_bridges)
 
         # Build system data providers and define it's tempaltes
         self.data_providers = self.build_system_data_providers()
+        for dp in self.data_providers:
+            self.schema_registry.add(dp)
         self.define_templates_of_dsds(self.data_providers)
 
         # Insert system bridges
@@ -63,6 +102,37 @@ class EnvProvider(object):
         
 
 
+    def get_bridge_signature(self):
+        """ Returns signature of bridge functions and rule meta-model
+
+        Details
+        -------
+        Transpiled rules depend on names, number of arguments and
+        return types of bridge functions, on the rule grammar and
+        on the version of transpiler code generation.
+        Signature is built lazily and reset on every bridge import.
+
+        Returns
+        -------
+        str
+            Hex digest of sha256 hash
+        """
+
+        if self.bridge_signature == None:
+            signature_parts = [self.rule_mm,
+                               "codegen/" + str(CODEGEN_VERSION)]
+            for name in sorted(self.functions.keys()):
+                signature_parts.append("{0}/{1}/{2}".format(
+                    name,
+                    self.functions[name]["num_of_args"],
+                    self.functions[name]["return_type"]
+                ))
+            self.bridge_signature = hashlib.sha256(
+                "\n".join(signature_parts).encode('utf-8')).hexdigest()
+        return self.bridge_signature
+
+
+
     def get_return_data(self):
         return self.return_data
 
@@ -79,6 +149,7 @@ class EnvProvider(object):
         # Init default brigdes functions
         self.import_bridge(data_bridge)
         self.import_bridge(time_bridge)
+        data_bridge.define_functions()
 
     
 
@@ -89,14 +160,13 @@ class EnvProvider(object):
 
 
     def insert_data_provider(self, data_provider):
-        # Check if model_id is unique
-        for dp in self.data_providers:
-            if dp.dsd.model_id == data_provider.dsd.model_id:
-                message = "Data provider with model id '{0}' " \
-                          "already exists. Please change data " \
-                          "provider model id and try again." \
-                          .format(data_provider.dsd.model_id)
-                raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        # Register data provider, if model_id is unique
+        if not self.schema_registry.add(data_provider):
+            message = "Data provider with model id '{0}' " \
+                      "already exists. Please change data " \
+                      "provider model id and try again." \
+                      .format(data_provider.dsd.model_id)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
 
         # Add to the list
         self.data_providers.append(data_provider)
@@ -107,11 +177,7 @@ class EnvProvider(object):
 
 
     def remove_data_provider(self, dsd_model_id):
-        to_remove = None
-        for dp in self.data_providers:
-            if dp.dsd.model_id == dsd_model_id:
-                to_remove = dp
-        
+        to_remove = self.schema_registry.remove(dsd_model_id)
         if to_remove == None:
             message = "Data provider with model id '{0}' " \
                       "cannot be found. Therefore it cannot " \
@@ -131,6 +197,275 @@ class EnvProvider(object):
                       "related to that model, then try again." \
                       .format(dsd_model_id)
             raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        self.count_index.remove_template(dsd_model_id)
+
+
+    def update_data_provider(self, old_model_id, data_provider):
+        """ Replaces data provider and recompiles rules which depend on it
+
+        Parameters
+        ----------
+        old_model_id : str
+            Model id of data provider which is replaced
+        data_provider : DataProvider
+            Loaded and set up data provider with changed DSD
+
+        Details
+        -------
+        1. Finds live rules which reference the old model. Rules which
+           do not reference it are not touched.
+        2. Rules which depend on changed fields (or on the whole
+           changed model) are transpiled against the new DSD, inside
+           of environment snapshot, so CLIPS environment and all its
+           rules stay live meanwhile. Other dependent rules keep
+           their CLIPS code.
+        3. Only if all rules are transpiled, dependent rules and
+           templates are swapped. CLIPS requires that template is not
+           used by any rule when it is redefined. If any step of the
+           swap fails, previous templates and rules are restored.
+
+        Returns
+        -------
+        list
+            RuleDependencyEntry objects of dependent rules after update
+
+        Raises
+        ------
+        AkashicError
+            If dependent rule cannot be transpiled against the new DSD,
+            or if templates and rules cannot be swapped
+        """
+
+        old_data_provider = self.schema_registry.lookup(old_model_id)
+        if old_data_provider == None:
+            message = "Data provider with model id '{0}' " \
+                      "cannot be found. Therefore it cannot " \
+                      "be updated." \
+                      .format(old_model_id)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        new_model_id = data_provider.model_id
+        if new_model_id != old_model_id and \
+        self.schema_registry.lookup(new_model_id) != None:
+            message = "Data provider with model id '{0}' " \
+                      "already exists. Please change data " \
+                      "provider model id and try again." \
+                      .format(new_model_id)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        # Rules could be removed by the engine itself (remove rule
+        # control fact), so their entries are dropped here
+        old_entries = []
+        for entry in self.rule_dependencies.dependent_rules(old_model_id):
+            if self.has_rule(entry.rule_name):
+                old_entries.append(entry)
+            else:
+                self.rule_dependencies.remove(entry.rule_name)
+
+        to_recompile = [entry for entry in old_entries \
+                        if entry.needs_recompile(old_model_id,
+                                                 old_data_provider,
+                                                 data_provider)]
+        compiled = {}
+        if len(to_recompile) > 0:
+            env_snapshot = EnvSnapshot(self)
+            env_snapshot.replace_dsd(old_model_id, data_provider.dsd_string)
+            transpiler = Transpiler(env_snapshot.activate(),
+                                    debug=False, use_cache=False)
+            results = transpiler.compile_many(
+                [entry.akashic_rule for entry in to_recompile])
+
+            errors = []
+            for entry, result in zip(to_recompile, results):
+                if result.error != None:
+                    errors.append("'{0}': {1}".format(entry.rule_name,
+                                                      str(result.error)))
+                else:
+                    compiled[entry.rule_name] = result.cache_entry
+
+            if len(errors) > 0:
+                message = "DSD with model id '{0}' cannot be updated, " \
+                          "because rules which depend on it cannot be " \
+                          "transpiled against the new DSD. {1}" \
+                          .format(old_model_id, " ".join(errors))
+                raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+
+        new_entries = []
+        for entry in old_entries:
+            if entry.rule_name in compiled:
+                cache_entry = compiled[entry.rule_name]
+            else:
+                cache_entry = entry.rebased(old_model_id,
+                                            data_provider.fingerprint)
+            new_entries.append(RuleDependencyEntry(
+                entry.rule_name, entry.akashic_rule, cache_entry))
+
+        self.swap_dependent_rules(old_data_provider, old_entries,
+                                  data_provider, new_entries)
+
+        for entry in new_entries:
+            TRANSPILATION_CACHE.store(rule_hash(entry.akashic_rule),
+                                      entry.cache_entry)
+
+        # Counters reference fields of the old template
+        self.count_index.remove_template(old_model_id)
+        return new_entries
+
+
+
+    def swap_dependent_rules(self, old_data_provider, old_entries,
+                             new_data_provider, new_entries):
+        """ Swaps data provider together with rules which depend on it
+
+        Raises
+        ------
+        AkashicError
+            If swap fails, after previous state is restored
+        """
+
+        old_model_id = old_data_provider.model_id
+        removed = []
+        try:
+            for entry in old_entries:
+                self.remove_rule(entry.rule_name, keep_instances=True)
+                removed.append(entry)
+            self.remove_data_provider(old_model_id)
+        except AkashicError as e:
+            self.restore_data_provider(old_data_provider)
+            self.insert_rule_entries(removed)
+            raise e
+
+        inserted = []
+        try:
+            self.insert_data_provider(new_data_provider)
+            for entry in new_entries:
+                self.insert_rule(entry.rule_name,
+                                 entry.cache_entry.clips_code,
+                                 entry.akashic_rule,
+                                 entry.cache_entry)
+                inserted.append(entry)
+        except AkashicError as e:
+            for entry in inserted:
+                self.remove_rule(entry.rule_name)
+            new_model_id = new_data_provider.model_id
+            if self.schema_registry.lookup(new_model_id) \
+            is new_data_provider:
+                self.remove_data_provider(new_model_id)
+            self.restore_data_provider(old_data_provider)
+            self.insert_rule_entries(old_entries)
+            raise e
+
+
+
+    def restore_data_provider(self, data_provider):
+        # Template is still defined if it could not be undefined
+        model_id = data_provider.model_id
+        if self.schema_registry.lookup(model_id) != None:
+            return
+        self.schema_registry.add(data_provider)
+        self.data_providers.append(data_provider)
+        try:
+            self.env.find_template(model_id)
+        except LookupError:
+            self.define_templates_of_dsds([data_provider])
+        self.refresh_data_proviers_in_bridges()
+
+
+
+    def insert_rule_entries(self, entries):
+        for entry in entries:
+            self.insert_rule(entry.rule_name,
+                             entry.cache_entry.clips_code,
+                             entry.akashic_rule,
+                             entry.cache_entry)
+
+
+
+    def export_bundle(self, path, binary=False):
+        """ Writes DSDs and rules of the environment to ruleset bundle
+
+        Parameters
+        ----------
+        path : str
+            Path of bundle file
+        binary : bool
+            If True, CLIPS binary image is included in the bundle.
+            Environment which loads binary image cannot define or
+            remove rules and templates afterwards.
+        """
+
+        return export_bundle(self, path, binary)
+
+
+
+    def import_bundle(self, path):
+        """ Loads DSDs and rules from ruleset bundle
+
+        Details
+        -------
+        Environment must be fresh (without DSDs and rules) and it
+        must have the same bridges as the exporting environment.
+        No DSD is parsed and no rule is transpiled.
+
+        Parameters
+        ----------
+        path : str
+            Path of bundle file
+
+        Raises
+        ------
+        AkashicError
+            If bundle cannot be loaded into this environment
+        """
+
+        return import_bundle(self, path)
+
+
+
+    def fork(self):
+        """ Creates independent copy of the environment
+
+        Details
+        -------
+        Copy holds the same DSDs, rules, facts and agenda. It is used
+        to run assistance sessions and what-if runs, which would
+        otherwise change (and block) the live environment.
+
+        Returns
+        -------
+        EnvProvider
+            Copy of the environment
+        """
+
+        return fork_env(self)
+
+
+
+    def snapshot(self, rule_names=None, with_agenda=False):
+        """ Takes snapshot of the environment, from which its copy
+            is built by env_fork.build_fork
+
+        Details
+        -------
+        Snapshot is taken much faster than the copy is built, so
+        the environment can be released before the copy is built.
+
+        Parameters
+        ----------
+        rule_names : list
+            Names of rules to copy, all rules are copied if not given
+        with_agenda : bool
+            If True, activations on the agenda are taken too, so the
+            environment can be restored by env_fork.restore_env
+
+        Returns
+        -------
+        ForkSnapshot
+            Snapshot of the environment
+        """
+
+        return snapshot_env(self, rule_names, with_agenda)
+
 
 
     def build_system_data_providers(self):
@@ -143,18 +478,14 @@ class EnvProvider(object):
         rtr_data_provider.load(RULE_TO_REMOVE)
         rtr_data_provider.setup()
 
-        ao_data_provider = DataProvider(self)
-        ao_data_provider.load(ASSISTANCE_ON)
-        ao_data_provider.setup()
-
-        return [rtb_data_provider, rtr_data_provider, ao_data_provider]
+        return [rtb_data_provider, rtr_data_provider]
 
 
     
     def insert_system_rules(self):
         transpiler = Transpiler(self)
         transpiler.load(REMOVE_RULE)
-        self.insert_rule(transpiler.rule.rule_name, transpiler.tranpiled_rule)
+        self.insert_rule(transpiler.rule_name, transpiler.tranpiled_rule)
 
 
 
@@ -166,6 +497,27 @@ class EnvProvider(object):
 
 
     def import_bridge(self, bridge):
+        """ Imports bridge and defines its functions in CLIPS environment
+
+        Details
+        -------
+        Rule grammar parses every call 'name(args...)' generically and
+        transpiler resolves it against imported functions, so bridges
+        can be imported at any time. Rules loaded afterwards can
+        call new functions.
+
+        Parameters
+        ----------
+        bridge : object
+            Bridge object with 'exposed_functions' array
+
+        Raises
+        ------
+        AkashicError
+            If bridge or any of its functions is malformed, or already
+            defined
+        """
+
         if bridge.__class__.__name__ in self.bridges:
             message = "Bridge with class name '{0}' " \
                       "already exists." \
@@ -176,6 +528,7 @@ class EnvProvider(object):
             message = "Bridge with class name '{0}' is malformed. " \
                       "'exposed_functions' array is not found." \
                       .format(bridge.__class__.__name__)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
 
         for f in bridge.exposed_functions:
             if (not "function" in f) or (not "num_of_args" in f) or \
@@ -207,6 +560,9 @@ class EnvProvider(object):
             }
             self.bridges[bridge.__class__.__name__] = bridge
             self.env.define_function(f["function"])
+
+        # Bridge functions changed, rebuild signature when needed
+        self.bridge_signature = None
             
 
 
@@ -214,37 +570,8 @@ class EnvProvider(object):
         if custom_bridges == None:
             return 0
         for bridge in custom_bridges:
-            self.import_bridge(custom_bridge)
-
-        # Add bridge functions to the rules_meta_model 
-        # and build ad save meta model
-        zero_arg_fcs = []
-        one_arg_fcs = []
-        onep_arg_fcs = []
-        for bridge in custom_bridges:
-            for f in bridge.exposed_functions:
-                if f["num_of_args"] == 0:
-                    zero_arg_fcs.append("\t'" + f["function"].__name__ + "'")
-                elif f["num_of_args"] == 1:
-                    one_arg_fcs.append("\t'" + f["function"].__name__ + "'")
-                else:
-                    onep_arg_fcs.append("\t'" + f["function"].__name__ + "'")
-
-        return [zero_arg_fcs, one_arg_fcs, onep_arg_fcs]
-
-
-
-    def fill_rule_meta_model(self, zero_arg_fcs, one_arg_fcs, onep_arg_fcs):
-        zero = ""
-        one = ""
-        onep = ""
-        if zero_arg_fcs != []:
-            zero =  '|\n' + ' |\n'.join(zero_arg_fcs)
-        if one_arg_fcs != []:
-            one = '|\n' + ' |\n'.join(one_arg_fcs)
-        if onep_arg_fcs != []:
-            onep = '|\n' + ' |\n'.join(onep_arg_fcs)
-        return RULE_META_MODEL.format(zero, one, onep)
+            self.import_bridge(bridge)
+        return 0
 
 
 
@@ -291,20 +618,185 @@ class EnvProvider(object):
         -------
         CLIPS lib response
         """
-        return self.env.assert_string(fact)
+        return self.count_index.assert_fact(fact)
+
+
+
+
+    def insert_facts(self, model_id, records):
+        """ Inserts new CLIPS facts of single DSD model into the
+            environment from records of Python values
+
+        Details
+        -------
+        Values are mapped to slots by slot plan of the data provider
+        and facts are asserted through CLIPS template, which is much
+        faster than building and parsing CLIPS fact strings. STRING
+        values do not have to be quoted or escaped.
+
+        Parameters
+        ----------
+        model_id : str
+            Model id of inserted DSD
+        records : list
+            Dicts of pairs 'field name: value', one for every fact
+
+        Returns
+        -------
+        list
+            Inserted CLIPS facts, in order of records
+
+        Raises
+        ------
+        AkashicError
+            If DSD model is not inserted, or any of records does not
+            match its fields (no fact is inserted then)
+        """
+
+        data_provider = self.schema_registry.lookup(model_id)
+        if data_provider == None:
+            message = "DSD model with name '{0}' does not exist." \
+                      .format(model_id)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        slots_list = [data_provider.generate_fact_slots(record) \
+                      for record in records]
+        return self.count_index.assert_facts(model_id, slots_list)
+
+
+
+    def retract_fact(self, fact):
+        """ Retracts CLIPS fact from the environment
+
+        Parameters
+        ----------
+        fact : Fact
+            CLIPS fact
+        """
+
+        return self.count_index.retract_fact(fact)
+
+
+
+    def modify_fact(self, fact, **slots):
+        """ Modifies slots of CLIPS fact in the environment
+
+        Parameters
+        ----------
+        fact : TemplateFact
+            CLIPS fact, it keeps its index
+        slots : dict
+            Pairs 'slot name: new value'
+        """
+
+        return self.count_index.modify_fact(fact, slots)
+
+
+
+    def get_fact(self, model_id, primary_key):
+        """ Returns CLIPS fact of DSD model by value of its primary key
+
+        Details
+        -------
+        Facts are found in primary-key index of the model, which is
+        maintained on every change done through EnvProvider, so
+        lookup takes O(1). Returned fact can be changed by
+        modify_fact and retract_fact.
+
+        Parameters
+        ----------
+        model_id : str
+            Model id of inserted DSD
+        primary_key : object
+            Value of primary-key field
+
+        Returns
+        -------
+        TemplateFact
+            The most recently inserted fact with given primary key,
+            None if there is no such fact
+
+        Raises
+        ------
+        AkashicError
+            If DSD model is not inserted, or it does not have
+            primary-key field
+        """
+
+        data_provider = self.schema_registry.lookup(model_id)
+        if data_provider == None:
+            message = "DSD model with name '{0}' does not exist." \
+                      .format(model_id)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        key_field = data_provider.primary_key_field
+        if key_field == None:
+            message = "DSD model '{0}' does not have primary-key field." \
+                      .format(model_id)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        # Index cannot be used while facts are changed by other CLIPS code
+        scan = self.count_index.open_changes > 0 \
+               or model_id in self.count_index.changing_templates
+        return self.key_index.get_fact(model_id, key_field.field_name,
+                                       primary_key, scan)
+
+
+
+    def block_rule(self, rule_name):
+        """ Blocks rule from getting into the agenda
+
+        Details
+        -------
+        Guards of transpiled rules match rule name as literal constant,
+        so control fact affects only guard of the blocked rule.
+
+        Parameters
+        ----------
+        rule_name : str
+            CLIPS rule name
+        """
+
+        if rule_name in self.rule_blocks \
+        and self.rule_blocks[rule_name].exists:
+            return
+
+        self.rule_blocks[rule_name] = self.insert_fact(
+                "(__RuleToBlock (rule_name \"{0}\"))".format(rule_name))
+
+
+
+    def unblock_rule(self, rule_name):
+        """ Allows blocked rule to get into the agenda again
+
+        Parameters
+        ----------
+        rule_name : str
+            CLIPS rule name
+        """
+
+        if rule_name in self.rule_blocks \
+        and self.rule_blocks[rule_name].exists:
+            self.retract_fact(self.rule_blocks.pop(rule_name))
+        else:
+            self.rule_blocks.pop(rule_name, None)
+            # Rule may be blocked by other rule, not through this method
+            self.execute("(do-for-all-facts ((?rtb __RuleToBlock)) " \
+                         "(eq ?rtb:rule_name \"{0}\") (retract ?rtb))" \
+                         .format(rule_name))
 
 
     def check_rule_name(self, rule_name):
-        for rule in self.env.rules():
-            if rule.name == rule_name:
-                message = "Rule with name '{0}' already exists. " \
-                          "Please change rule name and try again." \
-                          .format(rule_name)
-                raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        if self.has_rule(rule_name):
+            message = "Rule with name '{0}' already exists. " \
+                      "Please change rule name and try again." \
+                      .format(rule_name)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
 
 
 
-    def insert_rule(self, rule_name, rule):
+    def insert_rule(self, rule_name, rule, akashic_rule=None,
+                    cache_entry=None):
         """ Inserts new CLIPS rule into the environment
         
         Parameters
@@ -313,26 +805,76 @@ class EnvProvider(object):
             CLIPS rule name
         rule : str
             CLIPS rule in string form
+        akashic_rule : str
+            Akashic rule the CLIPS rule is transpiled from
+        cache_entry : CacheEntry
+            Dependencies of transpiled rule
+
+        Details
+        -------
+        If Akashic rule is given, rule is recompiled when DSD it
+        depends on is updated. If its cache entry is not given (for
+        example rule stored without dependencies), or it is not valid
+        in this environment, Akashic rule is transpiled again and
+        the new CLIPS rule is inserted instead of given one. If rule
+        is a rule template, template of its parameter facts is
+        defined before the rule.
+
+        Returns
+        -------
+        CacheEntry
+            Cache entry of inserted rule, None if Akashic rule
+            is not given
         """
+
+        self.check_rule_name(rule_name)
+        if akashic_rule != None and (cache_entry == None or \
+        not TRANSPILATION_CACHE.is_valid(cache_entry, self)):
+            transpiler = Transpiler(self, debug=False)
+            transpiler.load(akashic_rule)
+            cache_entry = transpiler.cache_entry
+            rule = transpiler.tranpiled_rule
+
+        if cache_entry != None and len(cache_entry.parameters) > 0:
+            self.insert_parameter_provider(rule_name, cache_entry.parameters)
+
         try:
-            self.check_rule_name(rule_name)
             self.env.build(rule)
         except CLIPSError as ce:
             print(ce)
+            if len(self.rule_instances.get(rule_name, {})) < 1:
+                self.remove_parameter_provider(rule_name)
             message = "Error occured while adding rule '{0}', " \
                       "Rule with same name MAY be already present." \
                       .format(rule_name)
             raise AkashicError(message, 0, 0, ErrType.SYSTEM)
 
+        if akashic_rule != None:
+            self.rule_dependencies.add(rule_name, akashic_rule, cache_entry)
+        return cache_entry
+
+
+
+    def has_rule(self, rule_name):
+        try:
+            self.env.find_rule(rule_name)
+        except LookupError:
+            return False
+        return True
+
 
 
-    def remove_rule(self, rule_name):
+    def remove_rule(self, rule_name, keep_instances=False):
         """ Removes CLIPS rule from the environment
         
         Parameters
         ----------
         rule_name : str
             CLIPS rule name
+        keep_instances : bool
+            If True, instances of rule template are kept (rule is
+            going to be inserted again), otherwise they are removed
+            together with template of parameter facts
         """
 
         try:
@@ -351,17 +893,232 @@ class EnvProvider(object):
             raise AkashicError(message, 0, 0, ErrType.SYSTEM)
 
         rule.undefine()
+        self.rule_dependencies.remove(rule_name)
+
+        if not keep_instances:
+            self.remove_parameter_provider(rule_name)
+
+
+
+    def insert_parameter_provider(self, rule_name, parameters):
+        """ Defines template of parameter facts of rule template
+
+        Details
+        -------
+        Parameter DSD of the rule is registered as any other DSD.
+        If it is already registered with the same parameters (rule is
+        inserted again), it is kept together with existing instances.
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the rule template
+        parameters : list
+            Pairs [parameter name, type]
+        """
+
+        model_id = rule_parameters_model_id(rule_name)
+        dsd_string = rule_parameters_dsd(rule_name, parameters)
+
+        found_data_provider = self.schema_registry.lookup(model_id)
+        if found_data_provider != None:
+            if found_data_provider.dsd_string == dsd_string:
+                return 0
+            self.remove_parameter_provider(rule_name)
+
+        data_provider = DataProvider(self)
+        data_provider.load(dsd_string)
+        data_provider.setup()
+        self.insert_data_provider(data_provider)
+        return 0
+
+
+
+    def remove_parameter_provider(self, rule_name):
+        """ Removes instances of rule template and template
+            of its parameter facts, if rule is rule template
+        """
+
+        if self.schema_registry.lookup(
+            rule_parameters_model_id(rule_name)) == None:
+            return 0
+
+        self.remove_rule_instances(rule_name)
+        self.remove_data_provider(rule_parameters_model_id(rule_name))
+        return 0
+
+
+
+    def insert_rule_instances(self, rule_name, instances):
+        """ Instantiates rule template with given parameter values
+
+        Details
+        -------
+        Every instance is single parameter fact, so instances share
+        the rule and its pattern network. Instance with existing
+        instance id replaces the old one.
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the rule template
+        instances : list
+            Objects with 'instance_id' and value of every parameter
+
+        Raises
+        ------
+        AkashicError
+            If rule is not rule template, or any of instances does not
+            match its parameters (no instance is inserted then)
+        """
+
+        data_provider = self.get_parameter_provider(rule_name)
+
+        # The last of instances with the same instance id is inserted
+        instance_slots = {}
+        for instance in instances:
+            slots = self.build_instance_slots(data_provider, instance)
+            instance_slots.pop(slots[INSTANCE_ID_FIELD], None)
+            instance_slots[slots[INSTANCE_ID_FIELD]] = slots
+
+        facts = self.rule_instances.setdefault(rule_name, {})
+        for instance_id in instance_slots:
+            old_fact = facts.pop(instance_id, None)
+            if old_fact is not None and old_fact.exists:
+                self.retract_fact(old_fact)
+
+        new_facts = self.count_index.assert_facts(
+            data_provider.model_id, list(instance_slots.values()))
+        for instance_id, fact in zip(instance_slots, new_facts):
+            facts[instance_id] = fact
+        return 0
+
+
+
+    def remove_rule_instances(self, rule_name, instance_ids=None):
+        """ Removes instances of rule template
+
+        Parameters
+        ----------
+        rule_name : str
+            Name of the rule template
+        instance_ids : list
+            Ids of instances to remove, all instances are removed
+            if not given
+        """
+
+        facts = self.rule_instances.get(rule_name, {})
+        if instance_ids == None:
+            instance_ids = list(facts.keys())
+
+        for instance_id in instance_ids:
+            fact = facts.pop(instance_id, None)
+            if fact is not None and fact.exists:
+                self.retract_fact(fact)
+
+        if len(facts) < 1:
+            self.rule_instances.pop(rule_name, None)
+        return 0
+
+
+
+    def get_rule_instances(self, rule_name):
+        """ Returns instances of rule template
+
+        Returns
+        -------
+        list
+            Objects with 'instance_id' and value of every parameter
+        """
+
+        data_provider = self.get_parameter_provider(rule_name)
+
+        instances = []
+        for fact in self.rule_instances.get(rule_name, {}).values():
+            if not fact.exists:
+                continue
+            instance = {}
+            for field in data_provider.dsd.fields:
+                value = fact[field.field_name]
+                if field.type == "BOOLEAN":
+                    value = value == 1
+                instance[field.field_name] = value
+            instances.append(instance)
+        return instances
+
+
+
+    def get_parameter_provider(self, rule_name):
+        data_provider = self.schema_registry.lookup(
+                            rule_parameters_model_id(rule_name))
+        if data_provider == None:
+            message = "Rule with name '{0}' is not rule template, " \
+                      "or it is not inserted." \
+                      .format(rule_name)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        return data_provider
+
+
+
+    def build_instance_slots(self, data_provider, instance):
+        """ Builds slots of parameter fact of single rule
+            template instance
+
+        Returns
+        -------
+        dict
+            Pairs 'slot name: value' of the parameter fact
+
+        Raises
+        ------
+        AkashicError
+            If instance does not have value of right type for every
+            parameter, or it has unknown parameter
+        """
+
+        for field_name, field_type in data_provider.slot_plan:
+            if not field_name in instance:
+                message = "Value of parameter '{0}' is omitted " \
+                          "from the rule template instance." \
+                          .format(field_name)
+                raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+
+            value_type = py_to_clips_type(instance[field_name].__class__)
+            if value_type == "INTEGER" and field_type == "FLOAT":
+                value_type = "FLOAT"
+            if value_type != field_type:
+                message = "Type missmatch in parameter '{0}'. " \
+                          "Expected type '{1}'. Given type is '{2}'." \
+                          .format(field_name, field_type, value_type)
+                raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+
+        for name in instance:
+            if data_provider.field_lookup(name) == None:
+                message = "Rule template does not have " \
+                          "parameter '{0}'.".format(name)
+                raise AkashicError(message, 0, 0, ErrType.SEMANTIC)
+
+        return data_provider.generate_fact_slots(instance)
 
 
 
     def execute(self, clips_command):
-        self.env.eval(clips_command)
+        # Command can change any facts, counters are collected again
+        self.count_index.begin_changes()
+        try:
+            self.env.eval(clips_command)
+        finally:
+            self.count_index.end_changes()
     
 
 
     def run(self):
         #Clear data and query data of previous run
         self.return_data = []
+        self.count_index.reset()
+
+        # Changes queued by RHS which failed before it ended
+        self.bridges["DataBridge"].apply_changes()
 
         self.env.run()
 
@@ -385,4 +1142,20 @@ class EnvProvider(object):
         for f in self.env.facts():
             facts.append(str(f))
         return facts
+
+
+    def get_fact_counts(self):
+        """ Counts facts of every template in CLIPS environment
+
+        Returns
+        -------
+        dict
+            Pairs 'template_name: number of facts'
+        """
+
+        fact_counts = {}
+        for f in self.env.facts():
+            template_name = f.template.name
+            fact_counts[template_name] = fact_counts.get(template_name, 0) + 1
+        return fact_counts
             
\ No newline at end of file
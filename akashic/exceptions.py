@@ -18,6 +18,13 @@ class AkashicError(Exception):
         self.line = line
         self.col = col
         self.err_type = str(err_type)
+
+    def __reduce__(self):
+        # Rebuild from original arguments when sent to another process
+        err_type = ErrType[self.err_type] \
+                   if self.err_type in ErrType.__members__ else None
+        return (self.__class__,
+                (self.message, self.line, self.col, err_type))
        
     def __str__(self):
         if self.line and self.col:
@@ -28,4 +35,26 @@ class AkashicError(Exception):
                 self.message
             )
         else:
-            return super(AkashicError, self).__str__()
\ No newline at end of file
+            return super(AkashicError, self).__str__()
+
+
+class AkashicWarning(UserWarning):
+    def __init__(self, message, line=0, col=0):
+        super(AkashicWarning, self).__init__(message)
+        self.message = message
+        self.line = line
+        self.col = col
+
+    def __reduce__(self):
+        return (self.__class__, (self.message, self.line, self.col))
+
+    def __str__(self):
+        if self.line and self.col:
+            # gcc style warning format
+            return "{}:{}: warning: {}".format(
+                str(self.line),
+                str(self.col),
+                self.message
+            )
+        else:
+            return self.message
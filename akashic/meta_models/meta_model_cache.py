@@ -0,0 +1,167 @@
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+import threading
+
+import cloudpickle
+import textx
+from textx import metamodel_from_str
+
+
+class MetaModelCache(object):
+    """ MetaModelCache class
+
+    We use this class to keep textX meta-models compiled from grammar
+    text, so that each grammar is compiled only once per process.
+    Meta-models are keyed by the grammar text itself.
+
+    If cache directory is set, compiled meta-models are also persisted
+    on disk, so that cold start of new process (or gunicorn worker)
+    skips grammar compilation.
+    """
+
+    def __init__(self, cache_dir=None):
+        """ MetaModelCache constructor method
+
+        Init meta-model dictionary and lock which guards it.
+        """
+
+        self.cache_dir = cache_dir
+        self.meta_models = {}
+        self.lock = threading.Lock()
+
+
+
+    def set_cache_dir(self, cache_dir):
+        """ Sets directory used for on-disk persistence of meta-models
+
+        Parameters
+        ----------
+        cache_dir : str
+            Path to the directory, None turns off on-disk persistence
+        """
+
+        if cache_dir != None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+
+
+
+    def get(self, grammar, processors=None):
+        """ Returns meta-model compiled from given grammar
+
+        Parameters
+        ----------
+        grammar : str
+            textX grammar in string form
+        processors : dict
+            Object processors to register on newly compiled meta-model.
+            Processors are shared by all users of the meta-model,
+            therefore they must not hold any per-model state.
+
+        Returns
+        -------
+        object
+            Compiled (cached) textX meta-model
+        """
+
+        with self.lock:
+            meta_model = self.meta_models.get(grammar)
+            if meta_model == None:
+                meta_model = self.load_from_disk(grammar)
+                if meta_model == None:
+                    meta_model = metamodel_from_str(grammar, debug=False)
+                    self.save_to_disk(grammar, meta_model)
+
+                # Processors are registered after persistence,
+                # because they are not part of the compiled grammar
+                if processors:
+                    meta_model.register_obj_processors(processors)
+                self.meta_models[grammar] = meta_model
+            return meta_model
+
+
+
+    def clear(self):
+        """ Removes all compiled meta-models from the in-memory cache
+        """
+
+        with self.lock:
+            self.meta_models = {}
+
+
+
+    def disk_path(self, grammar):
+        """ Builds path of the on-disk cache entry for given grammar
+
+        Details
+        -------
+        Entry name depends on Python, textX and cloudpickle versions
+        too, because pickled meta-model cannot be used with different
+        version of any of them.
+        """
+
+        versions = ".".join([str(v) for v in sys.version_info[:3]]) + \
+                   "|" + textx.__version__ + "|" + cloudpickle.__version__
+        key = hashlib.sha256(
+            (versions + "|" + grammar).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + ".mm")
+
+
+
+    def load_from_disk(self, grammar):
+        """ Loads meta-model of given grammar from on-disk cache
+
+        Returns
+        -------
+        object
+            Loaded meta-model
+        None
+            If on-disk cache is turned off, entry is missing or broken
+        """
+
+        if self.cache_dir == None:
+            return None
+
+        path = self.disk_path(grammar)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, 'rb') as entry:
+                return pickle.load(entry)
+        except Exception as e:
+            print("Broken meta-model cache entry '{0}': {1}" \
+                  .format(path, str(e)))
+            return None
+
+
+
+    def save_to_disk(self, grammar, meta_model):
+        """ Saves meta-model of given grammar to on-disk cache
+
+        Details
+        -------
+        Entry is written to temporary file which is then renamed,
+        so that processes sharing cache directory never read
+        partially written entry.
+        """
+
+        if self.cache_dir == None:
+            return
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as entry:
+                entry.write(cloudpickle.dumps(meta_model))
+            os.replace(tmp_path, self.disk_path(grammar))
+        except Exception as e:
+            print("Meta-model cannot be saved to cache directory " \
+                  "'{0}': {1}".format(self.cache_dir, str(e)))
+
+
+
+# Process-wide meta-model cache
+META_MODEL_CACHE = MetaModelCache()
@@ -2,20 +2,37 @@ RULE_META_MODEL = \
 """
 
 Rule:
-    '{{'
+    '{'
         ((RULE_NAME_KW        ':' '"'  rule_name=ID  '"'            )
         (RULE_SALIENCE_KW     ':'      (salience=SYSTEM_SALIENCE_KW | 
                                         salience=INT)               )
         (RUN_ONCE_KW          ':'      run_once=BOOL                )?
+        (OPTIMIZE_LHS_KW      ':'      optimize_lhs=BOOL            )?
+        (PARAMETERS_KW        ':' '['  parameters*=RuleParameter[','] ']' )?
         (lhs=LHS                                                    )
         (rhs=RHS                                                    ))#[',']
-    '}}'
+    '}'
 ;
 
 RULE_NAME_KW:        /\"rule-name\"/ ;
 RULE_SALIENCE_KW:    /\"salience\"/ ;
 SYSTEM_SALIENCE_KW:  /\"system"/ ;
 RUN_ONCE_KW:         /\"run-once\"/ ;
+OPTIMIZE_LHS_KW:     /\"optimize-lhs\"/ ;
+PARAMETERS_KW:       /\"parameters\"/ ;
+
+// Parameters of rule template, every instance of the template
+// is a fact which holds values of parameters
+RuleParameter:
+    '{'
+        ((PARAMETER_NAME_KW   ':' '"'  name=ID              '"' )
+        (PARAMETER_TYPE_KW    ':' '"'  type=PARAMETER_TYPE  '"' ))#[',']
+    '}'
+;
+
+PARAMETER_NAME_KW:   /\"parameter-name\"/ ;
+PARAMETER_TYPE_KW:   /\"type\"/ ;
+PARAMETER_TYPE:      'INTEGER' | 'FLOAT' | 'STRING' | 'BOOLEAN' ;
 
 LHS:
     WHEN_KW ':' '['
@@ -35,39 +52,39 @@ LHSStatement:
 ;
 
 SYMBOLIC_VAR:
-    '{{' 
+    '{' 
         '"' var_name=/\?[^\d\W]\w*\\b/ '"' ':' 
         '"' expr=Root '"' 
-    '}}'
+    '}'
 ;
 
 BINDING_VAR:
-    '{{' 
+    '{' 
         '"' var_name=/\?[^\d\W]\w*\\b/ '=' '"' ':' 
         '"' expr=Root '"' 
-    '}}'
+    '}'
 ;
 
 FACT_ADDRESS_VAR:
-    '{{' 
+    '{' 
         '"' var_name=/\?[^\d\W]\w*\\b/ '<-' '"' ':' 
         '"' expr=SpecialSingularLogicExpression '"' 
-    '}}'
+    '}'
 ;
 
 ASSERTION:
-    '{{' ASSERT_KW ':'
+    '{' ASSERT_KW ':'
         '"' (expr=SpecialBinaryLogicExpression | 
              expr=TestSingularLogicExpression) '"' 
-    '}}'
+    '}'
 ;
 
 
 LHS_CLIPS_CODE:
-    '{{' 
+    '{' 
         CLIPS_KW ':' 
         clips_code=/(\")(.*)(\")/ 
-    '}}'
+    '}'
 ;
 
 
@@ -79,18 +96,14 @@ MUL_DIV:        '*'     | '/'  ;
 SQR:            '^' ;
 CMP:            '=='    | '!=' | '<=' | '>=' | '<' | '>'  ;
 LOGIC:          'and'   | 'or' ;
-NOT:            'not' ;
+NOT:            /not\\b/ ;
 
 EXISTS:         'exists' ;
 FORALL:         'forall' ;
 TEST:           'test' ;
 
-COUNT:          'count' ;
-STR:            'str' ;
-NOW:            'now' ;
-TIME_TO_STR:    'time_to_str' ;
-STR_TO_TIME:    'str_to_time' ;
-SUB_TIMES:      'sub_times' ;
+COUNT:          /count\\b/ ;
+STR:            /str\\b/ ;
 
 
 SPECIAL_SINGULAR: NOT | EXISTS | FORALL ;
@@ -116,37 +129,28 @@ Root:
     Function
 ;
 
-// Always from less specific to more specific
+// Built-in functions are matched before bridge functions.
+// Bridge functions are not listed in the grammar, their names,
+// number of arguments and return types are resolved by the
+// transpiler, so the grammar does not depend on bridges.
 Function:
-    OnePlusArgFunction |
     OneArgFunction |
-    ZeroArgFunction
+    BridgeFunction
 ;
 
-ZeroArgFuncNames: 
-    NOW {0}
-;
 OneArgFuncNames: 
     NOT | 
     COUNT | 
-    STR {1}
-;
-OnePlusArgFuncNames: 
-    TIME_TO_STR | 
-    STR_TO_TIME |
-    SUB_TIMES {2}
-;
-
-ZeroArgFunction:
-    func_name=ZeroArgFuncNames LPAR RPAR
+    STR
 ;
 OneArgFunction:
     (func_name=COUNT '(' template=ID ')') |
     (func_name=OneArgFuncNames args=Factor)
 ;
-OnePlusArgFunction:
-    func_name=OnePlusArgFuncNames LPAR args=Factor COMMA args=Factor RPAR
+BridgeFunction:
+    func_name=FUNC_NAME LPAR (RPAR | (args+=Factor[','] RPAR))
 ;
+FUNC_NAME: /[^\d\W]\w*\\b/ ;
 
 
 LogicExpression:
@@ -214,13 +218,13 @@ RHSStatement:
 
 
 CreateStatement:
-    '{{' 
-        CREATE_KW ':' '{{'
+    '{' 
+        CREATE_KW ':' '{'
             ((MODEL_ID_KW       ':' '"' model_id    = ID   '"'    )
             (REFLECT_ON_WEB     ':'     reflect     = BOOL        )
             ( DATA_KW           ':'     json_object = JSONObject  ))#[',']
-        '}}' 
-    '}}'
+        '}' 
+    '}'
 ;
 CREATE_KW:       /\"create\"/ ;
 MODEL_ID_KW:     /\"model-id\"/ ;
@@ -229,44 +233,44 @@ DATA_KW:         /\"data\"/ ;
 
 
 ReturnStatement:
-    '{{' 
-        RETURN_KW ':' '{{' 
+    '{' 
+        RETURN_KW ':' '{' 
             ((TAG_KW      ':'     tag          = STRING      )
             (DATA_KW      ':'     json_object  = JSONObject  ))#[',']
-        '}}' 
-    '}}'
+        '}' 
+    '}'
 ;
 RETURN_KW:    /\"return\"/ ;
 TAG_KW:       /\"tag\"/ ;
 
 
 UpdateStatement:
-    '{{' 
-        UPDATE_KW ':' '{{'
+    '{' 
+        UPDATE_KW ':' '{'
             ((MODEL_ID_KW       ':' '"' model_id     = ID   '"'    )
             (REFLECT_ON_WEB     ':'     reflect      = BOOL        )
             (DATA_KW            ':'     json_object  = JSONObject  ))#[',']
-        '}}' 
-    '}}'
+        '}' 
+    '}'
 ;
 UPDATE_KW:          /\"update\"/ ;
 FACT_ADDRESS_KW:    /\"fact-address\"/ ;
 
 
 DeleteStatement:
-    '{{' 
-        DELETE_KW ':' '{{'
+    '{' 
+        DELETE_KW ':' '{'
             ((MODEL_ID_KW       ':' '"' model_id    = ID   '"'    )
             (REFLECT_ON_WEB     ':'     reflect     = BOOL        )
             ( DATA_KW           ':'     json_object = JSONObject  ))#[',']
-        '}}'
-    '}}'
+        '}'
+    '}'
 ;
 DELETE_KW:  /\"delete\"/ ;
 
 
 JSONObject:
-    "{{" field_list*=FieldEntry[','] "}}"
+    "{" field_list*=FieldEntry[','] "}"
 ;
 FieldEntry:
     name=STRING ':' value=FieldValue
@@ -281,10 +285,10 @@ RHSValueLocator:
 RHS_VARIABLE: '"' var_name=/\?[^\d\W]\w*\\b/ '"';
 
 RHS_CLIPS_CODE:
-    '{{' 
+    '{' 
         CLIPS_KW ':' 
         clips_code=/(\")(.*)(\")/ 
-    '}}'
+    '}'
 ;
 
 
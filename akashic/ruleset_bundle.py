@@ -0,0 +1,221 @@
+import os
+import json
+import zipfile
+import tempfile
+
+from clips.error import CLIPSError
+
+from akashic.ads.data_provider import DataProvider
+from akashic.arules.transpilation_cache import TRANSPILATION_CACHE, \
+                                               CacheEntry, rule_hash
+from akashic.exceptions import AkashicError, AkashicWarning, ErrType
+
+
+# Version of bundle format, bundles of other versions are rejected
+BUNDLE_VERSION = 1
+
+# Members of bundle archive
+MANIFEST_NAME = "manifest.json"
+CONSTRUCTS_NAME = "constructs.clp"
+IMAGE_NAME = "image.bin"
+
+# Prefix of system DSD models and rules, which are created
+# by every environment and are not exported
+SYSTEM_PREFIX = "__"
+
+
+def export_bundle(env_provider, path, binary=False):
+    """ Writes DSDs and rules of the environment to ruleset bundle
+
+    Parameters
+    ----------
+    env_provider : EnvProvider
+        Environment to export
+    path : str
+        Path of bundle file
+    binary : bool
+        If True, CLIPS binary image of the environment is included
+
+    Details
+    -------
+    Bundle is zip archive which holds:
+    1. Manifest - bundle version, bridge signature, function table,
+       DSDs with their fingerprints and CLIPS templates, and rules
+       with their sources, hashes and dependencies.
+    2. CLIPS deftemplates and defrules, loaded with single CLIPS
+       load command.
+    3. Optionally CLIPS binary image (bsave), which is loaded even
+       faster, but CLIPS does not allow to define or remove any
+       construct while binary image is loaded.
+    """
+
+    data_providers = []
+    constructs = []
+    for dp in env_provider.data_providers:
+        if dp.model_id.startswith(SYSTEM_PREFIX):
+            continue
+        clips_template = dp.clips_template
+        if clips_template == None:
+            clips_template = dp.generate_clips_template()
+        data_providers.append({
+            "model-id": dp.model_id,
+            "dsd": dp.dsd_string,
+            "fingerprint": dp.fingerprint,
+            "clips-template": clips_template
+        })
+        constructs.append(clips_template)
+
+    rules = []
+    for rule in env_provider.env.rules():
+        if rule.name.startswith(SYSTEM_PREFIX):
+            continue
+        rule_entry = {"rule-name": rule.name, "clips-code": str(rule)}
+        entry = env_provider.rule_dependencies.lookup(rule.name)
+        if entry != None:
+            cache_entry = entry.cache_entry
+            rule_entry["clips-code"] = cache_entry.clips_code
+            rule_entry["rule"] = entry.akashic_rule
+            rule_entry["hash"] = rule_hash(entry.akashic_rule)
+            rule_entry["dependencies"] = cache_entry.dependencies
+            rule_entry["field-dependencies"] = \
+                cache_entry.field_dependencies
+            rule_entry["parameters"] = cache_entry.parameters
+            rule_entry["warnings"] = [[w.message, w.line, w.col] \
+                                      for w in cache_entry.warnings]
+        rules.append(rule_entry)
+        constructs.append(rule_entry["clips-code"])
+
+    functions = {}
+    for name, function in env_provider.functions.items():
+        functions[name] = {
+            "num_of_args": function["num_of_args"],
+            "return_type": function["return_type"]
+        }
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "bridge-signature": env_provider.get_bridge_signature(),
+        "functions": functions,
+        "data-providers": data_providers,
+        "rules": rules,
+        "binary": binary
+    }
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr(MANIFEST_NAME, json.dumps(manifest))
+        bundle.writestr(CONSTRUCTS_NAME, "\n\n".join(constructs))
+        if binary:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                image_path = os.path.join(temp_dir, IMAGE_NAME)
+                env_provider.env.save(image_path, binary=True)
+                bundle.write(image_path, IMAGE_NAME)
+    return 0
+
+
+
+def import_bundle(env_provider, path):
+    """ Loads DSDs and rules from ruleset bundle into the environment
+
+    Parameters
+    ----------
+    env_provider : EnvProvider
+        Fresh environment, without DSDs and rules
+    path : str
+        Path of bundle file
+
+    Details
+    -------
+    DSDs are not parsed, data providers are restored from the
+    manifest and parse their DSD when it is first needed. All
+    templates and rules are loaded into CLIPS by single load
+    (or bload, if bundle holds binary image). Rules and their
+    dependencies are registered for DSD updates and put into
+    transpilation cache.
+
+    Raises
+    ------
+    AkashicError
+        If bundle is not compatible with the environment, or if
+        environment already holds DSDs or rules
+    """
+
+    with zipfile.ZipFile(path, "r") as bundle:
+        manifest = json.loads(bundle.read(MANIFEST_NAME).decode('utf-8'))
+        if manifest.get("version") != BUNDLE_VERSION:
+            message = "Ruleset bundle version '{0}' is not supported. " \
+                      "Supported version is '{1}'." \
+                      .format(manifest.get("version"), BUNDLE_VERSION)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        if manifest["bridge-signature"] != \
+        env_provider.get_bridge_signature():
+            message = "Ruleset bundle was built with different bridge " \
+                      "functions or rule grammar. Please use the same " \
+                      "bridges, or build the bundle again."
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        for dp in env_provider.data_providers:
+            if not dp.model_id.startswith(SYSTEM_PREFIX):
+                message = "Ruleset bundle can be imported only into " \
+                          "environment without DSDs and rules."
+                raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        for rule in env_provider.env.rules():
+            if not rule.name.startswith(SYSTEM_PREFIX):
+                message = "Ruleset bundle can be imported only into " \
+                          "environment without DSDs and rules."
+                raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+        restored = []
+        for dp_entry in manifest["data-providers"]:
+            data_provider = DataProvider(env_provider)
+            data_provider.restore(dp_entry["dsd"],
+                                  dp_entry["model-id"],
+                                  dp_entry["fingerprint"],
+                                  dp_entry["clips-template"])
+            env_provider.schema_registry.add(data_provider)
+            env_provider.data_providers.append(data_provider)
+            restored.append(data_provider)
+
+        member_name = CONSTRUCTS_NAME
+        if manifest["binary"]:
+            member_name = IMAGE_NAME
+
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                member_path = bundle.extract(member_name, temp_dir)
+                env_provider.env.load(member_path,
+                                      binary=manifest["binary"])
+
+            # Patterns of loaded binary image are not initialized until
+            # reset, environment is fresh so no facts are lost
+            if manifest["binary"]:
+                env_provider.env.reset()
+                env_provider.count_index.invalidate()
+        except CLIPSError as ce:
+            print(ce)
+            for data_provider in restored:
+                env_provider.schema_registry.remove(data_provider.model_id)
+                env_provider.data_providers.remove(data_provider)
+            message = "Constructs of ruleset bundle cannot be loaded " \
+                      "into CLIPS environment."
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+
+    env_provider.refresh_data_proviers_in_bridges()
+
+    for rule_entry in manifest["rules"]:
+        if rule_entry.get("rule") == None:
+            continue
+        cache_entry = CacheEntry(
+            rule_entry["rule-name"],
+            rule_entry["clips-code"],
+            rule_entry["dependencies"],
+            manifest["bridge-signature"],
+            warnings=[AkashicWarning(*w) for w in rule_entry["warnings"]],
+            field_dependencies=rule_entry["field-dependencies"],
+            parameters=rule_entry.get("parameters")
+        )
+        env_provider.rule_dependencies.add(rule_entry["rule-name"],
+                                           rule_entry["rule"],
+                                           cache_entry)
+        TRANSPILATION_CACHE.store(rule_entry["hash"], cache_entry)
+    return 0
@@ -1,17 +0,0 @@
-
-ASSISTANCE_ON = \
-"""
-{
-    "data-source-definition-name": "__AssistanceOn",
-    "model-id": "__AssistanceOn",
-    "model-description": "System DSD that indicates to other rules taht process of assistance is running.",
-    "can-reflect-on-web": false,
-    "fields": [
-        {
-            "field-name": "id",
-            "type": "STRING",
-            "use-as": "primary-key"
-        }
-    ]
-}
-"""
\ No newline at end of file
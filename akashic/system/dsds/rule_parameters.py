@@ -0,0 +1,53 @@
+import json
+
+
+# Model id of parameter DSD of rule template, formatted with rule name
+RULE_PARAMETERS_MODEL_ID = "{0}_Parameters"
+
+# Field which identifies instance of rule template
+INSTANCE_ID_FIELD = "instance_id"
+
+
+def rule_parameters_model_id(rule_name):
+    return RULE_PARAMETERS_MODEL_ID.format(rule_name)
+
+
+
+def rule_parameters_dsd(rule_name, parameters):
+    """ Builds DSD of parameter facts of rule template
+
+    Parameters
+    ----------
+    rule_name : str
+        Name of the rule template
+    parameters : list
+        Pairs [parameter name, type] in order of their declaration
+
+    Returns
+    -------
+    str
+        DSD in string form, every fact of its template is one
+        instance of the rule template
+    """
+
+    model_id = rule_parameters_model_id(rule_name)
+    fields = [{
+        "field-name": INSTANCE_ID_FIELD,
+        "type": "STRING",
+        "use-as": "primary-key"
+    }]
+    for name, parameter_type in parameters:
+        fields.append({
+            "field-name": name,
+            "type": parameter_type,
+            "use-as": "data"
+        })
+
+    return json.dumps({
+        "data-source-definition-name": model_id,
+        "model-id": model_id,
+        "model-description": "Parameters of instances of rule " \
+                             "template '{0}'.".format(rule_name),
+        "can-reflect-on-web": False,
+        "fields": fields
+    }, indent=4)
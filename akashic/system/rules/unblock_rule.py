@@ -5,7 +5,7 @@ UNBLOCK_RULE = \
     "salience": "system",
     "run-once": true,
     "when": [
-        {{ "clips": "?rtb <- (__RuleToBlock (rule_name ?rn&: (= (str-compare ?rn {1}) 0) ))" }}
+        {{ "clips": "?rtb <- (__RuleToBlock (rule_name {1}))" }}
     ],
     "then": [
         {{ "clips": "(retract ?rtb)" }}
@@ -13,6 +13,10 @@ def to_clips_quotes(s):
     return s.replace("'", '"')
 
 
+def to_clips_string(s):
+    return '"' + s.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
 def add_quotes_if_str(value, value_type):
     if value_type == "STRING":
         return '"' + str(value) + '"'
@@ -1,4 +1,3 @@
-import hashlib
 from enum import Enum
 from datetime import datetime
 
@@ -11,8 +10,14 @@ from pymongo.errors import DuplicateKeyError
 from pymongo import ReturnDocument
 
 from akashic.arules.transpiler import Transpiler
+from akashic.arules.transpilation_cache import TRANSPILATION_CACHE, \
+                                               CacheEntry, rule_hash
 from akashic.ads.data_provider import DataProvider
-from akashic.env_provider import EnvProvider
+from akashic.env_pool import EnvPool
+from akashic.env_fork import build_fork
+from akashic.system.dsds.rule_parameters import rule_parameters_dsd, \
+                                                INSTANCE_ID_FIELD
+from akashic.meta_models.meta_model_cache import META_MODEL_CACHE
 
 from akashic.exceptions import AkashicError, ErrType
 
@@ -27,16 +32,25 @@ class RespType(Enum):
 
 
 
-def webapi_factory(mongo_uri, custom_bridges=[]):
+def webapi_factory(mongo_uri, custom_bridges=[], meta_model_cache_dir=None,
+                   pool_size=1):
     custom_bridges = custom_bridges
 
+    # Persist compiled DSD and RULE meta-models, so that next
+    # process start skips grammar compilation
+    if meta_model_cache_dir != None:
+        META_MODEL_CACHE.set_cache_dir(meta_model_cache_dir)
+
     app = Flask(__name__)
     CORS(app, resources={r"/*": {"origins": "*"}})
     app.config["MONGO_URI"] = mongo_uri
     mongo = PyMongo(app)
 
-    global env_provider
-    env_provider = EnvProvider(custom_bridges)
+    # Requests run on environments of the pool, changes of rules
+    # and DSDs are broadcast to all of them. Facts are not shared,
+    # and run-once rules are removed only where they fired, so
+    # requests which list facts or rules read single environment
+    env_pool = EnvPool(pool_size, custom_bridges)
     
     global all_templates_loaded
     global all_rules_loaded
@@ -44,7 +58,6 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     all_rules_loaded = False
 
     # Update ALL rule activity data to FALSE
-    rule_names = env_provider.get_rule_names()
     cursors = mongo.db.rules.find({})
     rules = list(cursors)
     for akashic_rule in rules: 
@@ -83,6 +96,71 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
         )
 
 
+
+    def with_warnings(message, transpiler):
+        if len(transpiler.warnings) > 0:
+            message += " Warnings: " + \
+                       " ".join([str(w) for w in transpiler.warnings])
+        return message
+
+
+
+    def cache_entry_of(rule_entry):
+        # Rebuild transpiled rule and its dependencies from db-entry
+        if not "dependencies" in rule_entry or \
+        not "bridge-signature" in rule_entry:
+            return None
+        return CacheEntry(
+            rule_entry["rule"]["rule-name"],
+            rule_entry["clips-code"],
+            rule_entry["dependencies"],
+            rule_entry["bridge-signature"],
+            field_dependencies=rule_entry.get("field-dependencies"),
+            parameters=rule_entry.get("parameters")
+        )
+
+
+
+    def check_instances(rule_entry, instances):
+        # Check instances against parameters of rule template,
+        # rule does not have to be inserted into env_provider
+        with env_pool.acquire() as env_provider:
+            data_provider = DataProvider(env_provider)
+            data_provider.load(rule_parameters_dsd(
+                rule_entry["rule-name"], rule_entry["parameters"]))
+            data_provider.setup()
+            for instance in instances:
+                env_provider.build_instance_slots(data_provider, instance)
+
+
+
+    def insert_instances(env_provider, rule_entry):
+        # Insert persisted instances of rule template
+        # into env_provider, after the rule itself is inserted
+        instances = rule_entry.get("instances", [])
+        if len(instances) > 0:
+            env_provider.insert_rule_instances(
+                rule_entry["rule"]["rule-name"], instances)
+
+
+
+    def insert_dsd(env_provider, akashic_dsd):
+        # Every environment gets its own data provider
+        data_provider = DataProvider(env_provider)
+        data_provider.load(dumps(akashic_dsd, indent=True))
+        data_provider.setup()
+        env_provider.insert_data_provider(data_provider)
+        return data_provider
+
+
+
+    def remove_rule_if_present(env_provider, rule_name):
+        try:
+            env_provider.remove_rule(rule_name)
+        except AkashicError as e:
+            pass
+
+
 ### DSDS SECTION
 #######################################################
 
@@ -109,11 +187,9 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
 
         # Create DSD provider -> syntactic and semnatic check
         # Add data_provider to env_provider
-        data_provider = DataProvider(env_provider)
         try:
-            data_provider.load(dumps(akashic_dsd, indent=True))
-            data_provider.setup()
-            env_provider.insert_data_provider(data_provider)
+            data_provider = env_pool.broadcast(
+                lambda env_provider: insert_dsd(env_provider, akashic_dsd))
         except AkashicError as e:
             return response(
                 akashic_dsd, e.message, e.line, e.col, RespType.ERROR)
@@ -146,43 +222,39 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
             message = "DSD with given model-id does not exists."
             return response(None, message, 0, 0, RespType.ERROR)
 
-        # Remove data provider from env_provider
-        try:
-            env_provider.remove_data_provider(old_model_id)
-        except AkashicError as e:
-            # First reinsert deleted DSD
+        def update_data_provider(env_provider):
+            # Create new DSD provider -> syntactic and semnatic check
             data_provider = DataProvider(env_provider)
-            try:
-                data_provider.load(dumps(foundDSD["dsd"], indent=True))
-                data_provider.setup()
-                env_provider.insert_data_provider(data_provider)
-            except AkashicError as e:
-                return response(
-                    foundDSD["dsd"], e.message, e.line, e.col, RespType.ERROR)
-            return response(
-                None, e.message, e.line, e.col, RespType.ERROR)
-
-        # Create new DSD provider -> syntactic and semnatic check
-        # Add data_provider to env_provider
-        data_provider = DataProvider(env_provider)
-        try:
             data_provider.load(dumps(akashic_dsd, indent=True))
             data_provider.setup()
-            env_provider.insert_data_provider(data_provider)
-        except AkashicError as e:
-            # Reinsert deleted DSD:
-            data_provider = DataProvider(env_provider)
-            try:
-                data_provider.load(dumps(foundDSD["dsd"], indent=True))
-                data_provider.setup()
-                env_provider.insert_data_provider(data_provider)
-            except AkashicError as e:                
-                return response(
-                    akashic_dsd, e.message, e.line, e.col, RespType.ERROR)
 
+            # Replace data provider in env_provider, rules which depend
+            # on it are recompiled, other rules are not touched
+            updated_rules = env_provider.update_data_provider(
+                old_model_id, data_provider)
+            return data_provider, updated_rules
+
+        try:
+            data_provider, updated_rules = \
+                env_pool.broadcast(update_data_provider)
+        except AkashicError as e:
             return response(
                 akashic_dsd, e.message, e.line, e.col, RespType.ERROR)
-            
+
+        # Persist recompiled rules
+        for entry in updated_rules:
+            mongo.db.rules.update_one(
+                {"rule-name": entry.rule_name},
+                {"$set": {
+                    "clips-code": entry.cache_entry.clips_code,
+                    "dependencies": entry.cache_entry.dependencies,
+                    "field-dependencies": \
+                        entry.cache_entry.field_dependencies,
+                    "bridge-signature": entry.cache_entry.bridge_signature,
+                    "parameters": entry.cache_entry.parameters
+                }}
+            )
+
         # Create DSD db-entry
         dsd_entry = {}
         dsd_entry['dsd-name'] = akashic_dsd['data-source-definition-name']
@@ -211,14 +283,13 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
 
         # Remove data provider from env_provider
         try:
-            env_provider.remove_data_provider(model_id)
+            env_pool.broadcast(lambda env_provider: \
+                env_provider.remove_data_provider(model_id))
         except AkashicError as e:
             # First reinsert deleted DSD
-            data_provider = DataProvider(env_provider)
             try:
-                data_provider.load(dumps(foundDSD["dsd"], indent=True))
-                data_provider.setup()
-                env_provider.insert_data_provider(data_provider)
+                env_pool.broadcast(lambda env_provider: \
+                    insert_dsd(env_provider, foundDSD["dsd"]))
             except AkashicError as e:
                 return response(
                     foundDSD["dsd"], e.message, e.line, e.col, RespType.ERROR)
@@ -258,9 +329,10 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
             return response(None, message, 0, 0, RespType.ERROR)
 
          # Transpile the rule
-        transpiler = Transpiler(env_provider)
         try:
-            transpiler.load(dumps(akashic_rule, indent=True))
+            with env_pool.acquire() as env_provider:
+                transpiler = Transpiler(env_provider)
+                transpiler.load(dumps(akashic_rule, indent=True))
         except AkashicError as e:
             return response(
                 akashic_rule, e.message, e.line, e.col, RespType.ERROR)
@@ -272,14 +344,21 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
         rule_entry['active'] = False
         rule_entry['rule'] = akashic_rule
         rule_entry['clips-code'] = transpiler.tranpiled_rule
-        rule_entry['hash'] = hashlib.sha256(dumps(akashic_rule, indent=True) \
-                            .encode('utf-8')).hexdigest()
+        rule_entry['hash'] = rule_hash(dumps(akashic_rule, indent=True))
+        rule_entry['dependencies'] = transpiler.cache_entry.dependencies
+        rule_entry['field-dependencies'] = \
+            transpiler.cache_entry.field_dependencies
+        rule_entry['bridge-signature'] = \
+            transpiler.cache_entry.bridge_signature
+        rule_entry['parameters'] = transpiler.cache_entry.parameters
+        rule_entry['instances'] = []
 
         # Insert new db entry
         mongo.db.rules.insert_one(rule_entry)
         
         message = "New rule with rule-name '{0}' is successfully created." \
                   .format(akashic_rule['rule-name'])
+        message = with_warnings(message, transpiler)
         return response(rule_entry, message, 0, 0, RespType.SUCCESS)
 
 
@@ -297,15 +376,14 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
             return response(None, message, 0, 0, RespType.ERROR)
 
         # Remove old rule from from env_provider
-        try:
-            env_provider.remove_rule(old_rule_name)
-        except AkashicError as e:
-            pass
+        env_pool.broadcast(lambda env_provider: \
+            remove_rule_if_present(env_provider, old_rule_name))
 
         # Transpile the rule
-        transpiler = Transpiler(env_provider)
         try:
-            transpiler.load(dumps(akashic_rule, indent=True))
+            with env_pool.acquire() as env_provider:
+                transpiler = Transpiler(env_provider)
+                transpiler.load(dumps(akashic_rule, indent=True))
         except AkashicError as e:
             return response(
                 akashic_rule, e.message, e.line, e.col, RespType.ERROR)
@@ -317,8 +395,18 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
         rule_entry['active'] = False
         rule_entry['rule'] = akashic_rule
         rule_entry['clips-code'] = transpiler.tranpiled_rule
-        rule_entry['hash'] = hashlib.sha256(dumps(akashic_rule, indent=True) \
-                            .encode('utf-8')).hexdigest()
+        rule_entry['hash'] = rule_hash(dumps(akashic_rule, indent=True))
+        rule_entry['dependencies'] = transpiler.cache_entry.dependencies
+        rule_entry['field-dependencies'] = \
+            transpiler.cache_entry.field_dependencies
+        rule_entry['bridge-signature'] = \
+            transpiler.cache_entry.bridge_signature
+        rule_entry['parameters'] = transpiler.cache_entry.parameters
+
+        # Instances are kept only if parameters are not changed
+        rule_entry['instances'] = []
+        if foundRule.get("parameters") == rule_entry['parameters']:
+            rule_entry['instances'] = foundRule.get("instances", [])
 
         # Replace old db entry with new one
         mongo.db.rules.replace_one(
@@ -326,6 +414,7 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
 
         message = "Rule with rule-name '{0}' is successfully updated." \
                   .format(old_rule_name)
+        message = with_warnings(message, transpiler)
         return response(rule_entry, message, 0, 0, RespType.SUCCESS)
 
 
@@ -338,17 +427,38 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
             message = "Rule with given rule-name does not exists."
             return response(None, message, 0, 0, RespType.ERROR) 
 
-        # Insert updated rule into env_provider
+        # Insert updated rule into env_provider, rule stored without
+        # dependencies (or transpiled against other DSDs or bridges)
+        # is transpiled again
+        def insert_rule(env_provider):
+            cache_entry = env_provider.insert_rule(
+                foundRule["rule"]["rule-name"], 
+                foundRule["clips-code"],
+                dumps(foundRule["rule"], indent=True),
+                cache_entry_of(foundRule))
+            insert_instances(env_provider, foundRule)
+            return cache_entry
+
         try:
-            env_provider.insert_rule(foundRule["rule"]["rule-name"], 
-                                     foundRule["clips-code"])
+            cache_entry = env_pool.broadcast(insert_rule)
         except AkashicError as e:
             return response(
                 None, e.message, e.line, e.col, RespType.ERROR)
 
+        rule_update = {"active": True}
+        # Persist freshly transpiled rule for the next start
+        if cache_entry.clips_code != foundRule["clips-code"] or \
+        not "dependencies" in foundRule:
+            rule_update['clips-code'] = cache_entry.clips_code
+            rule_update['dependencies'] = cache_entry.dependencies
+            rule_update['field-dependencies'] = \
+                cache_entry.field_dependencies
+            rule_update['bridge-signature'] = cache_entry.bridge_signature
+            rule_update['parameters'] = cache_entry.parameters
+
         result = mongo.db.rules.find_one_and_update(
             {"rule-name": rule_name}, 
-            {"$set": {"active": True}},
+            {"$set": rule_update},
             return_document=ReturnDocument.AFTER
         )
 
@@ -367,7 +477,8 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
             return response(None, message, 0, 0, RespType.ERROR) 
 
         try:
-            env_provider.remove_rule(rule_name)
+            env_pool.broadcast(lambda env_provider: \
+                env_provider.remove_rule(rule_name))
         except AkashicError as e:
             return response(
                 None, e.message, e.line, e.col, RespType.ERROR)
@@ -392,31 +503,134 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
             message = "Rule with given rule-name does not exists."
             return response(None, message, 0, 0, RespType.ERROR)            
         
-        try:
-            env_provider.remove_rule(rule_name)
-        except AkashicError as e:
-            pass
+        env_pool.broadcast(lambda env_provider: \
+            remove_rule_if_present(env_provider, rule_name))
         result = mongo.db.rules.delete_one({"rule-name": rule_name})  
 
         message = "Rule with rule-name '{0}' is successfully deleted." \
                 .format(rule_name)
         return response(None, message, 0, 0, RespType.SUCCESS)
 
+
+
+    def find_rule_template(rule_name):
+        foundRule = mongo.db.rules.find_one(
+            {'rule-name': {'$eq': rule_name}})
+        if not foundRule:
+            message = "Rule with given rule-name does not exists."
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        if len(foundRule.get("parameters", [])) < 1:
+            message = "Rule with rule-name '{0}' is not rule template." \
+                      .format(rule_name)
+            raise AkashicError(message, 0, 0, ErrType.SYSTEM)
+        return foundRule
+
+
+
+    @app.route('/rules/<string:rule_name>/instances', methods=['GET'])
+    def get_rule_instances(rule_name):
+        try:
+            foundRule = find_rule_template(rule_name)
+        except AkashicError as e:
+            return response(None, e.message, e.line, e.col, RespType.ERROR)
+
+        message = "List of instances of rule '{0}' is successfully " \
+                  "queried.".format(rule_name)
+        return response(foundRule.get("instances", []),
+                        message, 0, 0, RespType.SUCCESS)
+
+
+
+    @app.route('/rules/<string:rule_name>/instances', methods=['POST'])
+    def insert_rule_instances(rule_name):
+        # Get JSON data: list of instances, every instance has
+        # 'instance_id' and value of every parameter of the rule
+        instances = request.json
+
+        def insert_rule_instances(env_provider):
+            # Instances of enabled rule are inserted into the engine
+            if rule_name in env_provider.get_rule_names():
+                env_provider.insert_rule_instances(rule_name, instances)
+
+        try:
+            foundRule = find_rule_template(rule_name)
+            check_instances(foundRule, instances)
+            env_pool.broadcast(insert_rule_instances)
+        except AkashicError as e:
+            return response(
+                instances, e.message, e.line, e.col, RespType.ERROR)
+
+        # Instance with existing instance id replaces the old one
+        new_ids = set([i[INSTANCE_ID_FIELD] for i in instances])
+        all_instances = [i for i in foundRule.get("instances", []) \
+                         if not i[INSTANCE_ID_FIELD] in new_ids]
+        all_instances.extend(instances)
+        mongo.db.rules.update_one(
+            {"rule-name": rule_name},
+            {"$set": {"instances": all_instances}}
+        )
+
+        message = "{0} instances of rule '{1}' are successfully inserted." \
+                  .format(len(instances), rule_name)
+        return response(all_instances, message, 0, 0, RespType.SUCCESS)
+
+
+
+    @app.route('/rules/<string:rule_name>/instances', methods=['DELETE'])
+    def remove_rule_instances(rule_name):
+        # Get JSON data: list of instance ids, all instances
+        # are removed if it is not given
+        instance_ids = request.get_json(silent=True)
+
+        def remove_rule_instances(env_provider):
+            if rule_name in env_provider.get_rule_names():
+                env_provider.remove_rule_instances(rule_name, instance_ids)
+
+        try:
+            foundRule = find_rule_template(rule_name)
+            env_pool.broadcast(remove_rule_instances)
+        except AkashicError as e:
+            return response(None, e.message, e.line, e.col, RespType.ERROR)
+
+        all_instances = []
+        if instance_ids != None:
+            all_instances = [i for i in foundRule.get("instances", []) \
+                             if not i[INSTANCE_ID_FIELD] in instance_ids]
+        mongo.db.rules.update_one(
+            {"rule-name": rule_name},
+            {"$set": {"instances": all_instances}}
+        )
+
+        message = "Instances of rule '{0}' are successfully removed." \
+                  .format(rule_name)
+        return response(all_instances, message, 0, 0, RespType.SUCCESS)
+
    
 
 #### ENGINE FUNCS SECTION
     @app.route('/run', methods=['GET'])
     def run():
 
-        # Run the rule engine
+        # Run the rule engine, return data is gathered before
+        # the environment is given to other requests
         try:
-            env_provider.run()
+            with env_pool.acquire() as env_provider:
+                old_rule_names = env_provider.get_rule_names()
+                env_provider.run()
+                rule_names = env_provider.get_rule_names()
+                return_data = list(env_provider.return_data)
         except AkashicError as e:
             return response(
                 None, e.message, e.line, e.col, RespType.ERROR)
 
+        # Rules which removed themselves while running (run-once rules)
+        # are removed from other environments of the pool too
+        for old_rule_name in old_rule_names:
+            if not old_rule_name in rule_names:
+                env_pool.broadcast(lambda env_provider: \
+                    remove_rule_if_present(env_provider, old_rule_name))
+
         # Update rule activity data
-        rule_names = env_provider.get_rule_names()
         cursors = mongo.db.rules.find({})
         rules = list(cursors)
         for akashic_rule in rules:
@@ -432,7 +646,7 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
 
         # Gather return data array
         return_data_array = []
-        for ret in env_provider.return_data:
+        for ret in return_data:
             return_data_array.append(loads(ret))
                 
         message = "Engine has finished inference process."
@@ -453,11 +667,9 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
         dsds = list(cursors)
 
         for akashic_dsd in dsds:
-            data_provider = DataProvider(env_provider)
             try:
-                data_provider.load(dumps(akashic_dsd["dsd"], indent=True))
-                data_provider.setup()
-                env_provider.insert_data_provider(data_provider)
+                env_pool.broadcast(lambda env_provider: \
+                    insert_dsd(env_provider, akashic_dsd["dsd"]))
             except AkashicError as e:
                 return response(
                     None, e.message, e.line, e.col, RespType.ERROR)
@@ -481,19 +693,70 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
         rules = list(cursors)
 
         for akashic_rule in rules:
-            # Add rule to env_provider
+            # Reuse CLIPS code persisted in database, transpiler
+            # uses it only if referenced DSDs and bridges are unchanged
+            if "dependencies" in akashic_rule and \
+            "bridge-signature" in akashic_rule:
+                TRANSPILATION_CACHE.store(akashic_rule["hash"],
+                                          cache_entry_of(akashic_rule))
+
+        # Transpile all rules in parallel, then build them
+        # in CLIPS environments one by one
+        rule_sources = [dumps(akashic_rule["rule"], indent=True) \
+                        for akashic_rule in rules]
+        with env_pool.acquire() as env_provider:
             transpiler = Transpiler(env_provider)
-            try:
-                transpiler.load(dumps(akashic_rule["rule"], indent=True))
-                env_provider.insert_rule(transpiler.rule.rule_name, 
-                                         transpiler.tranpiled_rule)
-                mongo.db.rules.update_one(
-                    {"rule-name": akashic_rule["rule"]["rule-name"]}, 
-                    {"$set": {"active": True}}
-                )
-            except AkashicError as e:
-                return response(
-                    None, e.message, e.line, e.col, RespType.ERROR)
+            results = transpiler.compile_many(rule_sources)
+
+        errors = []
+        for akashic_rule, rule_source, result in \
+        zip(rules, rule_sources, results):
+            rule_name = akashic_rule["rule"]["rule-name"]
+            error = result.error
+            if error == None:
+                def insert_rule(env_provider):
+                    env_provider.insert_rule(result.rule_name, 
+                                             result.clips_code,
+                                             rule_source,
+                                             result.cache_entry)
+                    insert_instances(env_provider, akashic_rule)
+
+                try:
+                    env_pool.broadcast(insert_rule)
+                except AkashicError as e:
+                    error = e
+
+            if error != None:
+                errors.append({
+                    "rule-name": rule_name,
+                    "message": error.message,
+                    "line": error.line,
+                    "col": error.col
+                })
+                continue
+
+            rule_update = {"active": True}
+            # Persist freshly transpiled rule for the next start
+            if not result.is_from_cache:
+                rule_update['clips-code'] = result.clips_code
+                rule_update['dependencies'] = \
+                    result.cache_entry.dependencies
+                rule_update['field-dependencies'] = \
+                    result.cache_entry.field_dependencies
+                rule_update['bridge-signature'] = \
+                    result.cache_entry.bridge_signature
+                rule_update['parameters'] = result.cache_entry.parameters
+
+            mongo.db.rules.update_one(
+                {"rule-name": rule_name}, 
+                {"$set": rule_update}
+            )
+
+        if len(errors) > 0:
+            message = "Engine has finished loading rules " \
+                      "from database. {0} of {1} rules failed to load." \
+                      .format(len(errors), len(rules))
+            return response(errors, message, 0, 0, RespType.ERROR)
 
         message = "Engine has finished loading rules " \
                   "from database."
@@ -503,20 +766,25 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
 
     @app.route('/all-template-names', methods=['GET'])
     def get_all_tempalte_names():
-        template_names = env_provider.get_template_names()
+        with env_pool.acquire() as env_provider:
+            template_names = env_provider.get_template_names()
         return response(template_names, "", 0, 0, RespType.SUCCESS)
 
 
 
+    # Rule names and facts are read from whichever environment is
+    # checked out, with pool_size > 1 they can differ between requests
     @app.route('/all-rule-names', methods=['GET'])
     def get_all_rule_names():
-        rule_names = env_provider.get_rule_names()
+        with env_pool.acquire() as env_provider:
+            rule_names = env_provider.get_rule_names()
         return response(rule_names, "", 0, 0, RespType.SUCCESS)
 
     
     @app.route('/all-facts', methods=['GET'])
     def get_all_facts():
-        rule_names = env_provider.get_facts()
+        with env_pool.acquire() as env_provider:
+            rule_names = env_provider.get_facts()
         return response(rule_names, "", 0, 0, RespType.SUCCESS)
 
 
@@ -525,58 +793,42 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     def assist():
         akashic_rule = request.json
 
+        # Assistance session runs in the fork of the environment, which
+        # is discarded afterwards, so the live environment is neither
+        # changed nor blocked while the session runs. Only snapshot is
+        # taken while environment is held, and no rules are copied, so
+        # only the assisted rule fires (and reflects on web)
+        with env_pool.acquire() as env_provider:
+            snapshot = env_provider.snapshot(rule_names=[])
+        fork_provider, _ = build_fork(snapshot)
+
         # Insert rule that needs assistance into engine
-        transpiler = Transpiler(env_provider)
+        transpiler = Transpiler(fork_provider, is_assistance_session=True)
         try:
             transpiler.load(dumps(akashic_rule, indent=True))
-            env_provider.insert_rule(transpiler.rule.rule_name, 
-                                     transpiler.tranpiled_rule)
+            fork_provider.insert_rule(transpiler.rule_name, 
+                                      transpiler.tranpiled_rule)
         except AkashicError as e:
             return response(
                 akashic_rule, e.message, e.line, e.col, RespType.ERROR)
 
         # Run the engine is assistance mode / assistance session
         try:
-            env_provider.run()
+            fork_provider.run()
         except AkashicError as e:
             return response(
                 None, e.message, e.line, e.col, RespType.ERROR)
 
         # Collect the reponses from the assistance session
         return_data_array = []
-        for ret in env_provider.return_data:
+        for ret in fork_provider.return_data:
             return_data_array.append(loads(ret))
 
         # Create the list of assistance query results
-        # And the list of query rules to be removed 
-        #from the engine 
         query_results = []
-        rules_to_remove = set()
         for ret in return_data_array:
             if ret["meta"]["tag"] == "query_return":
                 query_results.append(ret)
-        
-            if ret["meta"]["tag"] == "query_rule_name_return":
-                if "query_rule_name" in ret["data"]:
-                    rules_to_remove.add(ret["data"]["query_rule_name"])
-
-        # Remove the rules colelcted in list above 
-        for rule_name in rules_to_remove:
-            try:
-                env_provider.remove_rule(rule_name)
-            except AkashicError as e:
-                return response(
-                    None, e.message, e.line, e.col, RespType.ERROR)
-
-        # Turn off engine assistance mode so that all other
-        # non-assistance related rules can run in next esssion
-        env_provider.execute("(do-for-all-facts ((?ao __AssistanceOn)) TRUE (retract ?ao) )")
-       
-        # Undefine assisted rule
-        try:
-            env_provider.remove_rule(akashic_rule['rule-name'])
-        except AkashicError as e:
-            pass
 
         # Create response and return
         resp = {}
@@ -590,8 +842,7 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
 
     @app.route('/reload-env', methods=['POST'])
     def reload_env():
-        global env_provider
-        env_provider = EnvProvider(custom_bridges)
+        env_pool.reset()
 
         global all_templates_loaded
         global all_rules_loaded
@@ -599,7 +850,6 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
         all_rules_loaded = False
 
         # Update ALL rule activity data to FALSE
-        rule_names = env_provider.get_rule_names()
         cursors = mongo.db.rules.find({})
         rules = list(cursors)
         for akashic_rule in rules: 
@@ -618,11 +868,9 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     @app.route('/direct/dsds', methods=['POST'])
     def create_dsd_direct():
         akashic_dsd = request.json
-        data_provider = DataProvider(env_provider)
         try:
-            data_provider.load(dumps(akashic_dsd, indent=True))
-            data_provider.setup()
-            env_provider.insert_data_provider(data_provider)
+            env_pool.broadcast(lambda env_provider: \
+                insert_dsd(env_provider, akashic_dsd))
         except AkashicError as e:
             return response(
                 akashic_dsd, e.message, e.line, e.col, RespType.ERROR)
@@ -638,7 +886,8 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     def remove_dsd_direct(model_id):
         akashic_dsd = request.json
         try:
-            env_provider.remove_data_provider(model_id)
+            env_pool.broadcast(lambda env_provider: \
+                env_provider.remove_data_provider(model_id))
         except AkashicError as e:
             return response(
                 None, e.message, e.line, e.col, RespType.ERROR)
@@ -653,17 +902,23 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     @app.route('/direct/rules', methods=['POST'])
     def create_rule_direct():
         akashic_rule = request.json
-        transpiler = Transpiler(env_provider)
+        rule_source = dumps(akashic_rule, indent=True)
         try:
-            transpiler.load(dumps(akashic_rule, indent=True))
-            env_provider.insert_rule(akashic_rule["rule-name"],
-                                     transpiler.tranpiled_rule)
+            with env_pool.acquire() as env_provider:
+                transpiler = Transpiler(env_provider)
+                transpiler.load(rule_source)
+            env_pool.broadcast(lambda env_provider: \
+                env_provider.insert_rule(akashic_rule["rule-name"],
+                                         transpiler.tranpiled_rule,
+                                         rule_source,
+                                         transpiler.cache_entry))
         except AkashicError as e:
             return response(
                 akashic_rule, e.message, e.line, e.col, RespType.ERROR)
         
         message = "New rule with rule-name '{0}' is successfully created." \
                   .format(akashic_rule['rule-name'])
+        message = with_warnings(message, transpiler)
         return response(akashic_rule, message, 0, 0, RespType.SUCCESS)
 
 
@@ -671,7 +926,8 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     @app.route('/direct/rules/<string:rule_name>', methods=['DELETE'])
     def remove_rule_direct(rule_name):
         try:
-            env_provider.remove_rule(rule_name)
+            env_pool.broadcast(lambda env_provider: \
+                env_provider.remove_rule(rule_name))
         except AkashicError as e:
             return response(
                 akashic_rule, e.message, e.line, e.col, RespType.ERROR)
@@ -687,14 +943,16 @@ def webapi_factory(mongo_uri, custom_bridges=[]):
     def run_direct():
         # Run the rule engine
         try:
-            env_provider.run()
+            with env_pool.acquire() as env_provider:
+                env_provider.run()
+                return_data = list(env_provider.return_data)
         except AkashicError as e:
             return response(
                 None, e.message, e.line, e.col, RespType.ERROR)
 
         # Gather return data array
         return_data_array = []
-        for ret in env_provider.return_data:
+        for ret in return_data:
             return_data_array.append(loads(ret))
                 
         message = "Engine has finished inference process."
@@ -0,0 +1,72 @@
+import io
+import os
+import json
+import time
+import contextlib
+
+from akashic.arules.transpiler import Transpiler
+
+from front_end_benchmark import build_course_env
+
+
+NUM_OF_RULES = 10000
+NUM_OF_WORKERS = [1, 2, 4]
+
+
+def build_rules():
+    rules = []
+    for i in range(0, NUM_OF_RULES):
+        rule = {
+            "rule-name": "Batch_rule_{0}".format(i),
+            "salience": 10,
+            "when": [
+                { "?c<-": "[Course.credits > {0}]".format(i % 10) },
+                { "?b=": "?c.credits * 2 + {0}".format(i) },
+                { "assert": "test[?b > {0}]".format(i) }
+            ],
+            "then": []
+        }
+        rules.append(json.dumps(rule, indent=True))
+
+    # Invalid rule must not abort the batch
+    rules[NUM_OF_RULES // 2] = rules[NUM_OF_RULES // 2] \
+                               .replace("Course", "Unknown_model")
+    return rules
+
+
+
+def bench_batch_compile():
+    """ Measures transpilation time of rule batch by number of
+        worker processes
+
+    Details
+    -------
+    Transpilation cache is not used, so every rule is parsed and
+    transpiled. Every worker count must produce the same CLIPS rules
+    and report the same single error.
+    """
+
+    env_provider = build_course_env()
+    rules = build_rules()
+
+    print("\n{0} rules, {1} CPUs:".format(NUM_OF_RULES, os.cpu_count()))
+    reference = None
+    for num_of_workers in NUM_OF_WORKERS:
+        transpiler = Transpiler(env_provider, debug=False, use_cache=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            results = transpiler.compile_many(rules, num_of_workers)
+            elapsed = time.perf_counter() - start
+
+        output = [(r.clips_code, str(r.error)) for r in results]
+        if reference == None:
+            reference = output
+        num_of_errors = len([r for r in results if r.error != None])
+        print("  {0} workers: {1:10.2f} ms ({2} errors, same output: {3})" \
+              .format(num_of_workers, elapsed * 1000, num_of_errors,
+                      output == reference))
+
+
+
+if __name__ == "__main__":
+    bench_batch_compile()
@@ -0,0 +1,96 @@
+import time
+
+from akashic.util.string_util import to_clips_string
+
+from suite.environment import build_env
+
+
+RECORD_COUNTS = [10000, 100000, 1000000]
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "name", "type": "STRING", "use-as": "data" },
+        { "field-name": "credits", "type": "FLOAT", "use-as": "data" },
+        { "field-name": "active", "type": "BOOLEAN", "use-as": "data" }
+    ]
+}
+
+
+def build_records(num_of_records):
+    # Every tenth name contains quotes, which break unescaped strings
+    return [{
+        "id": i,
+        "name": "Course \"" + str(i) + "\"" if i % 10 == 0 \
+                else "Course " + str(i),
+        "credits": (i % 10) / 2,
+        "active": i % 2 == 0
+    } for i in range(0, num_of_records)]
+
+
+
+def insert_strings(env_provider, records):
+    """ Builds CLIPS fact string of every record and inserts it
+    """
+
+    for record in records:
+        env_provider.insert_fact(
+            "(Course (id {0}) (name {1}) (credits {2}) (active {3}))" \
+            .format(record["id"], to_clips_string(record["name"]),
+                    record["credits"], int(record["active"])))
+
+
+
+def insert_records(env_provider, records):
+    """ Inserts all records by single batch call
+    """
+
+    env_provider.insert_facts("Course", records)
+
+
+
+def check_facts(env_provider, records):
+    names = [fact["name"] for fact in env_provider.env.facts() \
+             if fact.template.name == "Course"]
+    return names == [record["name"] for record in records]
+
+
+
+def bench_bulk_facts():
+    """ Measures insertion of records as CLIPS fact strings against
+        bulk insertion of typed records
+
+    Details
+    -------
+    String path builds every fact by formatting and CLIPS parses it
+    again. Bulk path checks records against slot plan of the DSD and
+    asserts slots through CLIPS template. Both must produce the same
+    facts, including names with quotes.
+    """
+
+    for num_of_records in RECORD_COUNTS:
+        records = build_records(num_of_records)
+        results = []
+        for insert in [insert_strings, insert_records]:
+            env_provider = build_env([COURSE_DSD])
+            start = time.perf_counter()
+            insert(env_provider, records)
+            insert_time = time.perf_counter() - start
+            results.append((insert_time,
+                            check_facts(env_provider, records)))
+
+        (string_time, string_ok), (bulk_time, bulk_ok) = results
+        print("  {0:7d} records: fact strings {1:10.2f} ms, " \
+              "insert_facts {2:10.2f} ms ({3:.1f}x), same facts: {4}" \
+              .format(num_of_records, string_time * 1000,
+                      bulk_time * 1000, string_time / bulk_time,
+                      string_ok and bulk_ok))
+
+
+
+if __name__ == "__main__":
+    bench_bulk_facts()
@@ -0,0 +1,126 @@
+import io
+import re
+import json
+import time
+import contextlib
+
+from akashic.arules.transpiler import Transpiler
+
+from front_end_benchmark import build_course_env
+
+
+NUM_OF_RULES = 5000
+NUM_OF_BLOCKED_RULES = 500
+
+# Guard which matched rule name by string comparison predicate
+LITERAL_GUARD = re.compile(r'\(rule_name ("[^"]*")\)')
+STR_COMPARE_GUARD = r'(rule_name ?rn&: (= (str-compare ?rn \1) 0))'
+
+
+def build_rules(env_provider):
+    transpiler = Transpiler(env_provider, debug=False, use_cache=False)
+    rules = []
+    for i in range(0, NUM_OF_RULES):
+        rule = {
+            "rule-name": "Guarded_rule_{0}".format(i),
+            "salience": 10,
+            "when": [{ "?c<-": "[Course]" }],
+            "then": []
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+            transpiler.load(json.dumps(rule, indent=True))
+        rules.append((transpiler.rule_name, transpiler.tranpiled_rule))
+    return rules
+
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+
+def num_of_activations(env_provider):
+    return len(list(env_provider.env.activations()))
+
+
+
+def measure(rules):
+    """ Measures cost of control facts for given rules
+
+    Returns
+    -------
+    list
+        Pairs (step description, time in ms, number of activations)
+    """
+
+    env_provider = build_course_env()
+    blocked = [rule_name for rule_name, clips_rule \
+               in rules[0:NUM_OF_BLOCKED_RULES]]
+
+    def insert_rules():
+        for rule_name, clips_rule in rules:
+            env_provider.env.build(clips_rule)
+
+    def block_rules():
+        for rule_name in blocked:
+            env_provider.block_rule(rule_name)
+
+    def unblock_rules():
+        for rule_name in blocked:
+            env_provider.unblock_rule(rule_name)
+
+    def remove_rules():
+        for rule_name in blocked:
+            env_provider.insert_fact(
+                "(__RuleToRemove (rule_name \"{0}\"))".format(rule_name))
+        env_provider.env.run(NUM_OF_BLOCKED_RULES)
+
+    steps = []
+    for description, function in [
+        ("build rules", insert_rules),
+        ("assert fact", lambda: env_provider.insert_fact("(Course (id 1))")),
+        ("block rules", block_rules),
+        ("unblock rules", unblock_rules),
+        ("remove rules", remove_rules)
+    ]:
+        elapsed = timed(function)
+        steps.append((description, elapsed,
+                      num_of_activations(env_provider)))
+    return steps
+
+
+
+def bench_control_guards():
+    """ Compares rule guards matching rule name as literal constant
+        with guards matching it by str-compare predicate
+
+    Details
+    -------
+    Literal constants are matched by CLIPS pattern network, so control
+    fact (block, remove) reaches only guard of its rule. Predicate
+    guard of every rule is evaluated for every control fact.
+    Number of activations after each step must be the same.
+    """
+
+    rules = build_rules(build_course_env())
+    legacy_rules = [(rule_name, LITERAL_GUARD.sub(STR_COMPARE_GUARD, rule)) \
+                    for rule_name, rule in rules]
+
+    results = [("literal", measure(rules)),
+               ("str-compare", measure(legacy_rules))]
+
+    print("\n{0} rules, {1} blocked / removed:" \
+          .format(NUM_OF_RULES, NUM_OF_BLOCKED_RULES))
+    for i in range(0, len(results[0][1])):
+        line = "  {0:14s}".format(results[0][1][i][0])
+        for guard_name, steps in results:
+            line += " {0:>11s}: {1:9.2f} ms ({2:5d} act.)" \
+                    .format(guard_name, steps[i][1], steps[i][2])
+        print(line)
+
+
+
+if __name__ == "__main__":
+    bench_control_guards()
@@ -0,0 +1,127 @@
+import time
+import random
+
+from akashic.arules.clips_statement_builder import ClipsStatementBuilder
+
+from suite.environment import build_env
+
+
+NUM_OF_READS = 200
+FACT_COUNTS = [1000, 10000, 50000]
+
+# Filters of counted facts, as transpiler builds them
+FILTERS = [
+    "TRUE",
+    "(> ?course0:credits 5)",
+    "(and (>= ?course0:credits 2) (eq ?course0:name \"c1\"))"
+]
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "name", "type": "STRING", "use-as": "data" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+
+def course_fact(course_id, rand):
+    return "(Course (id {0}) (name \"c{1}\") (credits {2}))" \
+           .format(course_id, rand.randrange(3), rand.randrange(10))
+
+
+
+def measure_reads(env_provider, function_name, expressions):
+    """ Measures evaluation of expressions, compiled in deffunction
+        (as they are compiled in rules), so parsing is not measured.
+        Counters invalidated by the last change are collected again by
+        the first evaluation, before the measurement.
+    """
+
+    env_provider.env.build("(deffunction " + function_name + " () (+ " + \
+                           " ".join(expressions) + "))")
+    function = env_provider.env.find_function(function_name)
+    function()
+
+    start = time.perf_counter()
+    for i in range(0, NUM_OF_READS):
+        function()
+    return (time.perf_counter() - start) / NUM_OF_READS
+
+
+
+def check_counts(env_provider, index_exprs, query_exprs):
+    for index_expr, query_expr in zip(index_exprs, query_exprs):
+        if env_provider.env.eval(index_expr) != \
+           env_provider.env.eval(query_expr):
+            return False
+    return True
+
+
+
+def bench_count_aggregates():
+    """ Measures count() evaluation: CountIndex vs. find-all-facts query
+
+    Details
+    -------
+    Counters are read once before facts are asserted, so they are
+    maintained incrementally. Then facts are modified, retracted and
+    changed by CLIPS code, and counts are checked to be the same as
+    counts of the query after every kind of change.
+    """
+
+    builder = ClipsStatementBuilder()
+    index_exprs = [builder.build_count_value("Course", "?course0", f) \
+                   for f in FILTERS]
+    query_exprs = ["(length$ (find-all-facts ((?course0 Course)) " + \
+                   f + "))" for f in FILTERS]
+
+    print("\nCount of {0} filters, per evaluation of all of them:" \
+          .format(len(FILTERS)))
+    for num_of_facts in FACT_COUNTS:
+        rand = random.Random(num_of_facts)
+        env_provider = build_env([COURSE_DSD])
+        check_counts(env_provider, index_exprs, query_exprs)
+
+        start = time.perf_counter()
+        for i in range(0, num_of_facts):
+            env_provider.insert_fact(course_fact(i, rand))
+        assert_time = (time.perf_counter() - start) / num_of_facts
+
+        checks = [check_counts(env_provider, index_exprs, query_exprs)]
+
+        facts = list(env_provider.env.facts())
+        for fact in rand.sample(facts, num_of_facts // 10):
+            env_provider.modify_fact(fact, credits=rand.randrange(10))
+        checks.append(check_counts(env_provider, index_exprs, query_exprs))
+
+        for fact in rand.sample(facts, num_of_facts // 10):
+            if fact.exists:
+                env_provider.retract_fact(fact)
+        checks.append(check_counts(env_provider, index_exprs, query_exprs))
+
+        query_time = measure_reads(env_provider, "bench-query", query_exprs)
+        index_time = measure_reads(env_provider, "bench-index", index_exprs)
+
+        env_provider.execute("(do-for-all-facts ((?c Course)) " \
+                             "(eq ?c:name \"c2\") (retract ?c))")
+        checks.append(check_counts(env_provider, index_exprs, query_exprs))
+
+        print("  {0:6d} facts: find-all-facts {1:9.3f} ms, " \
+              "count index {2:7.3f} ms ({3:.0f}x), assert {4:.1f} us, " \
+              "same counts: {5}" \
+              .format(num_of_facts,
+                      query_time * 1000,
+                      index_time * 1000,
+                      query_time / index_time,
+                      assert_time * 1000000,
+                      all(checks)))
+
+
+
+if __name__ == "__main__":
+    bench_count_aggregates()
@@ -0,0 +1,101 @@
+import io
+import time
+import contextlib
+
+from suite.environment import build_env, run_quietly
+
+
+FACT_COUNTS = [0, 1000, 10000, 50000]
+NUM_OF_RULES = 20
+NUM_OF_FORKS = 5
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "name", "type": "STRING", "use-as": "data" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+
+def build_course_env(num_of_facts):
+    env_provider = build_env([COURSE_DSD], [{
+        "rule-name": "Credits_rule_" + str(i),
+        "salience": 10,
+        "when": [
+            { "?c<-": "[Course.credits == " + str(i % 10) + "]" }
+        ],
+        "then": []
+    } for i in range(0, NUM_OF_RULES)])
+
+    for i in range(0, num_of_facts):
+        env_provider.insert_fact(
+            "(Course (id {0}) (name \"c{0}\") (credits {1}))" \
+            .format(i, i % 10))
+    return env_provider
+
+
+
+def measure_fork(env_provider):
+    with contextlib.redirect_stdout(io.StringIO()):
+        env_provider.fork()
+
+        start = time.perf_counter()
+        for i in range(0, NUM_OF_FORKS):
+            fork_provider = env_provider.fork()
+        fork_time = (time.perf_counter() - start) / NUM_OF_FORKS
+
+    same_agenda = sorted([a.name for a in env_provider.env.activations()]) == \
+                  sorted([a.name for a in fork_provider.env.activations()])
+    return fork_time, same_agenda
+
+
+
+def measure_snapshot(env_provider):
+    # Environment is held only for snapshot when assistance runs
+    start = time.perf_counter()
+    for i in range(0, NUM_OF_FORKS):
+        env_provider.snapshot(rule_names=[])
+    return (time.perf_counter() - start) / NUM_OF_FORKS
+
+
+
+def bench_env_fork():
+    """ Measures cost of forking the environment against its size
+
+    Details
+    -------
+    Environment has fixed number of rules, so the cost above the cost
+    of empty environment is the cost of copying facts and agenda.
+    Fork is measured before the engine runs (no activation fired),
+    and after it runs and new facts are asserted (some activations
+    of every rule fired). Snapshot without rules is what assistance
+    session takes while it holds the environment.
+    """
+
+    print("\nRules: {0}".format(NUM_OF_RULES))
+    for num_of_facts in FACT_COUNTS:
+        env_provider = build_course_env(num_of_facts)
+        fresh_time, fresh_agenda = measure_fork(env_provider)
+
+        run_quietly(env_provider)
+        for i in range(num_of_facts, num_of_facts + 10):
+            env_provider.insert_fact(
+                "(Course (id {0}) (name \"c{0}\") (credits {1}))" \
+                .format(i, i % 10))
+        run_time, run_agenda = measure_fork(env_provider)
+        snapshot_time = measure_snapshot(env_provider)
+
+        print("  {0:6d} facts: fork {1:9.2f} ms, after run {2:9.2f} ms, " \
+              "snapshot {3:8.2f} ms, same agenda: {4}" \
+              .format(num_of_facts, fresh_time * 1000, run_time * 1000,
+                      snapshot_time * 1000, fresh_agenda and run_agenda))
+
+
+
+if __name__ == "__main__":
+    bench_env_fork()
@@ -0,0 +1,93 @@
+import time
+import threading
+
+from akashic.env_pool import EnvPool
+
+from suite.environment import insert_dsd, insert_rule
+
+
+POOL_SIZES = [1, 2, 4]
+NUM_OF_REQUESTS = 16
+NUM_OF_COURSES = 300
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+# Rule which compares every pair of courses
+RULE = {
+    "rule-name": "Same_credits",
+    "salience": 10,
+    "when": [
+        { "?a<-": "[Course]" },
+        { "?b<-": "[Course]" },
+        { "assert": "test[?a.credits == ?b.credits]" }
+    ],
+    "then": []
+}
+
+
+def build_pool(size):
+    env_pool = EnvPool(size)
+    env_pool.broadcast(lambda env_provider: \
+        insert_dsd(env_provider, COURSE_DSD))
+    env_pool.broadcast(lambda env_provider: \
+        insert_rule(env_provider, RULE))
+    return env_pool
+
+
+
+def handle_request(env_pool):
+    """ Runs the engine on its own fact set, as request would do
+    """
+
+    with env_pool.acquire() as env_provider:
+        for i in range(0, NUM_OF_COURSES):
+            env_provider.insert_fact(
+                "(Course (id {0}) (credits {1}))".format(i, i % 10))
+        env_provider.run()
+        env_provider.execute(
+            "(do-for-all-facts ((?c Course)) TRUE (retract ?c))")
+
+
+
+def bench_env_pool():
+    """ Measures throughput of concurrent requests for pool sizes
+
+    Details
+    -------
+    Every request is handled by its own thread. With single
+    environment requests are serialized; CLIPS releases the GIL while
+    it runs, so bigger pool scales with the number of cores.
+    """
+
+    print("\nRequests: {0}, courses per request: {1}" \
+          .format(NUM_OF_REQUESTS, NUM_OF_COURSES))
+    for size in POOL_SIZES:
+        env_pool = build_pool(size)
+        threads = [threading.Thread(target=handle_request,
+                                    args=(env_pool,)) \
+                   for i in range(0, NUM_OF_REQUESTS)]
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total_time = time.perf_counter() - start
+
+        print("  pool size {0}: {1:8.2f} ms, {2:6.1f} requests/s" \
+              .format(size, total_time * 1000,
+                      NUM_OF_REQUESTS / total_time))
+
+
+
+if __name__ == "__main__":
+    bench_env_pool()
@@ -0,0 +1,113 @@
+import json
+import time
+
+from textx import metamodel_from_str
+
+from akashic.arules.rule_front_end import RuleFrontEnd
+
+from front_end_benchmark import build_course_env
+
+
+NUM_OF_RUNS = 3
+NESTING_DEPTHS = [5, 20, 50, 200, 1000]
+CHAIN_LENGTHS = [10, 100, 1000, 5000]
+
+OPERATORS = ["+", "*", "-", "/", "^", "<", "==", "and", "or"]
+
+
+def nested_expression(depth):
+    return "(" * depth + "?c.credits + 1" + ")" * depth
+
+
+
+def chained_expression(length):
+    operands = ["?c.credits"]
+    for i in range(0, length):
+        operands.append(OPERATORS[i % len(OPERATORS)])
+        operands.append(str(i))
+    return " ".join(operands)
+
+
+
+def build_rule(expression):
+    rule = {
+        "rule-name": "Expression_rule",
+        "salience": 10,
+        "when": [
+            { "?c<-": "[Course]" },
+            { "?x=": expression }
+        ],
+        "then": []
+    }
+    return json.dumps(rule, indent=True)
+
+
+
+def measure(parse, akashic_rule):
+    times = []
+    for i in range(0, NUM_OF_RUNS):
+        start = time.perf_counter()
+        try:
+            parse(akashic_rule)
+        except Exception as e:
+            return None, e.__class__.__name__
+        times.append(time.perf_counter() - start)
+    return min(times), None
+
+
+
+def report(label, size, akashic_rule, textx_parse, front_end_parse):
+    textx_time, textx_error = measure(textx_parse, akashic_rule)
+    front_end_time, front_end_error = measure(front_end_parse, akashic_rule)
+
+    if textx_error != None:
+        textx_str = "{0:>12s}".format(textx_error)
+    else:
+        textx_str = "{0:9.2f} ms".format(textx_time * 1000)
+
+    if front_end_error != None:
+        front_end_str = "{0:>12s}".format(front_end_error)
+        per_unit_str = ""
+    else:
+        front_end_str = "{0:9.2f} ms".format(front_end_time * 1000)
+        per_unit_str = "({0:5.1f} us each)".format(
+            front_end_time * 1e6 / size)
+
+    print("  {0} {1:5d}: textX {2}, expression parser {3} {4}" \
+          .format(label, size, textx_str, front_end_str, per_unit_str))
+
+
+
+def bench_expression_parser():
+    """ Measures parse time of deeply nested and long expressions
+
+    Details
+    -------
+    Only rule model is built (processors are not run): textX parses
+    rule by the rule grammar, front end uses precedence parser for
+    expressions. Parse time of the precedence parser per nesting
+    level (or operator) should stay flat as expressions grow, and
+    nesting depth should not be limited by Python recursion limit.
+    """
+
+    env_provider = build_course_env()
+    front_end = RuleFrontEnd()
+
+    # Meta-model without processors, so that only parsing is measured
+    textx_meta_model = metamodel_from_str(env_provider.rule_mm)
+
+    print("\nExpression parse time (best of {0} runs):".format(NUM_OF_RUNS))
+    for depth in NESTING_DEPTHS:
+        report("nesting depth", depth,
+               build_rule(nested_expression(depth)),
+               textx_meta_model.model_from_str, front_end.build)
+
+    for length in CHAIN_LENGTHS:
+        report("operators    ", length,
+               build_rule(chained_expression(length)),
+               textx_meta_model.model_from_str, front_end.build)
+
+
+
+if __name__ == "__main__":
+    bench_expression_parser()
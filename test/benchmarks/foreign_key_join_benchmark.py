@@ -0,0 +1,123 @@
+import time
+
+from suite.environment import build_env, transpile
+
+
+NUM_OF_COURSES = [50, 200, 800]
+ENROLLMENTS_PER_COURSE = 4
+
+DSDS = [
+    {
+        "data-source-definition-name": "Course",
+        "model-id": "Course",
+        "model-description": "Holds general course data",
+        "can-reflect-on-web": False,
+        "fields": [
+            { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+            { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+        ]
+    },
+    {
+        "data-source-definition-name": "Enrollment",
+        "model-id": "Enrollment",
+        "model-description": "Holds enrollments of students in courses",
+        "can-reflect-on-web": False,
+        "fields": [
+            { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+            { "field-name": "course_id", "type": "INTEGER",
+              "use-as": "foreign-key",
+              "referenced-foreign-model-id": "Course",
+              "referenced-foreign-field-name": "id" },
+            { "field-name": "grade", "type": "INTEGER", "use-as": "data" }
+        ]
+    }
+]
+
+# Rules which find enrollments in courses with more than 8 credits
+RULES = {
+    "cross product": [
+        { "?e<-": "[Enrollment]" },
+        { "?c<-": "[Course]" },
+        { "assert": "test[?e.course_id == ?c.id]" },
+        { "assert": "test[?c.credits > 8]" }
+    ],
+    "foreign key join": [
+        { "?credits=": "Enrollment~Course.credits" },
+        { "assert": "test[?credits > 8]" }
+    ]
+}
+
+
+def build_course_env(num_of_courses):
+    env_provider = build_env(DSDS)
+
+    for i in range(0, num_of_courses):
+        env_provider.insert_fact(
+            "(Course (id {0}) (credits {1}))".format(i, i % 10 + 1))
+    for i in range(0, num_of_courses * ENROLLMENTS_PER_COURSE):
+        env_provider.insert_fact(
+            "(Enrollment (id {0}) (course_id {1}) (grade {2}))" \
+            .format(i, i % num_of_courses, i % 5 + 6))
+    return env_provider
+
+
+
+def build_rule(rule_name, when):
+    return {
+        "rule-name": rule_name,
+        "salience": 10,
+        "optimize-lhs": False,
+        "when": when,
+        "then": []
+    }
+
+
+
+def measure(env_provider, rule_name, when):
+    transpiler = transpile(env_provider, build_rule(rule_name, when),
+                           use_cache=False)
+
+    # Rule is matched against all existing facts when it is built
+    start = time.perf_counter()
+    env_provider.insert_rule(transpiler.rule_name, transpiler.tranpiled_rule)
+    build_time = time.perf_counter() - start
+
+    pattern_matches, partial_matches, activations = \
+        env_provider.env.find_rule(transpiler.rule_name).matches()
+    env_provider.remove_rule(transpiler.rule_name)
+    return partial_matches, activations, build_time, transpiler.tranpiled_rule
+
+
+
+def bench_foreign_key_join():
+    """ Measures rule which connects templates by foreign key
+        ('Enrollment~Course.credits') against rule which tests
+        every combination of facts
+
+    Details
+    -------
+    Both rules must produce the same number of activations. Partial
+    matches and build time of cross product grow quadratically with
+    the number of facts, and linearly for the join.
+    """
+
+    for num_of_courses in NUM_OF_COURSES:
+        env_provider = build_course_env(num_of_courses)
+        print("\nFacts: {0} courses, {1} enrollments" \
+              .format(num_of_courses,
+                      num_of_courses * ENROLLMENTS_PER_COURSE))
+
+        for i, (kind, when) in enumerate(RULES.items()):
+            partial_matches, activations, build_time, clips_rule = \
+                measure(env_provider, "Join_rule_" + str(i), when)
+            if num_of_courses == NUM_OF_COURSES[0]:
+                print(clips_rule)
+            print("  {0:>16}: partial matches: {1:8d}, activations: {2:5d}, " \
+                  "rule build time: {3:8.2f} ms" \
+                  .format(kind, partial_matches, activations,
+                          build_time * 1000))
+
+
+
+if __name__ == "__main__":
+    bench_foreign_key_join()
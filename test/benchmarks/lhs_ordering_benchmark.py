@@ -0,0 +1,129 @@
+import time
+
+from suite.environment import build_env, transpile
+
+
+NUM_OF_STUDENTS = 300
+NUM_OF_COURSES = 50
+ENROLLMENTS_PER_STUDENT = 2
+
+DSDS = [
+    {
+        "data-source-definition-name": "Student",
+        "model-id": "Student",
+        "model-description": "Holds student data",
+        "can-reflect-on-web": False,
+        "fields": [
+            { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+            { "field-name": "year", "type": "INTEGER", "use-as": "data" }
+        ]
+    },
+    {
+        "data-source-definition-name": "Course",
+        "model-id": "Course",
+        "model-description": "Holds general course data",
+        "can-reflect-on-web": False,
+        "fields": [
+            { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+            { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+        ]
+    },
+    {
+        "data-source-definition-name": "Enrollment",
+        "model-id": "Enrollment",
+        "model-description": "Holds enrollments of students in courses",
+        "can-reflect-on-web": False,
+        "fields": [
+            { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+            { "field-name": "student_id", "type": "INTEGER",
+              "use-as": "data" },
+            { "field-name": "course_id", "type": "INTEGER", "use-as": "data" }
+        ]
+    }
+]
+
+
+def build_enrollment_env():
+    env_provider = build_env(DSDS)
+
+    for i in range(0, NUM_OF_STUDENTS):
+        env_provider.insert_fact(
+            "(Student (id {0}) (year {1}))".format(i, i % 4 + 1))
+    for i in range(0, NUM_OF_COURSES):
+        env_provider.insert_fact(
+            "(Course (id {0}) (credits {1}))".format(i, i % 10 + 1))
+    for i in range(0, NUM_OF_STUDENTS * ENROLLMENTS_PER_STUDENT):
+        env_provider.insert_fact(
+            "(Enrollment (id {0}) (student_id {1}) (course_id {2}))" \
+            .format(i, i % NUM_OF_STUDENTS, i % NUM_OF_COURSES))
+    return env_provider
+
+
+
+def build_rule(optimize_lhs):
+    """ Builds rule written in textual order which is natural to
+        the author, but expensive for CLIPS: tests come last
+    """
+
+    return {
+        "rule-name": "Enrollment_rule",
+        "salience": 10,
+        "optimize-lhs": optimize_lhs,
+        "when": [
+            { "?s<-": "[Student]" },
+            { "?c<-": "[Course]" },
+            { "?e<-": "[Enrollment.student_id == ?s.id]" },
+            { "assert": "test[?s.year == 1]" },
+            { "assert": "test[?c.credits > 8]" },
+            { "assert": "test[?e.course_id == ?c.id]" }
+        ],
+        "then": []
+    }
+
+
+
+def measure(env_provider, optimize_lhs):
+    transpiler = transpile(env_provider, build_rule(optimize_lhs),
+                           use_cache=False)
+
+    # Rule is matched against all existing facts when it is built
+    start = time.perf_counter()
+    env_provider.insert_rule(transpiler.rule_name, transpiler.tranpiled_rule)
+    build_time = time.perf_counter() - start
+
+    pattern_matches, partial_matches, activations = \
+        env_provider.env.find_rule(transpiler.rule_name).matches()
+    env_provider.remove_rule(transpiler.rule_name)
+    return partial_matches, activations, build_time, transpiler.tranpiled_rule
+
+
+
+def bench_lhs_ordering():
+    """ Measures CLIPS partial matches of rule with and without
+        LHS ordering optimization
+
+    Details
+    -------
+    Rule is built in environment which already holds facts, so that
+    optimizer uses fact counts of templates. Both orderings must
+    produce the same number of activations.
+    """
+
+    env_provider = build_enrollment_env()
+
+    print("\nFacts: {0} students, {1} courses, {2} enrollments" \
+          .format(NUM_OF_STUDENTS, NUM_OF_COURSES,
+                  NUM_OF_STUDENTS * ENROLLMENTS_PER_STUDENT))
+    for optimize_lhs in [False, True]:
+        partial_matches, activations, build_time, clips_rule = \
+            measure(env_provider, optimize_lhs)
+        print("\noptimize-lhs: {0}".format(optimize_lhs))
+        print(clips_rule)
+        print("  partial matches: {0}, activations: {1}, " \
+              "rule build time: {2:.2f} ms" \
+              .format(partial_matches, activations, build_time * 1000))
+
+
+
+if __name__ == "__main__":
+    bench_lhs_ordering()
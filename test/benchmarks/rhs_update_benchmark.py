@@ -0,0 +1,105 @@
+import time
+
+from suite.environment import build_env, run_quietly
+
+
+UPDATE_COUNTS = [100, 1000, 10000]
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "name", "type": "STRING", "use-as": "data" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+# Every course without credits gets them, every course with 5 credits
+# is deleted, so every fact is updated and deleted once in the run
+UPDATE_RULE = {
+    "rule-name": "Add_credits",
+    "salience": 20,
+    "when": [
+        { "?c<-": "[Course.credits == 0]" }
+    ],
+    "then": [
+        {
+            "update": {
+                "model-id": "Course",
+                "reflect-on-web": False,
+                "data": {
+                    "id": "?c.id",
+                    "name": "?c.name",
+                    "credits": 5
+                }
+            }
+        }
+    ]
+}
+
+DELETE_RULE = {
+    "rule-name": "Delete_course",
+    "salience": 10,
+    "when": [
+        { "?c<-": "[Course.credits == 5]" }
+    ],
+    "then": [
+        {
+            "delete": {
+                "model-id": "Course",
+                "reflect-on-web": False,
+                "data": {
+                    "id": "?c.id"
+                }
+            }
+        }
+    ]
+}
+
+
+def build_course_env(num_of_updates):
+    env_provider = build_env([COURSE_DSD], [UPDATE_RULE, DELETE_RULE])
+    env_provider.insert_facts("Course", [
+        { "id": i, "name": "Course " + str(i), "credits": 0 } \
+        for i in range(0, num_of_updates)
+    ])
+    return env_provider
+
+
+
+def bench_rhs_updates():
+    """ Measures single run which updates and deletes given number
+        of facts by RHS statements
+
+    Details
+    -------
+    Update and delete find the fact by primary key and change it
+    when RHS of the activation ends, so the run fires one activation
+    per statement and does not add rules to the environment.
+    """
+
+    for num_of_updates in UPDATE_COUNTS:
+        env_provider = build_course_env(num_of_updates)
+        num_of_rules = len(list(env_provider.env.rules()))
+
+        start = time.perf_counter()
+        run_quietly(env_provider)
+        run_time = time.perf_counter() - start
+
+        num_of_facts = len([fact for fact in env_provider.env.facts() \
+                            if fact.template.name == "Course"])
+        added_rules = len(list(env_provider.env.rules())) - num_of_rules
+        print("  {0:6d} updates and deletes: run {1:10.2f} ms " \
+              "({2:7.1f} us per statement), facts left: {3}, " \
+              "rules added: {4}" \
+              .format(num_of_updates, run_time * 1000,
+                      run_time * 1000000 / (2 * num_of_updates),
+                      num_of_facts, added_rules))
+
+
+
+if __name__ == "__main__":
+    bench_rhs_updates()
@@ -0,0 +1,115 @@
+import time
+
+from suite.environment import build_env, insert_rule
+
+
+NUM_OF_VARIANTS = [10, 100, 500]
+NUM_OF_COURSES = 200
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+
+def build_course_env():
+    env_provider = build_env([COURSE_DSD])
+
+    for i in range(0, NUM_OF_COURSES):
+        env_provider.insert_fact(
+            "(Course (id {0}) (credits {1}))".format(i, i % 10 + 1))
+    return env_provider
+
+
+
+def insert_variant_rules(env_provider, num_of_variants):
+    """ Transpiles and inserts one rule for every threshold
+    """
+
+    for i in range(0, num_of_variants):
+        insert_rule(env_provider, {
+            "rule-name": "Credits_rule_" + str(i),
+            "salience": 10,
+            "when": [
+                { "?c<-": "[Course.credits > " + str(i % 10) + "]" }
+            ],
+            "then": []
+        }, use_cache=False)
+
+
+
+def insert_template_instances(env_provider, num_of_variants):
+    """ Transpiles and inserts single rule template, and inserts
+        one instance for every threshold
+    """
+
+    transpiler = insert_rule(env_provider, {
+        "rule-name": "Credits_template",
+        "salience": 10,
+        "parameters": [
+            { "parameter-name": "min_credits", "type": "INTEGER" }
+        ],
+        "when": [
+            { "?c<-": "[Course.credits > ?min_credits]" }
+        ],
+        "then": []
+    }, use_cache=False)
+    env_provider.insert_rule_instances(transpiler.rule_name, [
+        { "instance_id": str(i), "min_credits": i % 10 } \
+        for i in range(0, num_of_variants)
+    ])
+
+
+
+def count_activations(env_provider):
+    activations = 0
+    for rule in env_provider.env.rules():
+        activations += rule.matches()[2]
+    return activations
+
+
+
+def bench_rule_templates():
+    """ Measures N rules which differ only in threshold against
+        single rule template with N instances
+
+    Details
+    -------
+    Both must produce the same number of activations. Separate rules
+    are transpiled and built in CLIPS one by one, instances of the
+    template are only facts matched by already built rule.
+    """
+
+    print("\nFacts: {0} courses".format(NUM_OF_COURSES))
+    for num_of_variants in NUM_OF_VARIANTS:
+        results = []
+        for insert in [insert_variant_rules, insert_template_instances]:
+            env_provider = build_course_env()
+            start = time.perf_counter()
+            insert(env_provider, num_of_variants)
+            insert_time = time.perf_counter() - start
+            results.append((len(env_provider.get_rule_names()),
+                            count_activations(env_provider),
+                            insert_time))
+
+        (rules_count, activations, rules_time), \
+        (template_count, template_activations, template_time) = results
+        print("  {0:4d} variants: separate rules {1:4d} rules {2:9.2f} ms, " \
+              "rule template {3:2d} rules {4:8.2f} ms ({5:.0f}x), " \
+              "same activations: {6}" \
+              .format(num_of_variants,
+                      rules_count, rules_time * 1000,
+                      template_count, template_time * 1000,
+                      rules_time / template_time,
+                      activations == template_activations))
+
+
+
+if __name__ == "__main__":
+    bench_rule_templates()
@@ -0,0 +1,127 @@
+import io
+import os
+import json
+import time
+import tempfile
+import contextlib
+
+from akashic.env_provider import EnvProvider
+
+from suite.environment import build_env, insert_rule
+
+
+NUM_OF_DSDS = 1000
+NUM_OF_RULES = 10000
+
+
+def build_dsd(i):
+    dsd = {
+        "data-source-definition-name": "Model_{0}".format(i),
+        "model-id": "Model_{0}".format(i),
+        "model-description": "Generated model",
+        "can-reflect-on-web": False,
+        "fields": [
+            { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+            { "field-name": "amount", "type": "INTEGER", "use-as": "data" },
+            { "field-name": "label", "type": "STRING", "use-as": "data" }
+        ]
+    }
+    return json.dumps(dsd, indent=True)
+
+
+
+def build_rule(i):
+    rule = {
+        "rule-name": "Bundle_rule_{0}".format(i),
+        "salience": 10,
+        "when": [
+            { "?m<-": "[Model_{0}.amount > {1}]" \
+                      .format(i % NUM_OF_DSDS, i % 7) },
+            { "?a=": "?m.amount * 2" }
+        ],
+        "then": []
+    }
+    return json.dumps(rule, indent=True)
+
+
+
+def start_from_sources(dsds, rules):
+    env_provider = build_env(dsds)
+    for rule in rules:
+        insert_rule(env_provider, rule, use_cache=False)
+    return env_provider
+
+
+
+def start_from_bundle(path):
+    env_provider = EnvProvider()
+    env_provider.import_bundle(path)
+    return env_provider
+
+
+
+def timed(function):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+
+def describe(env_provider):
+    """ Returns rule names, template names and number of activations
+        after one fact of every tenth model is asserted
+    """
+
+    for i in range(0, NUM_OF_DSDS, 10):
+        env_provider.insert_fact(
+            "(Model_{0} (id 1) (amount 5) (label \"x\"))".format(i))
+    return (sorted([r.name for r in env_provider.env.rules()]),
+            sorted([t.name for t in env_provider.env.templates()]),
+            len(list(env_provider.env.activations())))
+
+
+
+def bench_ruleset_bundle():
+    """ Compares cold start of environment from DSD and rule sources
+        with cold start from ruleset bundle
+
+    Details
+    -------
+    Every started environment must hold the same rules and templates
+    and produce the same activations. Environment started from text
+    bundle must be able to transpile and insert new rule.
+    """
+
+    dsds = [build_dsd(i) for i in range(0, NUM_OF_DSDS)]
+    rules = [build_rule(i) for i in range(0, NUM_OF_RULES)]
+
+    env_provider, source_time = timed(lambda: start_from_sources(dsds, rules))
+    reference = describe(env_provider)
+
+    print("\n{0} DSDs, {1} rules:".format(NUM_OF_DSDS, NUM_OF_RULES))
+    print("  {0:16s} {1:10.2f} ms".format("from sources", source_time))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for binary in [False, True]:
+            path = os.path.join(temp_dir, "bundle_{0}.zip".format(binary))
+            ignored, export_time = timed(
+                lambda: env_provider.export_bundle(path, binary))
+            bundle_env, import_time = timed(lambda: start_from_bundle(path))
+
+            name = "binary bundle" if binary else "text bundle"
+            print("  {0:16s} {1:10.2f} ms (export {2:.2f} ms, {3} KB, " \
+                  "same environment: {4})" \
+                  .format(name, import_time, export_time,
+                          os.path.getsize(path) // 1024,
+                          describe(bundle_env) == reference))
+
+            if not binary:
+                insert_rule(bundle_env, build_rule(NUM_OF_RULES))
+                print("  {0:16s} new rule inserted after import" \
+                      .format(""))
+
+
+
+if __name__ == "__main__":
+    bench_ruleset_bundle()
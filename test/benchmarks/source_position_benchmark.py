@@ -0,0 +1,115 @@
+import io
+import time
+import cProfile
+import pstats
+import contextlib
+
+from textx.model import get_model
+
+from akashic.arules.transpiler import Transpiler
+from akashic.arules.rule_model import ModelNode, child_slots
+
+from front_end_benchmark import build_course_env, build_rule
+
+
+NUM_OF_RUNS = 5
+NUM_OF_STATEMENTS = 200
+
+POSITION_FUNCTIONS = ["pos_to_linecol", "get_model", "resolve_position"]
+
+
+def load(env_provider, akashic_rule):
+    transpiler = Transpiler(env_provider, debug=False, use_cache=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transpiler.load(akashic_rule)
+    return transpiler
+
+
+
+def model_nodes(rule):
+    nodes = [rule]
+    i = 0
+    while i < len(nodes):
+        for container, key in child_slots(nodes[i]):
+            if isinstance(container, list):
+                child = container[key]
+            else:
+                child = getattr(container, key)
+            child.parent = nodes[i]
+            nodes.append(child)
+        i += 1
+    return nodes
+
+
+
+def eager_resolution_time(transpiler, akashic_rule):
+    """ Measures line and column resolution of every model object
+
+    Details
+    -------
+    This is what processors did before positions were carried as
+    offsets: every processor resolved position of its object.
+    """
+
+    rule = transpiler.front_end.build(akashic_rule)
+    nodes = [node for node in model_nodes(rule) \
+             if isinstance(node, ModelNode)]
+
+    start = time.perf_counter()
+    for node in nodes:
+        get_model(node)._tx_parser.pos_to_linecol(node._tx_position)
+    return time.perf_counter() - start, len(nodes)
+
+
+
+def bench_source_positions():
+    """ Profiles rule load and reports cost of source positions
+
+    Details
+    -------
+    Positions are converted to line and column only when error
+    is reported, so profile of rule without errors should not
+    contain position resolution at all.
+    """
+
+    env_provider = build_course_env()
+    akashic_rule = build_rule(NUM_OF_STATEMENTS)
+
+    times = []
+    for i in range(0, NUM_OF_RUNS):
+        start = time.perf_counter()
+        transpiler = load(env_provider, akashic_rule)
+        times.append(time.perf_counter() - start)
+
+    profile = cProfile.Profile()
+    profile.enable()
+    load(env_provider, akashic_rule)
+    profile.disable()
+    stats = pstats.Stats(profile)
+
+    position_calls = 0
+    position_time = 0.0
+    for (file_name, line, func_name), stat in stats.stats.items():
+        if func_name in POSITION_FUNCTIONS:
+            position_calls += stat[1]
+            position_time += stat[3]
+
+    eager_time, num_of_nodes = eager_resolution_time(transpiler,
+                                                     akashic_rule)
+
+    print("\nRule with {0} statements ({1} model objects):" \
+          .format(NUM_OF_STATEMENTS, num_of_nodes))
+    print("  load time (best of {0} runs):  {1:8.2f} ms" \
+          .format(NUM_OF_RUNS, min(times) * 1000))
+    print("  position resolution in profile: {0} calls, {1:.2f} ms" \
+          .format(position_calls, position_time * 1000))
+    print("  eager resolution (every object): {0:8.2f} ms saved" \
+          .format(eager_time * 1000))
+
+    print("\nTop functions by internal time:")
+    stats.sort_stats("tottime").print_stats(8)
+
+
+
+if __name__ == "__main__":
+    bench_source_positions()
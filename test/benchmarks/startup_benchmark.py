@@ -0,0 +1,89 @@
+import time
+import tempfile
+from os.path import join, dirname, abspath
+
+from akashic.env_provider import EnvProvider
+from akashic.arules.transpiler import Transpiler
+from akashic.meta_models.meta_model_cache import META_MODEL_CACHE
+
+
+NUM_OF_RUNS = 5
+
+
+def first_request():
+    """ Does all work needed before the first request can be served:
+        creates env (system DSDs and system rules) and transpiles
+        one rule, as '/rules' POST does
+    """
+
+    env_provider = EnvProvider()
+
+    this_folder = dirname(__file__)
+    sample_path = abspath(join(this_folder, '..', 'samples', 'arules',
+                               'simple_return.json'))
+    with open(sample_path, 'r') as sample:
+        akashic_rule = sample.read()
+
+    transpiler = Transpiler(env_provider, debug=False)
+    transpiler.load(akashic_rule)
+    return env_provider
+
+
+
+def measure(prepare):
+    times = []
+    for i in range(0, NUM_OF_RUNS):
+        prepare()
+        start = time.perf_counter()
+        first_request()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+
+def bench_startup():
+    """ Measures time-to-first-request
+
+    Details
+    -------
+    1. Before: every DataProvider and Transpiler compiles grammar
+       (emulated by clearing cache before each meta-model lookup).
+    2. Cold process: grammar is compiled once per process.
+    3. Cold process with on-disk cache: grammars are unpickled
+       from cache directory instead of being compiled.
+    4. Warm process: grammars are already compiled (e.g. in gunicorn
+       master before workers are forked).
+    """
+
+    cached_get = META_MODEL_CACHE.get
+
+    def uncached_get(grammar, processors=None):
+        META_MODEL_CACHE.clear()
+        return cached_get(grammar, processors)
+
+    META_MODEL_CACHE.get = uncached_get
+    before = measure(lambda: None)
+    META_MODEL_CACHE.get = cached_get
+
+    cold = measure(META_MODEL_CACHE.clear)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        META_MODEL_CACHE.set_cache_dir(cache_dir)
+        META_MODEL_CACHE.clear()
+        first_request()
+        disk = measure(META_MODEL_CACHE.clear)
+        META_MODEL_CACHE.set_cache_dir(None)
+
+    warm = measure(lambda: None)
+
+    print("\nTime to first request (best of {0} runs):" \
+          .format(NUM_OF_RUNS))
+    print("  before (no meta-model cache): {0:8.2f} ms".format(before * 1000))
+    print("  cold process:                 {0:8.2f} ms".format(cold * 1000))
+    print("  cold process, on-disk cache:  {0:8.2f} ms".format(disk * 1000))
+    print("  warm process:                 {0:8.2f} ms".format(warm * 1000))
+
+
+
+if __name__ == "__main__":
+    bench_startup()
@@ -0,0 +1,55 @@
+import sys
+import json
+import argparse
+
+from suite.runner import run_suite, compare_reports
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="suite",
+        description="Measures parse, transpile and CLIPS build phases " \
+                    "of generated rule corpora and writes JSON report."
+    )
+    parser.add_argument("--rules", type=int, default=200,
+                        help="number of rules in every corpus")
+    parser.add_argument("--models", type=int, default=20,
+                        help="number of generated DSD models")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="number of timing runs of every corpus")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of rule generator")
+    parser.add_argument("--output", default=None,
+                        help="path of JSON report, standard output if omitted")
+    parser.add_argument("--baseline", default=None,
+                        help="path of earlier JSON report, slower phases " \
+                             "are reported and exit status is 1")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown against baseline")
+    args = parser.parse_args()
+
+    report = run_suite(args.rules, args.models, args.runs, args.seed)
+    if args.output == None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline != None:
+        with open(args.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_reports(baseline, report, args.tolerance)
+        for regression in regressions:
+            print("Regression: {0} {1} {2:.2f} ms -> {3:.2f} ms" \
+                  .format(regression["corpus"], regression["phase"],
+                          regression["baseline_ms"], regression["ms"]),
+                  file=sys.stderr)
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import io
+import json
+import contextlib
+
+from akashic.env_provider import EnvProvider
+from akashic.ads.data_provider import DataProvider
+from akashic.arules.transpiler import Transpiler
+
+
+def to_source(construct):
+    # DSDs and rules are given as dicts or in string form
+    if isinstance(construct, str):
+        return construct
+    return json.dumps(construct, indent=True)
+
+
+
+def load_data_provider(env_provider, dsd):
+    """ Loads and sets up data provider of DSD, without inserting it
+        into the environment
+    """
+
+    data_provider = DataProvider(env_provider)
+    data_provider.load(to_source(dsd))
+    data_provider.setup()
+    return data_provider
+
+
+
+def insert_dsd(env_provider, dsd):
+    data_provider = load_data_provider(env_provider, dsd)
+    env_provider.insert_data_provider(data_provider)
+    return data_provider
+
+
+
+def transpile(env_provider, rule, use_cache=True):
+    """ Transpiles rule, output of the transpiler is discarded
+
+    Returns
+    -------
+    Transpiler
+        Transpiler which loaded the rule
+    """
+
+    transpiler = Transpiler(env_provider, debug=False, use_cache=use_cache)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transpiler.load(to_source(rule))
+    return transpiler
+
+
+
+def insert_rule(env_provider, rule, use_cache=True):
+    """ Transpiles rule and inserts it with its source, so it is
+        recompiled when DSD it depends on is updated
+
+    Returns
+    -------
+    Transpiler
+        Transpiler which loaded the rule
+    """
+
+    transpiler = transpile(env_provider, rule, use_cache)
+    env_provider.insert_rule(transpiler.rule_name,
+                             transpiler.tranpiled_rule,
+                             to_source(rule),
+                             transpiler.cache_entry)
+    return transpiler
+
+
+
+def build_env(dsds=[], rules=[], custom_bridges=[]):
+    """ Creates environment with given DSDs and rules
+
+    Parameters
+    ----------
+    dsds : list
+        DSDs as dicts or in string form, inserted in the same order
+    rules : list
+        Akashic rules as dicts or in string form, inserted after DSDs
+    custom_bridges : list
+        Bridges imported into the environment
+
+    Returns
+    -------
+    EnvProvider
+        Built environment
+    """
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        env_provider = EnvProvider(custom_bridges)
+    for dsd in dsds:
+        insert_dsd(env_provider, dsd)
+    for rule in rules:
+        insert_rule(env_provider, rule)
+    return env_provider
+
+
+
+def run_quietly(env_provider):
+    """ Runs the engine, output of bridges is discarded
+
+    Returns
+    -------
+    list
+        Data of 'return' statements, in order
+    """
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        env_provider.run()
+    return [json.loads(entry)["data"] for entry in env_provider.return_data]
@@ -0,0 +1,273 @@
+import json
+import random
+
+
+# Numeric data fields of every generated model, besides primary key
+# 'id' and string field 'label'
+NUM_OF_DATA_FIELDS = 4
+
+CMP_OPERATORS = ["==", "!=", "<", ">", "<=", ">="]
+
+
+class RuleProfile(object):
+    """ RuleProfile class
+
+    This class represents shape of rules in one generated corpus:
+    how many statements of each kind every rule has.
+    """
+
+    def __init__(self, name, data_locators=1, binding_vars=0,
+                 counts=0, exists=0, foralls=0, creates=0, updates=0,
+                 deletes=0, tests=0):
+        """ RuleProfile constructor method
+
+        Parameters
+        ----------
+        name : str
+            Name of the profile, used in the report
+        data_locators : int
+            Number of fact-address statements, every statement
+            references one or two data locators
+        binding_vars : int
+            Number of binding variable statements
+        counts : int
+            Number of count() binding variable statements, only
+            0 and 1 are supported
+        exists : int
+            Number of 'exists' assertions
+        foralls : int
+            Number of 'forall' assertions
+        creates : int
+            Number of RHS create statements
+        updates : int
+            Number of RHS update statements
+        deletes : int
+            Number of RHS delete statements
+        tests : int
+            Number of 'test' assertions on binding variables
+        """
+
+        self.name = name
+        self.data_locators = max(data_locators, 1)
+        self.binding_vars = binding_vars
+        self.counts = min(counts, 1)
+        self.exists = exists
+        self.foralls = foralls
+        self.creates = creates
+        self.updates = updates
+        self.deletes = deletes
+        self.tests = tests
+
+
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+
+# Profiles of default corpora, each stresses different
+# part of the transpiler
+DEFAULT_PROFILES = [
+    RuleProfile("simple"),
+    RuleProfile("data_locators", data_locators=12),
+    RuleProfile("binding_vars", data_locators=3, binding_vars=12, tests=4),
+    RuleProfile("aggregates", data_locators=2, counts=1, exists=3),
+    RuleProfile("forall", data_locators=2, foralls=2),
+    RuleProfile("rhs", data_locators=2, binding_vars=2,
+                creates=2, updates=2, deletes=2),
+    RuleProfile("large", data_locators=20, binding_vars=20, counts=1,
+                exists=2, tests=5, creates=1, updates=1, deletes=1)
+]
+
+
+def build_dsd(model_index):
+    """ Builds synthetic DSD in the form of test/samples/ads DSDs
+
+    Returns
+    -------
+    dict
+        DSD of model 'Model_<model_index>'
+    """
+
+    fields = [{ "field-name": "id", "type": "INTEGER",
+                "use-as": "primary-key" }]
+    for i in range(0, NUM_OF_DATA_FIELDS):
+        fields.append({ "field-name": "f{0}".format(i), "type": "INTEGER",
+                        "use-as": "data" })
+    fields.append({ "field-name": "label", "type": "STRING",
+                    "use-as": "data" })
+
+    return {
+        "data-source-definition-name": "Model_{0}".format(model_index),
+        "model-id": "Model_{0}".format(model_index),
+        "model-description": "Synthetic benchmark model",
+        "can-reflect-on-web": False,
+        "fields": fields
+    }
+
+
+
+class RuleGenerator(object):
+    """ RuleGenerator class
+
+    We use this class to generate deterministic corpora of
+    synthetic Akashic rules over synthetic DSDs.
+    """
+
+    def __init__(self, num_of_models, seed=0):
+        """ RuleGenerator constructor method
+
+        Parameters
+        ----------
+        num_of_models : int
+            Number of models rules can reference
+        seed : int
+            Seed of random generator, the same seed always
+            generates the same corpus
+        """
+
+        self.num_of_models = num_of_models
+        self.random = random.Random(seed)
+
+
+
+    def model(self):
+        return "Model_{0}".format(self.random.randrange(self.num_of_models))
+
+
+
+    def field(self):
+        return "f{0}".format(self.random.randrange(NUM_OF_DATA_FIELDS))
+
+
+
+    def condition(self, model_id):
+        return "{0}.{1} {2} {3}".format(model_id,
+                                        self.field(),
+                                        self.random.choice(CMP_OPERATORS),
+                                        self.random.randrange(100))
+
+
+
+    def build_rule(self, rule_name, profile):
+        """ Builds single rule of given profile
+
+        Returns
+        -------
+        str
+            Akashic rule in string form
+        """
+
+        when = []
+        fact_vars = []
+        for i in range(0, profile.data_locators):
+            model_id = self.model()
+            expression = self.condition(model_id)
+            if i % 2 == 1:
+                expression += " and " + self.condition(model_id)
+            var_name = "?m{0}".format(i)
+            when.append({ var_name + "<-": "[" + expression + "]" })
+            fact_vars.append((var_name, model_id))
+
+        binding_vars = []
+        for i in range(0, profile.binding_vars):
+            fact_var = self.random.choice(fact_vars)[0]
+            expression = "{0}.{1} * {2} + {3}" \
+                         .format(fact_var, self.field(),
+                                 self.random.randrange(1, 10),
+                                 self.random.randrange(100))
+            if len(binding_vars) > 0:
+                expression += " - " + self.random.choice(binding_vars)
+            var_name = "?b{0}".format(i)
+            when.append({ var_name + "=": expression })
+            binding_vars.append(var_name)
+
+        for i in range(0, profile.exists):
+            when.append({ "assert": "exists[{0}]" \
+                          .format(self.condition(self.model())) })
+
+        for i in range(0, profile.foralls):
+            when.append({ "assert": "forall[{0}]" \
+                          .format(self.condition(self.model())) })
+
+        for i in range(0, profile.tests):
+            if len(binding_vars) == 0:
+                break
+            when.append({ "assert": "test[{0} > {1}]" \
+                          .format(self.random.choice(binding_vars),
+                                  self.random.randrange(100)) })
+
+        # Transpiler keeps data locators of count() in the data locator
+        # table, so every later statement would reference them too
+        if profile.counts > 0:
+            var_name = "?c0"
+            when.append({ var_name + "=": "count({0})" \
+                          .format(self.condition(self.model())) })
+            binding_vars.append(var_name)
+
+        then = []
+        for i in range(0, profile.creates):
+            then.append({ "create": {
+                "model-id": self.model(),
+                "reflect-on-web": False,
+                "data": self.data_fields(None, binding_vars)
+            }})
+
+        for i in range(0, profile.updates):
+            fact_var, model_id = self.random.choice(fact_vars)
+            then.append({ "update": {
+                "model-id": model_id,
+                "reflect-on-web": False,
+                "data": self.data_fields(fact_var, binding_vars)
+            }})
+
+        for i in range(0, profile.deletes):
+            fact_var, model_id = self.random.choice(fact_vars)
+            then.append({ "delete": {
+                "model-id": model_id,
+                "reflect-on-web": False,
+                "data": { "id": fact_var + ".id" }
+            }})
+
+        rule = {
+            "rule-name": rule_name,
+            "salience": self.random.randrange(1, 100),
+            "when": when,
+            "then": then
+        }
+        return json.dumps(rule, indent=True)
+
+
+
+    def data_fields(self, fact_var, binding_vars):
+        data = {}
+        if fact_var == None:
+            data["id"] = self.random.randrange(1000)
+        else:
+            data["id"] = fact_var + ".id"
+
+        for i in range(0, NUM_OF_DATA_FIELDS):
+            field_name = "f{0}".format(i)
+            if fact_var != None and i % 2 == 0:
+                data[field_name] = fact_var + "." + field_name
+            elif len(binding_vars) > 0 and i % 2 == 1:
+                data[field_name] = self.random.choice(binding_vars)
+            else:
+                data[field_name] = self.random.randrange(100)
+        data["label"] = "'generated'"
+        return data
+
+
+
+    def build_corpus(self, profile, num_of_rules):
+        """ Builds corpus of rules of given profile
+
+        Returns
+        -------
+        list
+            Akashic rules in string form
+        """
+
+        return [self.build_rule("{0}_rule_{1}".format(profile.name, i),
+                                profile) \
+                for i in range(0, num_of_rules)]
@@ -0,0 +1,288 @@
+import io
+import os
+import gc
+import sys
+import time
+import tracemalloc
+import contextlib
+
+from clips.error import CLIPSError
+
+from akashic.arules.transpiler import Transpiler
+from akashic.exceptions import AkashicError
+
+from suite.generator import RuleGenerator, DEFAULT_PROFILES, build_dsd
+from suite.environment import build_env
+
+
+# Version of report format, increased when keys of report change
+REPORT_VERSION = 1
+
+
+def parse_phase(transpiler, rules):
+    """ Builds rule models, without calling transpiler processors
+    """
+
+    for rule in rules:
+        transpiler.front_end.build(rule)
+    return len(rules)
+
+
+
+def load_phase(transpiler, rules):
+    """ Parses and transpiles rules, collects CLIPS code
+
+    Returns
+    -------
+    list
+        Pairs of rule name and CLIPS code of transpiled rules
+    """
+
+    transpiled = []
+    for rule in rules:
+        try:
+            transpiler.load(rule)
+        except AkashicError:
+            continue
+        transpiled.append((transpiler.rule_name, transpiler.tranpiled_rule))
+    return transpiled
+
+
+
+def build_phase(env_provider, transpiled):
+    """ Builds transpiled rules into CLIPS environment
+
+    Returns
+    -------
+    int
+        Number of rules CLIPS refused to build
+    """
+
+    errors = 0
+    for rule_name, clips_code in transpiled:
+        try:
+            env_provider.env.build(clips_code)
+        except CLIPSError:
+            errors += 1
+    return errors
+
+
+
+def clear_rules(env_provider, transpiled):
+    for rule_name, clips_code in transpiled:
+        try:
+            env_provider.env.find_rule(rule_name).undefine()
+        except LookupError:
+            pass
+
+
+
+@contextlib.contextmanager
+def silenced_stderr():
+    """ Redirects standard error of the process to null device
+
+    Details
+    -------
+    CLIPS writes messages of rules it refuses to build directly to
+    standard error file descriptor, python redirection does not
+    catch them.
+    """
+
+    sys.stderr.flush()
+    saved_fd = os.dup(2)
+    null_fd = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(null_fd, 2)
+    try:
+        yield
+    finally:
+        os.dup2(saved_fd, 2)
+        os.close(null_fd)
+        os.close(saved_fd)
+
+
+
+def timed(function):
+    gc.collect()
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+
+def traced(function):
+    """ Runs function under tracemalloc
+
+    Returns
+    -------
+    int
+        Peak of python memory allocated by the function, in bytes
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+
+def clips_mem_used(env_provider):
+    return int(env_provider.env.eval("(mem-used)"))
+
+
+
+def run_corpus(env_provider, rules, num_of_runs):
+    """ Measures parse, transpile and build phases of one corpus
+
+    Details
+    -------
+    Transpiler.load builds the rule model and runs transpiler
+    processors in one pass, so transpile phase is measured as whole
+    Transpiler.load minus parse phase (model built by the front end
+    alone). Timings are taken without
+    tracemalloc (it slows python down several times) and the best
+    of all runs is reported. Peak python memory of every phase is
+    measured in separate run, build phase also reports growth of
+    CLIPS memory.
+
+    Returns
+    -------
+    dict
+        Report of the corpus
+    """
+
+    transpiler = Transpiler(env_provider, debug=False, use_cache=False)
+
+    parse_times = []
+    load_times = []
+    build_times = []
+    transpiled = []
+    build_errors = 0
+    for i in range(0, num_of_runs):
+        ignored, parse_time = timed(lambda: parse_phase(transpiler, rules))
+        transpiled, load_time = timed(lambda: load_phase(transpiler, rules))
+        build_errors, build_time = \
+            timed(lambda: build_phase(env_provider, transpiled))
+        clear_rules(env_provider, transpiled)
+        parse_times.append(parse_time)
+        load_times.append(load_time)
+        build_times.append(build_time)
+
+    parse_peak = traced(lambda: parse_phase(transpiler, rules))
+    load_peak = traced(lambda: load_phase(transpiler, rules))
+    mem_before = clips_mem_used(env_provider)
+    build_peak = traced(lambda: build_phase(env_provider, transpiled))
+    clips_growth = clips_mem_used(env_provider) - mem_before
+    clear_rules(env_provider, transpiled)
+
+    parse_time = min(parse_times)
+    load_time = min(load_times)
+    return {
+        "rules": len(rules),
+        "transpiled": len(transpiled),
+        "transpile_errors": len(rules) - len(transpiled),
+        "build_errors": build_errors,
+        "phases": {
+            "parse": {
+                "ms": round(parse_time, 3),
+                "python_peak_bytes": parse_peak
+            },
+            "transpile": {
+                "ms": round(max(load_time - parse_time, 0.0), 3),
+                "python_peak_bytes": load_peak
+            },
+            "build": {
+                "ms": round(min(build_times), 3),
+                "python_peak_bytes": build_peak,
+                "clips_bytes": clips_growth
+            }
+        },
+        "total_load_ms": round(load_time, 3)
+    }
+
+
+
+def run_suite(num_of_rules, num_of_models, num_of_runs, seed,
+              profiles=DEFAULT_PROFILES):
+    """ Generates corpora of all profiles and measures them
+
+    Parameters
+    ----------
+    num_of_rules : int
+        Number of rules in every corpus
+    num_of_models : int
+        Number of generated DSD models
+    num_of_runs : int
+        Number of timing runs of every corpus
+    seed : int
+        Seed of rule generator
+    profiles : list
+        List of RuleProfile objects
+
+    Returns
+    -------
+    dict
+        Report of the whole suite, serializable as JSON
+    """
+
+    report = {
+        "version": REPORT_VERSION,
+        "rules_per_corpus": num_of_rules,
+        "models": num_of_models,
+        "runs": num_of_runs,
+        "seed": seed,
+        "corpora": {}
+    }
+
+    # Transpiler prints debug output and CLIPS prints build errors
+    with contextlib.redirect_stdout(io.StringIO()), silenced_stderr():
+        env_provider = build_env([build_dsd(i) for i \
+                                  in range(0, num_of_models)])
+        for profile in profiles:
+            generator = RuleGenerator(num_of_models, seed)
+            rules = generator.build_corpus(profile, num_of_rules)
+            corpus = run_corpus(env_provider, rules, num_of_runs)
+            corpus["profile"] = profile.to_dict()
+            report["corpora"][profile.name] = corpus
+    return report
+
+
+
+def compare_reports(baseline, report, tolerance):
+    """ Finds phases which got slower than in the baseline report
+
+    Parameters
+    ----------
+    baseline : dict
+        Report of earlier run of the suite
+    report : dict
+        Report of current run of the suite
+    tolerance : float
+        Allowed relative slowdown, 0.2 allows 20% slower phase
+
+    Returns
+    -------
+    list
+        Dictionaries describing regressed phases of all corpora
+        present in both reports with the same number of rules
+    """
+
+    regressions = []
+    for name, corpus in report["corpora"].items():
+        baseline_corpus = baseline["corpora"].get(name)
+        if baseline_corpus == None \
+        or baseline_corpus["rules"] != corpus["rules"]:
+            continue
+        for phase_name, phase in corpus["phases"].items():
+            baseline_ms = baseline_corpus["phases"][phase_name]["ms"]
+            if phase["ms"] > baseline_ms * (1 + tolerance):
+                regressions.append({
+                    "corpus": name,
+                    "phase": phase_name,
+                    "baseline_ms": baseline_ms,
+                    "ms": phase["ms"]
+                })
+    return regressions
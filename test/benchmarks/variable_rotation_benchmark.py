@@ -0,0 +1,78 @@
+import io
+import json
+import time
+import contextlib
+
+from akashic.arules.transpiler import Transpiler
+
+from front_end_benchmark import build_course_env
+
+
+NUM_OF_RUNS = 3
+NUM_OF_DATA_LOCATORS = [10, 100, 1000]
+
+
+def build_rule(num_of_data_locators):
+    """ Builds rule with given number of data locators
+
+    Details
+    -------
+    Every fact-address statement uses one data locator, so its
+    variable is rotated once. Every statement is followed by
+    variable assignment which references previous fact address,
+    so variable table grows with the rule.
+    """
+
+    when = []
+    for i in range(0, num_of_data_locators):
+        when.append({
+            "?c{0}<-".format(i): "[Course.credits > {0}]".format(i)
+        })
+        when.append({
+            "?b{0}=".format(i): "?c{0}.credits * 2 + {0}".format(i)
+        })
+
+    rule = {
+        "rule-name": "Rotation_rule_{0}".format(num_of_data_locators),
+        "salience": 10,
+        "when": when,
+        "then": []
+    }
+    return json.dumps(rule, indent=True)
+
+
+
+def measure(env_provider, akashic_rule):
+    times = []
+    for i in range(0, NUM_OF_RUNS):
+        transpiler = Transpiler(env_provider, debug=False, use_cache=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            transpiler.load(akashic_rule)
+            times.append(time.perf_counter() - start)
+    return min(times)
+
+
+
+def bench_variable_rotation():
+    """ Measures rule load time as number of data locators grows
+
+    Details
+    -------
+    Data locator variables are rotated through reverse indexes
+    of variable and data locator tables, so time per data locator
+    should stay flat as rule grows.
+    """
+
+    env_provider = build_course_env()
+
+    print("\nRule load time (best of {0} runs):".format(NUM_OF_RUNS))
+    for size in NUM_OF_DATA_LOCATORS:
+        load_time = measure(env_provider, build_rule(size))
+        print("  {0:5d} data locators: {1:10.2f} ms ({2:6.1f} us each)" \
+              .format(size, load_time * 1000, load_time * 1e6 / size))
+
+
+
+if __name__ == "__main__":
+    bench_variable_rotation()
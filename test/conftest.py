@@ -0,0 +1,37 @@
+import pytest
+
+from benchmarks.suite import environment
+
+
+# Environments of tests are built the same way as environments
+# of benchmarks
+
+
+@pytest.fixture
+def build_env():
+    return environment.build_env
+
+
+@pytest.fixture
+def load_data_provider():
+    return environment.load_data_provider
+
+
+@pytest.fixture
+def insert_dsd():
+    return environment.insert_dsd
+
+
+@pytest.fixture
+def transpile():
+    return environment.transpile
+
+
+@pytest.fixture
+def insert_rule():
+    return environment.insert_rule
+
+
+@pytest.fixture
+def run_quietly():
+    return environment.run_quietly
@@ -77,7 +77,7 @@ def test_rule_transpiler():
     print("\n")
 
     # Insert transpiled rule in env_provider
-    env_provider.insert_rule(transpiler.rule.rule_name, transpiler.tranpiled_rule)
+    env_provider.insert_rule(transpiler.rule_name, transpiler.tranpiled_rule)
 
 
     #####  ADD FACTS FROM THE WEB
@@ -0,0 +1,65 @@
+import io
+import json
+import contextlib
+import pytest
+
+from akashic.arules.transpiler import Transpiler
+from akashic.exceptions import AkashicError
+
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+ASSISTANCE_RULE = {
+    "rule-name": "Assistance_rule",
+    "salience": 10,
+    "when": [
+        { "?id=": "Course.id ???" }
+    ],
+    "then": []
+}
+
+
+@pytest.fixture
+def env_provider(build_env):
+    env_provider = build_env([COURSE_DSD])
+    env_provider.insert_facts("Course", [
+        { "id": i, "credits": 0 } for i in range(0, 3)
+    ])
+    return env_provider
+
+
+def test_assistance_rule_is_rejected_outside_session(env_provider,
+                                                     transpile):
+    with pytest.raises(AkashicError) as error:
+        transpile(env_provider, ASSISTANCE_RULE, use_cache=False)
+
+    assert error.value.err_type == "SEMANTIC"
+    assert not "Assistance_rule" in env_provider.get_rule_names()
+
+
+def test_assistance_rule_runs_in_session(env_provider):
+    facts = env_provider.get_facts()
+    fork_provider = env_provider.fork()
+
+    transpiler = Transpiler(fork_provider, is_assistance_session=True,
+                            debug=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        transpiler.load(json.dumps(ASSISTANCE_RULE, indent=True))
+        fork_provider.insert_rule(transpiler.rule_name,
+                                  transpiler.tranpiled_rule)
+        fork_provider.run()
+
+    results = [json.loads(entry) for entry in fork_provider.return_data]
+    assert sorted([result["data"]["value"] for result in results \
+                   if result["meta"]["tag"] == "query_return"]) == [0, 1, 2]
+    assert env_provider.get_facts() == facts
+    assert not "Assistance_rule" in env_provider.get_rule_names()
@@ -0,0 +1,164 @@
+import os
+import pytest
+
+from akashic.util.string_util import to_clips_string
+
+
+ITEM_DSD = {
+    "data-source-definition-name": "Item",
+    "model-id": "Item",
+    "model-description": "Holds item data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "qty", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+# Filters of counted facts, as transpiler builds them
+FILTERS = ["TRUE", "(> ?item0:qty 0)"]
+
+# Quantity of item which triggers the RHS under test
+TRIGGER_QTY = 100
+
+RHS_STATEMENTS = {
+    "create": {
+        "create": {
+            "model-id": "Item",
+            "reflect-on-web": False,
+            "data": { "id": 1000, "qty": 5 }
+        }
+    },
+    "update": {
+        "update": {
+            "model-id": "Item",
+            "reflect-on-web": False,
+            "data": { "id": "?i.id", "qty": 0 }
+        }
+    },
+    "delete": {
+        "delete": {
+            "model-id": "Item",
+            "reflect-on-web": False,
+            "data": { "id": "?i.id" }
+        }
+    },
+    "clips": { "clips": "(retract ?i)" }
+}
+
+
+def items(num_of_items):
+    return [{ "id": i, "qty": i % 3 } for i in range(0, num_of_items)]
+
+
+def item_facts(env_provider):
+    return [fact for fact in env_provider.env.facts() \
+            if fact.template.name == "Item"]
+
+
+def check_counts(env_provider):
+    """ Checks every counter of the index against find-all-facts
+        query; the first call collects the counters
+    """
+
+    for filter_code in FILTERS:
+        count = env_provider.env.eval(
+            "(__count_value \"Item\" \"?item0\" {0})" \
+            .format(to_clips_string(filter_code)))
+        query = env_provider.env.eval(
+            "(length$ (find-all-facts ((?item0 Item)) {0}))" \
+            .format(filter_code))
+        assert count == query
+
+
+@pytest.fixture
+def item_env(build_env):
+    def build(rules=[]):
+        env_provider = build_env([ITEM_DSD], rules)
+        env_provider.insert_facts("Item", items(6))
+        check_counts(env_provider)
+        return env_provider
+    return build
+
+
+def test_insert_fact(item_env):
+    env_provider = item_env()
+
+    env_provider.insert_fact("(Item (id 10) (qty 4))")
+    check_counts(env_provider)
+    env_provider.insert_fact("(Item (id 11) (qty 0))")
+    check_counts(env_provider)
+
+
+def test_insert_facts(item_env):
+    env_provider = item_env()
+
+    env_provider.insert_facts("Item", [{ "id": 10, "qty": 4 },
+                                       { "id": 11, "qty": 0 }])
+    check_counts(env_provider)
+
+
+def test_modify_and_retract_fact(item_env):
+    env_provider = item_env()
+    facts = item_facts(env_provider)
+
+    env_provider.modify_fact(facts[0], qty=7)
+    check_counts(env_provider)
+    env_provider.modify_fact(facts[1], qty=0)
+    check_counts(env_provider)
+    env_provider.retract_fact(facts[2])
+    check_counts(env_provider)
+
+
+@pytest.mark.parametrize("statement", RHS_STATEMENTS.keys())
+def test_rhs_statement(item_env, run_quietly, statement):
+    env_provider = item_env([{
+        "rule-name": "Change_items",
+        "salience": 10,
+        "when": [
+            { "?i<-": "[Item.qty == {0}]".format(TRIGGER_QTY) }
+        ],
+        "then": [RHS_STATEMENTS[statement]]
+    }])
+
+    env_provider.insert_facts("Item", [{ "id": 20, "qty": TRIGGER_QTY },
+                                       { "id": 21, "qty": TRIGGER_QTY }])
+    check_counts(env_provider)
+    run_quietly(env_provider)
+    check_counts(env_provider)
+
+
+def test_execute(item_env):
+    env_provider = item_env()
+
+    env_provider.execute(
+        "(do-for-all-facts ((?i Item)) (> ?i:qty 1) (retract ?i))")
+    check_counts(env_provider)
+    env_provider.execute("(assert (Item (id 10) (qty 3)))")
+    check_counts(env_provider)
+
+
+def test_build_fork(item_env):
+    env_provider = item_env()
+
+    fork_provider = env_provider.fork()
+    check_counts(fork_provider)
+    fork_provider.insert_facts("Item", [{ "id": 10, "qty": 4 }])
+    fork_provider.retract_fact(item_facts(fork_provider)[0])
+    check_counts(fork_provider)
+    check_counts(env_provider)
+
+
+def test_binary_import_bundle(item_env, build_env, tmp_path):
+    path = os.path.join(str(tmp_path), "bundle.zip")
+    item_env().export_bundle(path, binary=True)
+
+    env_provider = build_env()
+    env_provider.import_bundle(path)
+    env_provider.insert_facts("Item", items(6))
+    check_counts(env_provider)
+    env_provider.insert_fact("(Item (id 10) (qty 4))")
+    check_counts(env_provider)
+    env_provider.execute(
+        "(do-for-all-facts ((?i Item)) (= ?i:qty 0) (retract ?i))")
+    check_counts(env_provider)
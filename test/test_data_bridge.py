@@ -0,0 +1,82 @@
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "name", "type": "STRING", "use-as": "data" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+RETURN_CREDITS = {
+    "return": {
+        "tag": "credits",
+        "data": {
+            "id": "?c.id",
+            "credits": "?c.credits"
+        }
+    }
+}
+
+UPDATE_CREDITS = {
+    "update": {
+        "model-id": "Course",
+        "reflect-on-web": False,
+        "data": {
+            "id": "?c.id",
+            "name": "?c.name",
+            "credits": -99
+        }
+    }
+}
+
+DELETE_COURSE = {
+    "delete": {
+        "model-id": "Course",
+        "reflect-on-web": False,
+        "data": {
+            "id": "?c.id"
+        }
+    }
+}
+
+
+def build_course_env(build_env, then):
+    env_provider = build_env([COURSE_DSD], [{
+        "rule-name": "Change_course",
+        "salience": 10,
+        "run-once": True,
+        "when": [
+            { "?c<-": "[Course.credits == 8]" }
+        ],
+        "then": then
+    }])
+    env_provider.insert_facts("Course", [
+        { "id": 1, "name": "Course 1", "credits": 8 }
+    ])
+    return env_provider
+
+
+def courses(env_provider):
+    return [dict(fact) for fact in env_provider.env.facts() \
+            if fact.template.name == "Course"]
+
+
+def test_update_then_return_sees_matched_fact(build_env, run_quietly):
+    env_provider = build_course_env(build_env,
+                                    [UPDATE_CREDITS, RETURN_CREDITS])
+
+    assert run_quietly(env_provider) == [{ "id": 1, "credits": 8 }]
+    assert courses(env_provider) == [
+        { "id": 1, "name": "Course 1", "credits": -99 }
+    ]
+
+
+def test_delete_then_return_sees_matched_fact(build_env, run_quietly):
+    env_provider = build_course_env(build_env,
+                                    [DELETE_COURSE, RETURN_CREDITS])
+
+    assert run_quietly(env_provider) == [{ "id": 1, "credits": 8 }]
+    assert courses(env_provider) == []
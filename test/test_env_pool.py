@@ -0,0 +1,82 @@
+from akashic.env_pool import EnvPool
+from akashic.exceptions import AkashicError, ErrType
+
+import pytest
+
+
+POOL_SIZE = 3
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+COURSE_RULE = "(defrule Course_rule (Course (id ?id)) => )"
+
+
+@pytest.fixture
+def pool(insert_dsd):
+    pool = EnvPool(POOL_SIZE)
+    pool.broadcast(lambda env_provider: \
+        insert_dsd(env_provider, COURSE_DSD))
+    pool.broadcast(lambda env_provider: \
+        env_provider.insert_rule("Course_rule", COURSE_RULE))
+
+    # Every environment holds its own facts
+    for i, env_provider in enumerate(pool.env_providers):
+        env_provider.insert_facts("Course", [
+            { "id": j, "credits": i } for j in range(0, i + 1)
+        ])
+    return pool
+
+
+def state(env_provider):
+    return (sorted(env_provider.get_rule_names()),
+            env_provider.get_template_names(),
+            env_provider.get_facts(),
+            sorted([str(activation) for activation \
+                    in env_provider.env.activations()]))
+
+
+def test_broadcast_changes_all_environments(pool):
+    result = pool.broadcast(lambda env_provider: \
+        env_provider.insert_rule("Other_rule", COURSE_RULE \
+                                 .replace("Course_rule", "Other_rule")))
+
+    assert result == None
+    assert pool.idle.qsize() == POOL_SIZE
+    for env_provider in pool.env_providers:
+        assert "Other_rule" in env_provider.get_rule_names()
+
+
+def test_failed_broadcast_restores_changed_environments(pool):
+    # Fire some activations, so the agenda differs from matches
+    pool.env_providers[2].env.run(1)
+    states = [state(env_provider) for env_provider in pool.env_providers]
+
+    changed = []
+    def change(env_provider):
+        env_provider.remove_rule("Course_rule")
+        changed.append(env_provider)
+        if len(changed) == 3:
+            raise AkashicError("Change failed.", 0, 0, ErrType.SYSTEM)
+
+    with pytest.raises(AkashicError):
+        pool.broadcast(change)
+
+    assert pool.idle.qsize() == POOL_SIZE
+    assert len(set(map(id, pool.env_providers))) == POOL_SIZE
+    assert [state(env_provider) for env_provider \
+            in pool.env_providers] == states
+    for env_provider in changed:
+        assert not env_provider in pool.env_providers
+
+    with pool.acquire() as env_provider:
+        assert env_provider in pool.env_providers
+
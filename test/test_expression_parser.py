@@ -0,0 +1,57 @@
+import json
+import pytest
+
+from akashic.exceptions import AkashicError
+
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+# Statements with invalid expression, and offset in the expression
+# at which error is reported
+INVALID_STATEMENTS = [
+    ({ "?a=": "1 +" }, 3),
+    ({ "?a=": "((1 + 2)" }, 8),
+    ({ "?c<-": "[Course.id == ]" }, 14),
+    ({ "?a=": "((((1+2)))) +" }, 13),
+    ({ "?a=": "1 2" }, 2),
+    ({ "?a=": "(1 + ) * 2" }, 5),
+    ({ "assert": "test[Course.credits > 1" }, 23),
+    ({ "assert": "[Course.credits >]" }, 17)
+]
+
+
+def build_rule(statement):
+    return json.dumps({
+        "rule-name": "Course_rule",
+        "salience": 10,
+        "when": [statement],
+        "then": []
+    }, indent=True)
+
+
+@pytest.mark.parametrize("statement, offset", INVALID_STATEMENTS)
+def test_invalid_expression_is_syntax_error(build_env, transpile,
+                                            statement, offset):
+    env_provider = build_env([COURSE_DSD])
+    rule = build_rule(statement)
+
+    with pytest.raises(AkashicError) as error:
+        transpile(env_provider, rule, use_cache=False)
+
+    # Columns are counted from 1, expression starts after its quote
+    expression = list(statement.values())[0]
+    line = [line for line in rule.split("\n") \
+            if json.dumps(expression) in line][0]
+    assert error.value.err_type == "SYNTACTIC"
+    assert error.value.line == rule.split("\n").index(line) + 1
+    assert error.value.col == \
+        line.index(json.dumps(expression)) + 1 + offset + 1
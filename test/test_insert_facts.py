@@ -0,0 +1,67 @@
+ITEM_DSD = {
+    "data-source-definition-name": "Item",
+    "model-id": "Item",
+    "model-description": "Holds item data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "qty", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+# Activated for every item, once there are at least 3 items in stock
+COUNT_RULE = {
+    "rule-name": "Enough_items",
+    "salience": 10,
+    "when": [
+        { "?i<-": "[Item.qty > 0]" },
+        { "?c=": "count(Item.qty > 0)" },
+        { "assert": "test[?c >= 3]" }
+    ],
+    "then": []
+}
+
+
+def count_value(env_provider):
+    return env_provider.env.eval(
+        "(__count_value \"Item\" \"?item0\" \"(> ?item0:qty 0)\")")
+
+
+def activations(env_provider):
+    return sorted([str(activation) for activation \
+                   in env_provider.env.activations()])
+
+
+def insert_both_ways(build_env, batches):
+    """ Inserts batches of records by insert_facts into one environment
+        and record by record by insert_fact into the other one
+    """
+
+    single_env = build_env([ITEM_DSD], [COUNT_RULE])
+    bulk_env = build_env([ITEM_DSD], [COUNT_RULE])
+    for records in batches:
+        for record in records:
+            single_env.insert_fact("(Item (id {0}) (qty {1}))" \
+                                   .format(record["id"], record["qty"]))
+        bulk_env.insert_facts("Item", records)
+    return single_env, bulk_env
+
+
+def test_insert_facts_matches_insert_fact(build_env):
+    single_env, bulk_env = insert_both_ways(build_env, [
+        [{ "id": i, "qty": i + 1 } for i in range(0, 5)]
+    ])
+
+    assert len(activations(single_env)) > 0
+    assert activations(bulk_env) == activations(single_env)
+    assert count_value(bulk_env) == count_value(single_env) == 5
+
+
+def test_insert_facts_updates_existing_counters(build_env):
+    single_env, bulk_env = insert_both_ways(build_env, [
+        [{ "id": 0, "qty": 1 }],
+        [{ "id": i, "qty": 1 if i % 2 == 0 else 0 } for i in range(1, 7)]
+    ])
+
+    assert activations(bulk_env) == activations(single_env)
+    assert count_value(bulk_env) == count_value(single_env) == 4
@@ -0,0 +1,80 @@
+import clips
+import pytest
+
+from akashic.arules.lhs_optimizer import LHSOptimizer
+
+
+TEMPLATES = [
+    "(deftemplate A (slot x) (slot y))",
+    "(deftemplate B (slot x) (slot y))",
+    "(deftemplate C (slot x) (slot y))"
+]
+
+FACTS = ["({0} (x {1}) (y {2}))".format(template, x, y) \
+         for template in ["A", "B", "C"] \
+         for x in range(0, 3) for y in range(0, 3)]
+
+LHS_CASES = [
+    # Predicate uses variable before later slot of the pattern binds it
+    [
+        "?f0 <- (B (x 0) (y ?v0))",
+        "(A (x ?v1&:(> ?v1 ?v0)) (y ?v0))",
+        "(C (x 1) (y 2))"
+    ],
+    # Connective uses variable before later slot of the pattern binds it
+    [
+        "(B (x ?v0) (y ?v1))",
+        "(A (x ~?v1) (y ?v1))",
+        "(C (x 2) (y 2))"
+    ],
+    # Variable bound first and used later in the same pattern
+    [
+        "(B (x ?v0) (y ?v1))",
+        "(A (x ?v2&:(< ?v2 ?v0)) (y ?v2))",
+        "(test (> ?v1 0))",
+        "(C (x 0) (y 0))"
+    ],
+    # Filters wait for patterns which bind their variables
+    [
+        "?a <- (A (x ?v0))",
+        "?b <- (B (y ?v1&:(= ?v1 ?v0)))",
+        "(test (neq ?a ?b))",
+        "(not (C (x ?v2&:(= ?v2 (+ ?v1 2)))))",
+        "(C (x 1) (y 1))"
+    ]
+]
+
+
+def build_rule(env, rule_name, lhs):
+    env.build("(defrule {0} {1} =>)".format(rule_name, " ".join(lhs)))
+    return env.find_rule(rule_name)
+
+
+def activations(lhs):
+    env = clips.Environment()
+    for template in TEMPLATES:
+        env.build(template)
+    build_rule(env, "Checked_rule", lhs)
+    for fact in FACTS:
+        env.assert_string(fact)
+
+    # Facts of activation are listed in order of patterns
+    return sorted([sorted(str(activation).split(": ")[1].split(",")) \
+                   for activation in env.activations()])
+
+
+@pytest.mark.parametrize("lhs", LHS_CASES)
+@pytest.mark.parametrize("fact_counts", [None, { "A": 1, "B": 1000 }])
+def test_optimized_rule_has_same_activations(lhs, fact_counts):
+    optimized = LHSOptimizer(fact_counts).optimize(lhs)
+
+    assert sorted(optimized) == sorted(lhs)
+    assert len(activations(lhs)) > 0
+    assert activations(optimized) == activations(lhs)
+
+
+def test_pattern_stays_after_binder_of_its_predicate():
+    lhs = LHS_CASES[0]
+    optimized = LHSOptimizer({ "A": 1, "B": 1000 }).optimize(lhs)
+
+    assert optimized.index(lhs[1]) > optimized.index(lhs[0])
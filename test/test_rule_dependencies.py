@@ -0,0 +1,65 @@
+import json
+
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+COURSE_RULE = json.dumps({
+    "rule-name": "Course_rule",
+    "salience": 10,
+    "when": [
+        { "?c<-": "[Course.credits > 1]" }
+    ],
+    "then": [
+        { "return": { "tag": "course", "data": { "id": "?c.id" } } }
+    ]
+}, indent=True)
+
+
+def with_fields(fields):
+    dsd = dict(COURSE_DSD)
+    dsd["fields"] = COURSE_DSD["fields"] + fields
+    return dsd
+
+
+def test_rule_without_cache_entry_is_registered(build_env, transpile,
+                                                load_data_provider):
+    env_provider = build_env([COURSE_DSD])
+    transpiler = transpile(env_provider, COURSE_RULE, use_cache=False)
+
+    # Rule persisted without dependencies
+    cache_entry = env_provider.insert_rule(transpiler.rule_name,
+                                           transpiler.tranpiled_rule,
+                                           COURSE_RULE)
+    assert list(cache_entry.dependencies.keys()) == ["Course"]
+    assert env_provider.rule_dependencies.lookup("Course_rule") != None
+
+    # Rule is swapped together with DSD it depends on
+    env_provider.update_data_provider("Course", load_data_provider(
+        env_provider,
+        with_fields([{ "field-name": "name", "type": "STRING",
+                       "use-as": "data" }])))
+    assert env_provider.has_rule("Course_rule")
+
+
+def test_stale_cache_entry_is_transpiled_again(build_env, transpile):
+    env_provider = build_env([COURSE_DSD])
+    transpiler = transpile(env_provider, COURSE_RULE, use_cache=False)
+    cache_entry = transpiler.cache_entry
+    cache_entry.bridge_signature = "stale"
+
+    inserted = env_provider.insert_rule(transpiler.rule_name,
+                                        "(defrule Course_rule =>)",
+                                        COURSE_RULE,
+                                        cache_entry)
+    assert inserted.bridge_signature == \
+        env_provider.get_bridge_signature()
+    assert "Course" in str(env_provider.env.find_rule("Course_rule"))
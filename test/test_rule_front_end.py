@@ -0,0 +1,106 @@
+import re
+import glob
+import json
+import pytest
+
+from os.path import join, dirname, basename
+
+from akashic.arules.transpiler import Transpiler
+from akashic.exceptions import AkashicError
+
+from benchmarks.suite.environment import build_env
+from benchmarks.suite.generator import RuleGenerator, DEFAULT_PROFILES, \
+    build_dsd
+
+
+SAMPLES_PATH = join(dirname(__file__), "samples")
+
+# Unique id of query rule, generated for every assistance rule
+QUERY_ID = re.compile(r'[0-9a-f]{32}')
+
+# Statements with semantic errors, reported at positions of
+# model objects
+INVALID_STATEMENTS = [
+    { "?c<-": "[Nope]" },
+    { "?c<-": "[Course.nope == 1]" },
+    { "?a=": "Course.name * 2" },
+    { "?a=": "Course.name ^ 2" },
+    { "?a=": "not Course.name" },
+    { "?a=": "count(Nope)" },
+    { "?a=": "?q.id" },
+    { "assert": "test[Course.name]" },
+    { "?a=": "nofunc()" }
+]
+
+# Size of benchmark corpus compared for every profile
+NUM_OF_MODELS = 5
+NUM_OF_RULES = 10
+
+
+def read(path):
+    with open(path, "r") as sample:
+        return sample.read()
+
+
+def sample_dsd(name):
+    # Read APIs of sample DSDs are not supported by the DSD grammar
+    dsd = json.loads(read(join(SAMPLES_PATH, "ads", name)))
+    dsd["apis"] = [api for api in dsd["apis"] \
+                   if not api["operation"].startswith("read")]
+    return dsd
+
+
+def sample_rules():
+    return [pytest.param(read(path), id=basename(path)) for path \
+            in sorted(glob.glob(join(SAMPLES_PATH, "arules", "*.json")))]
+
+
+def corpus_rules():
+    rules = []
+    for profile in DEFAULT_PROFILES:
+        generator = RuleGenerator(NUM_OF_MODELS)
+        for i, rule in enumerate(generator.build_corpus(profile,
+                                                        NUM_OF_RULES)):
+            rules.append(pytest.param(rule, id="{0}_{1}" \
+                                      .format(profile.name, i)))
+    return rules
+
+
+def invalid_rules():
+    return [pytest.param(json.dumps({
+        "rule-name": "Invalid_rule",
+        "salience": 10,
+        "when": [{ "?c<-": "[Course]" }, statement],
+        "then": []
+    }, indent=True), id="invalid_{0}".format(i)) \
+            for i, statement in enumerate(INVALID_STATEMENTS)]
+
+
+@pytest.fixture(scope="module")
+def env_provider():
+    dsds = [sample_dsd(name) \
+            for name in ["user_dsd.json", "course_dsd.json"]]
+    dsds += [build_dsd(i) for i in range(0, NUM_OF_MODELS)]
+    return build_env(dsds)
+
+
+def transpile(env_provider, akashic_rule, use_front_end):
+    """ Returns transpiled rule, or message and position of the error
+    """
+
+    transpiler = Transpiler(env_provider, debug=False, use_cache=False)
+    if not use_front_end:
+        transpiler.front_end.load = lambda rule, processors: None
+
+    try:
+        transpiler.load(akashic_rule)
+    except AkashicError as error:
+        return (error.message, error.line, error.col, error.err_type)
+    return QUERY_ID.sub("<query id>", transpiler.tranpiled_rule)
+
+
+@pytest.mark.parametrize("akashic_rule",
+                         sample_rules() + corpus_rules() + invalid_rules())
+def test_front_end_matches_textx(env_provider, akashic_rule):
+    assert transpile(env_provider, akashic_rule, True) == \
+           transpile(env_provider, akashic_rule, False)
@@ -0,0 +1,126 @@
+import pytest
+
+from akashic.exceptions import AkashicError
+
+
+COURSE_DSD = {
+    "data-source-definition-name": "Course",
+    "model-id": "Course",
+    "model-description": "Holds general course data",
+    "can-reflect-on-web": False,
+    "fields": [
+        { "field-name": "id", "type": "INTEGER", "use-as": "primary-key" },
+        { "field-name": "credits", "type": "INTEGER", "use-as": "data" }
+    ]
+}
+
+CREDITS_TEMPLATE = {
+    "rule-name": "Credits_template",
+    "salience": 10,
+    "parameters": [
+        { "parameter-name": "min_credits", "type": "INTEGER" }
+    ],
+    "when": [
+        { "?c<-": "[Course.credits > ?min_credits]" }
+    ],
+    "then": [
+        {
+            "return": {
+                "tag": "credits",
+                "data": {
+                    "id": "?c.id",
+                    "min_credits": "?min_credits"
+                }
+            }
+        }
+    ]
+}
+
+NUM_OF_COURSES = 5
+
+
+@pytest.fixture
+def env_provider(build_env):
+    env_provider = build_env([COURSE_DSD], [CREDITS_TEMPLATE])
+    env_provider.insert_facts("Course", [
+        { "id": i, "credits": i } for i in range(0, NUM_OF_COURSES)
+    ])
+    return env_provider
+
+
+def matches(run_quietly, env_provider):
+    return sorted([(data["min_credits"], data["id"]) \
+                   for data in run_quietly(env_provider)])
+
+
+def test_every_instance_fires_for_its_matches(env_provider, run_quietly):
+    env_provider.insert_rule_instances("Credits_template", [
+        { "instance_id": "low", "min_credits": 2 },
+        { "instance_id": "high", "min_credits": 3 }
+    ])
+
+    assert matches(run_quietly, env_provider) == \
+        [(2, 3), (2, 4), (3, 4)]
+    assert env_provider.get_rule_names().count("Credits_template") == 1
+
+
+def test_instance_with_same_id_is_replaced(env_provider, run_quietly):
+    env_provider.insert_rule_instances("Credits_template", [
+        { "instance_id": "low", "min_credits": 2 },
+        { "instance_id": "low", "min_credits": 1 }
+    ])
+    env_provider.insert_rule_instances("Credits_template", [
+        { "instance_id": "low", "min_credits": 3 }
+    ])
+
+    assert env_provider.get_rule_instances("Credits_template") == \
+        [{ "instance_id": "low", "min_credits": 3 }]
+    assert matches(run_quietly, env_provider) == [(3, 4)]
+
+
+def test_removed_instance_does_not_fire(env_provider, run_quietly):
+    env_provider.insert_rule_instances("Credits_template", [
+        { "instance_id": "low", "min_credits": 2 },
+        { "instance_id": "high", "min_credits": 3 }
+    ])
+    env_provider.remove_rule_instances("Credits_template", ["low"])
+
+    assert matches(run_quietly, env_provider) == [(3, 4)]
+    env_provider.remove_rule_instances("Credits_template")
+    assert env_provider.get_rule_instances("Credits_template") == []
+
+
+@pytest.mark.parametrize("instance", [
+    { "instance_id": "bad", "min_credits": "2" },
+    { "instance_id": "bad", "max_credits": 2 },
+    { "instance_id": "bad" }
+])
+def test_invalid_instance_is_not_inserted(env_provider, instance):
+    with pytest.raises(AkashicError):
+        env_provider.insert_rule_instances("Credits_template", [
+            { "instance_id": "low", "min_credits": 2 },
+            instance
+        ])
+
+    assert env_provider.get_rule_instances("Credits_template") == []
+
+
+def test_instances_are_kept_when_rule_is_inserted_again(env_provider,
+                                                        insert_rule,
+                                                        run_quietly):
+    env_provider.insert_rule_instances("Credits_template", [
+        { "instance_id": "high", "min_credits": 3 }
+    ])
+    env_provider.remove_rule("Credits_template", keep_instances=True)
+    insert_rule(env_provider, CREDITS_TEMPLATE)
+
+    assert matches(run_quietly, env_provider) == [(3, 4)]
+
+
+def test_rule_template_cannot_run_once(env_provider, transpile):
+    rule = dict(CREDITS_TEMPLATE, **{ "run-once": True })
+
+    with pytest.raises(AkashicError) as error:
+        transpile(env_provider, rule, use_cache=False)
+
+    assert error.value.err_type == "SEMANTIC"